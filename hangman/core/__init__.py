@@ -1,3 +1,4 @@
 from hangman.core.api import IAPI, API
 from hangman.core.game import Hangman
+from hangman.core.index import Index
 import hangman.core.dictionary
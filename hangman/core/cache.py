@@ -0,0 +1,144 @@
+"""
+Bounded least recently used cache that can be shared between players
+& games, with hit/miss counters to measure how effective it is
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+
+MAX_SIZE = 1_000_000
+
+
+def sizeof(obj: Any) -> int:
+    """
+    Approximate memory used by an object, including the items of
+    tuples, lists, sets & dicts
+
+    :param obj: object to measure
+    :return: (int) size in bytes
+    """
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size = size + sum(sizeof(x) + sizeof(y) for x, y in obj.items())
+    elif isinstance(obj, (tuple, list, set, frozenset)):
+        size = size + sum(sizeof(x) for x in obj)
+    elif hasattr(obj, "nbytes"):
+        size = max(size, obj.nbytes)
+
+    return size
+
+
+class LRUCache:
+    """
+    Thread safe least recently used cache bounded by both the number of
+    entries & the approximate memory they use
+    """
+
+    def __init__(self, max_size: int = MAX_SIZE, max_bytes: int = None) -> None:
+        """
+        Create empty cache
+
+        :param max_size: (int) max number of entries to hold
+        :param max_bytes: (int) (default=None) max approximate memory in
+            bytes for keys & values. None means no memory limit
+        """
+
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return value for key & mark it as most recently used
+
+        :param key: cache key
+        :param default: value to return when key is not cached
+        :return: cached value or default
+        """
+
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses = self.misses + 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits = self.hits + 1
+
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add value to the cache, evicting least recently used entries
+        when it is full
+
+        :param key: cache key
+        :param value: value to store
+        """
+
+        size = sizeof(key) + sizeof(value)
+
+        with self._lock:
+            if key in self._data:
+                self.bytes = self.bytes - self._sizes.pop(key)
+                del self._data[key]
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes = self.bytes + size
+
+            while len(self._data) > self.max_size or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _key, _ = self._data.popitem(last=False)
+                self.bytes = self.bytes - self._sizes.pop(_key)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Return List of (key, value) pairs, least recently used first"""
+
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self) -> None:
+        """Remove all entries & reset counters"""
+
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.hits = 0
+            self.misses = 0
+            self.bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return fraction of lookups that were hits"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return dict of cache statistics"""
+        return {
+            "size": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
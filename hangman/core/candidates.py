@@ -0,0 +1,217 @@
+"""
+Candidate word set for a single game.  Candidates are held as an array
+of word ids into a length bucket of a hangman.core.index.Index so that
+filtering on a guess is a single vectorized operation over the encoded
+words rather than a scan of python strings.
+"""
+
+from typing import Iterable, List, Tuple, Type
+
+import numpy as np
+
+from hangman.core.index import ALPHABET, MASK_CHAR, Index, letter_bits
+
+
+def ranked(frequency: Type["np.array"], exclude: int = 0) -> List[str]:
+    """
+    Order letters by frequency, ties broken alphabetically
+
+    :param frequency: (np.array) of shape (26,) with counts for 'a' ... 'z'
+    :param exclude: (int) letter presence mask of letters to leave out
+        i.e. letters already guessed (see hangman.core.index.letter_bits)
+    :return: List[str] of letters with a count > 0, most frequent first
+    """
+
+    order = np.argsort(-frequency, kind="stable")
+    return [
+        ALPHABET[x] for x in order if (frequency[x] > 0) and not (exclude >> x) & 1
+    ]
+
+
+def partition(
+        matrix: Type["np.array"], ids: Type["np.array"], letter: str
+) -> List[Tuple[int, Type["np.array"]]]:
+    """
+    Split words by the positions a guessed letter would reveal
+
+    :param matrix: (np.array) encoded words of one length (see Index.matrix)
+    :param ids: (np.array) ids of words to split
+    :param letter: (str) guessed letter
+    :return: List of Tuples sorted by pattern
+        - [0] (int) bit mask of positions holding the letter, 0 if not present
+        - [1] (np.array) ids of words with that pattern
+    """
+
+    code = ALPHABET.index(letter)
+
+    if len(ids) == 1:
+        # Single word so skip array operations
+        word = matrix[ids[0]].tolist()
+        return [(sum(1 << i for i, x in enumerate(word) if x == code), ids)]
+
+    weights = 1 << np.arange(matrix.shape[1], dtype=np.int64)
+    patterns = (matrix[ids] == code).astype(np.int64) @ weights
+
+    unique, inverse = np.unique(patterns, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    splits = np.cumsum(np.bincount(inverse, minlength=len(unique)))[:-1]
+
+    return list(zip(unique.tolist(), np.split(ids[order], splits)))
+
+
+class Candidates:
+    """
+    Set of words from one length bucket of an index that are still
+    consistent with the guesses made in a game
+    """
+
+    def __init__(self, index: Index, length: int) -> None:
+        """
+        Start with all words of the given length
+
+        :param index: (hangman.core.index.Index) dictionary index
+        :param length: (int) length of the word being guessed
+        """
+
+        self.index = index
+        self.length = length
+        self.matrix = index.matrix(length)
+        self.bits = index.bits(length)
+
+        # Ids of remaining words in bucket, None means all words
+        self._ids = None
+
+        # Letter counts & the ids they were last counted over so counts
+        # can be updated by only looking at words removed since
+        self._frequency = index.frequency(length)
+        self._counted = None
+
+        # Running total of words read to maintain letter counts
+        self.touched = 0
+
+    @classmethod
+    def from_state(cls, index: Index, mask: str, wrong_letters: Iterable[str]) -> "Candidates":
+        """
+        Create candidates for a game state without replaying its guesses
+
+        :param index: (hangman.core.index.Index) dictionary index
+        :param mask: (str) masked word i.e. "h_pp_"
+        :param wrong_letters: iterable of letters not in the word
+        :return: (Candidates) instance
+        """
+
+        candidates = cls(index, len(mask))
+
+        wrong_letters = set(wrong_letters)
+        if len(wrong_letters) > 0 or any(x != MASK_CHAR for x in mask):
+            candidates._ids = index.candidates(mask, wrong_letters)
+
+        return candidates
+
+    def __len__(self) -> int:
+        return len(self.matrix) if self._ids is None else len(self._ids)
+
+    @property
+    def ids(self) -> Type["np.array"]:
+        """Return (np.array) of ids of remaining words in the length bucket"""
+        return np.arange(len(self.matrix)) if self._ids is None else self._ids
+
+    @property
+    def words(self) -> List[str]:
+        """Return List[str] of remaining words"""
+        _words = self.index.words(self.length)
+        return list(_words) if self._ids is None else [_words[x] for x in self._ids]
+
+    def _rows(self) -> Type["np.array"]:
+        """Return encoded remaining words"""
+        return self.matrix if self._ids is None else self.matrix[self._ids]
+
+    def _bits(self) -> Type["np.array"]:
+        """Return letter presence masks of remaining words"""
+        return self.bits if self._ids is None else self.bits[self._ids]
+
+    def _keep(self, keep: Type["np.array"]) -> None:
+        """Keep remaining words where bool array keep is True"""
+        self._ids = self.ids[keep]
+
+    def correct(self, letter: str, word: str) -> None:
+        """
+        Keep only words that have the letter at exactly the positions
+        it was revealed in the masked word
+
+        :param letter: (str) correctly guessed letter
+        :param word: (str) masked word with the letter revealed
+        """
+
+        positions = [i for i, x in enumerate(word) if x == letter]
+        others = [i for i, x in enumerate(word) if x != letter]
+
+        # Look up words with the letter at the revealed positions
+        ids = self.index.positions(self.length, letter, positions)
+        if self._ids is not None:
+            ids = np.intersect1d(self._ids, ids, assume_unique=True)
+
+        # Then drop any that also have the letter elsewhere
+        if len(others) > 0 and len(ids) > 0:
+            ids = ids[~(self.matrix[ids][:, others] == ALPHABET.index(letter)).any(axis=1)]
+
+        self._ids = ids
+
+    def wrong(self, letter: str) -> None:
+        """
+        Remove all words containing the letter
+
+        :param letter: (str) incorrectly guessed letter
+        """
+        self.exclude(letter)
+
+    def exclude(self, letters: Iterable[str]) -> None:
+        """
+        Remove all words containing any of the letters
+
+        :param letters: iterable of incorrectly guessed letters
+        """
+
+        bits = letter_bits(letters)
+        if bits:
+            self._keep((self._bits() & np.uint32(bits)) == 0)
+
+    def _count(self, ids: Type["np.array"]) -> Type["np.array"]:
+        """Return letter counts across words with the given ids"""
+
+        self.touched = self.touched + len(ids)
+
+        counts = np.bincount(self.matrix[ids].ravel(), minlength=len(ALPHABET))
+        return counts[:len(ALPHABET)]
+
+    def frequency(self) -> Type["np.array"]:
+        """
+        Return letter counts across remaining words.  Counts are updated
+        incrementally, subtracting counts of words removed since the last
+        call unless more words were removed than remain in which case the
+        remaining words are counted
+
+        :return: (np.array) of shape (26,) with counts for 'a' ... 'z'
+        """
+
+        if self._ids is None:
+            return self._frequency
+
+        counted = self._counted
+        n_counted = len(self.matrix) if counted is None else len(counted)
+        n_removed = n_counted - len(self._ids)
+
+        if n_removed == 0:
+            return self._frequency
+
+        if n_removed < len(self._ids):
+            present = np.zeros(len(self.matrix), dtype=bool)
+            present[self._ids] = True
+            counted = np.arange(len(self.matrix)) if counted is None else counted
+            self._frequency = self._frequency - self._count(counted[~present[counted]])
+        else:
+            self._frequency = self._count(self._ids)
+
+        self._counted = self._ids
+
+        return self._frequency
@@ -3,13 +3,11 @@
 import os
 from typing import List
 
-import pandas as pd
-
 DATA = os.path.abspath(os.path.join(os.path.abspath(__file__), "..", "..", "..", "data"))
 WORDS = os.path.join(DATA, "words_250000_train.txt")
 
 
-def dataframe(words: List[str]) -> pd.DataFrame:
+def dataframe(words: List[str]) -> "pandas.DataFrame":
     """
     Convert list of words into a pandas dataframe with 2 columns.
     First with word named 'word' second with word length name 'len'
@@ -19,6 +17,8 @@ def dataframe(words: List[str]) -> pd.DataFrame:
     :return pd.DataFrame with 2 columns [word, len]
     """
 
+    import pandas as pd
+
     df = pd.DataFrame(words)
     df.rename(columns={0: "word"}, inplace=True)
     df["len"] = df["word"].str.len()
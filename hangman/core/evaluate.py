@@ -0,0 +1,153 @@
+"""
+Exhaustive evaluation of a deterministic player over a whole dictionary.
+Rather than playing a game per word, words are partitioned by the
+response to each guess & each partition is played on, so every distinct
+game state is only visited once no matter how many words share it
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List
+
+import numpy as np
+
+from hangman.core.candidates import partition
+from hangman.core.index import MASK_CHAR, Index
+
+MAX_TRIES = 6
+
+
+@dataclass
+class Evaluation:
+    games: int = 0
+    wins: int = 0
+    num_guesses: Dict[int, int] = field(default_factory=dict)
+    guess_map: Dict[int, int] = field(default_factory=dict)
+    by_length: Dict[int, "Evaluation"] = field(default_factory=dict)
+
+    @property
+    def win_rate(self) -> float:
+        """Return fraction of games won"""
+        return self.wins / self.games if self.games > 0 else 0.0
+
+    def update(self, other: "Evaluation") -> None:
+        """Add results from another evaluation"""
+
+        self.games = self.games + other.games
+        self.wins = self.wins + other.wins
+        for x, y in other.num_guesses.items():
+            self.num_guesses[x] = self.num_guesses.get(x, 0) + y
+        for x, y in other.guess_map.items():
+            self.guess_map[x] = self.guess_map.get(x, 0) + y
+
+
+def evaluate_length(
+        index: Index,
+        length: int,
+        policy: Callable[[str, FrozenSet[str]], str],
+        *,
+        max_tries: int = MAX_TRIES,
+) -> Evaluation:
+    """
+    Evaluate a player on every word of a given length
+
+    :param index: (hangman.core.index.Index) dictionary index
+    :param length: (int) word length
+    :param policy: function taking a masked word & the set of incorrect
+        guesses and returning the next guess i.e. Heuristic.guess_for
+    :param max_tries: (int) number of incorrect guesses allowed
+    :return: (Evaluation) results summed across all words of the length
+    """
+
+    matrix = index.matrix(length)
+    result = Evaluation()
+
+    if len(matrix) == 0:
+        return result
+
+    # Every game starts with its word length in guess map (see hangman.core.game)
+    result.guess_map[length] = len(matrix)
+
+    # Stack of game states: (word ids, mask, incorrect guesses, correct guesses, # guesses)
+    stack = [(np.arange(len(matrix)), [MASK_CHAR] * length, frozenset(), frozenset(), 0)]
+
+    while len(stack) > 0:
+        ids, mask, wrong, valid, n_guesses = stack.pop()
+        n_words = len(ids)
+
+        letter = policy("".join(mask), wrong)
+        if letter in wrong or letter in valid:
+            raise ValueError(f"Policy repeated guess [{letter}] for [{''.join(mask)}]")
+
+        n_guesses = n_guesses + 1
+
+        # Number of guesses per letters left to find
+        letters_left = length - len(valid)
+        result.guess_map[letters_left] = result.guess_map.get(letters_left, 0) + n_words
+
+        for pattern, _ids in partition(matrix, ids, letter):
+            _n = len(_ids)
+
+            # Incorrect guess
+            if pattern == 0:
+                _wrong = wrong.union(letter)
+                if len(_wrong) >= max_tries:
+                    _end(result, _n, n_guesses, win=False)
+                else:
+                    stack.append((_ids, mask, _wrong, valid, n_guesses))
+                continue
+
+            _mask = [letter if (pattern >> i) & 1 else x for i, x in enumerate(mask)]
+            if MASK_CHAR not in _mask:
+                _end(result, _n, n_guesses, win=True)
+            else:
+                stack.append((_ids, _mask, wrong, valid.union(letter), n_guesses))
+
+    return result
+
+
+def _end(result: Evaluation, n_words: int, n_guesses: int, *, win: bool) -> None:
+    """Record the end of n_words games"""
+
+    result.games = result.games + n_words
+    result.wins = result.wins + (n_words if win else 0)
+    result.num_guesses[n_guesses] = result.num_guesses.get(n_guesses, 0) + n_words
+
+
+def evaluate(
+        words: List[str],
+        policy: Callable[[str, FrozenSet[str]], str],
+        *,
+        max_tries: int = MAX_TRIES,
+        lengths: List[int] = None,
+        verbose: bool = False,
+) -> Evaluation:
+    """
+    Evaluate a deterministic player on every word in a dictionary,
+    giving the exact result of playing one game per word
+
+    :param words: List[str] dictionary of words to play, or a pre-built
+        hangman.core.index.Index
+    :param policy: function taking a masked word & the set of incorrect
+        guesses and returning the next guess i.e. Heuristic.guess_for
+    :param max_tries: (int) number of incorrect guesses allowed
+    :param lengths: List[int] (default=None) only play words of these lengths
+    :param verbose: (bool) when True print win rate per length to std out
+    :return: (Evaluation) results across all words, with a breakdown per
+        word length in Evaluation.by_length
+    """
+
+    index = words if isinstance(words, Index) else Index(words)
+
+    result = Evaluation()
+    for length in (index.lengths if lengths is None else lengths):
+        _result = evaluate_length(index, length, policy, max_tries=max_tries)
+        result.by_length[length] = _result
+        result.update(_result)
+
+        if verbose:
+            print(
+                f"Length [{length}]: [{_result.games}] games, "
+                f"win rate [{_result.win_rate:.4f}]"
+            )
+
+    return result
@@ -100,8 +100,8 @@ class Hangman:
                     win=True,
                     guess_map=guess_map,
                     word=word,
-                    guesses=self.api._guesses,
-                    num_guesses=len(self.api._guesses)
+                    guesses=self.api.guesses,
+                    num_guesses=len(self.api.guesses)
                 )
 
             elif response.status == hangman.core.api.Status.FAILED:
@@ -109,6 +109,6 @@ class Hangman:
                     win=False,
                     guess_map=guess_map,
                     word=word,
-                    guesses=self.api._guesses,
-                    num_guesses=len(self.api._guesses)
+                    guesses=self.api.guesses,
+                    num_guesses=len(self.api.guesses)
                 )
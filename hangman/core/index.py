@@ -0,0 +1,296 @@
+"""
+Dictionary index that is built once & shared between players.  Words
+are bucketed by length & pre-encoded as integer letter codes so that a
+new game only ever touches the words of the right length.
+"""
+
+import hashlib
+import string
+from typing import Dict, Iterable, List, Tuple, Type
+
+import numpy as np
+
+ALPHABET = string.ascii_lowercase
+MASK_CHAR = "_"
+
+# Letter code used for the masked character in encoded words
+MASK_CODE = len(ALPHABET)
+
+# Lookup from ascii byte to letter code, invalid characters map to 255
+_CODES = np.full(256, 255, dtype=np.uint8)
+_CODES[np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8)] = np.arange(len(ALPHABET))
+_CODES[ord(MASK_CHAR)] = MASK_CODE
+
+
+def encode(words: List[str], length: int) -> Type["np.array"]:
+    """
+    Encode a list of same length words into a 2D array of letter codes
+    where 'a' = 0 ... 'z' = 25 and the mask char = 26
+
+    :param words: List[str] of words all of length 'length'
+    :param length: (int) length of every word in words
+    :return: (np.array) uint8 array of shape (# words, length)
+    """
+
+    if len(words) == 0:
+        return np.zeros((0, length), dtype=np.uint8)
+
+    codes = _CODES[np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8)]
+    codes = codes.reshape(len(words), length)
+
+    if (codes > MASK_CODE).any():
+        raise ValueError(f"Words can only contain letters in [{ALPHABET}{MASK_CHAR}]")
+
+    return codes
+
+
+def letter_bits(letters: Iterable[str]) -> int:
+    """
+    Return 26-bit letter presence mask for a set of letters where bit
+    'i' is set when letter ALPHABET[i] is present
+
+    :param letters: iterable of lower case letters
+    :return: (int) bit mask
+    """
+
+    bits = 0
+    for letter in letters:
+        bits = bits | (1 << ALPHABET.index(letter))
+
+    return bits
+
+
+def presence(matrix: Type["np.array"]) -> Type["np.array"]:
+    """
+    Calculate 26-bit letter presence mask for each encoded word
+
+    :param matrix: (np.array) uint8 array of shape (# words, length)
+    :return: (np.array) uint32 array of shape (# words,)
+    """
+
+    bits = np.zeros(len(matrix), dtype=np.uint32)
+    if matrix.size == 0:
+        return bits
+
+    # Mask char is encoded as bit 26 so drop it from the result
+    _bits = np.left_shift(np.uint32(1), matrix.astype(np.uint32))
+    bits = np.bitwise_or.reduce(_bits, axis=1)
+
+    return bits & np.uint32((1 << len(ALPHABET)) - 1)
+
+
+def digest(words: List[str]) -> str:
+    """
+    Return digest of a word list, used to key caches & files built from it
+
+    :param words: List[str] of words
+    :return: (str) hex digest
+    """
+
+    return hashlib.blake2b("\n".join(words).encode("ascii"), digest_size=16).hexdigest()
+
+
+class Index:
+    """
+    Dictionary of words bucketed by length.  Each bucket holds the
+    words, their encoded letter codes & the letter frequency across
+    the bucket, all calculated once when the index is created
+    """
+
+    def __init__(self, words: List[str]) -> None:
+        """
+        Build index over the input words
+
+        :param words: List[str] of lower case words to index
+        """
+
+        self.dictionary = words
+
+        # Digest of the word list used to key caches shared between indexes
+        self.key = digest(words)
+
+        buckets = {}
+        for word in words:
+            buckets.setdefault(len(word), []).append(word)
+
+        self._words: Dict[int, List[str]] = buckets
+        self._matrix: Dict[int, Type["np.array"]] = {
+            length: encode(_words, length) for length, _words in buckets.items()
+        }
+        self._frequency: Dict[int, Type["np.array"]] = {
+            length: np.bincount(matrix.ravel(), minlength=len(ALPHABET))[:len(ALPHABET)]
+            for length, matrix in self._matrix.items()
+        }
+        self._bits: Dict[int, Type["np.array"]] = {
+            length: presence(matrix) for length, matrix in self._matrix.items()
+        }
+
+        self._total = np.zeros(len(ALPHABET), dtype=np.int64)
+        for frequency in self._frequency.values():
+            self._total = self._total + frequency
+
+        # Positional inverted index, built per length on first use
+        self._postings: Dict[int, Tuple[Type["np.array"], Type["np.array"]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.dictionary)
+
+    @property
+    def lengths(self) -> List[int]:
+        """Return sorted list of word lengths present in the index"""
+        return sorted(self._words)
+
+    def words(self, length: int) -> List[str]:
+        """
+        Return all words of a given length.  The returned list is shared
+        so must not be modified
+
+        :param length: (int) word length
+        :return: List[str] of words (empty if no words of that length)
+        """
+        return self._words.get(length, [])
+
+    def matrix(self, length: int) -> Type["np.array"]:
+        """
+        Return encoded words of a given length
+
+        :param length: (int) word length
+        :return: (np.array) uint8 array of shape (# words, length)
+        """
+        _matrix = self._matrix.get(length, None)
+        return np.zeros((0, length), dtype=np.uint8) if _matrix is None else _matrix
+
+    def bits(self, length: int) -> Type["np.array"]:
+        """
+        Return letter presence masks of words of a given length, aligned
+        with the rows of Index.matrix (see letter_bits)
+
+        :param length: (int) word length
+        :return: (np.array) uint32 array of shape (# words,)
+        """
+        _bits = self._bits.get(length, None)
+        return np.zeros(0, dtype=np.uint32) if _bits is None else _bits
+
+    def frequency(self, length: int = None) -> Type["np.array"]:
+        """
+        Return count of each letter across all words of a given length
+
+        :param length: (int) word length. When None return counts across
+            the whole dictionary
+        :return: (np.array) of shape (26,) with counts for 'a' ... 'z'
+        """
+        if length is None:
+            return self._total
+
+        _frequency = self._frequency.get(length, None)
+        return np.zeros(len(ALPHABET), dtype=np.int64) if _frequency is None else _frequency
+
+    def _positional(self, length: int) -> Tuple[Type["np.array"], Type["np.array"]]:
+        """
+        Return positional inverted index for words of a given length
+
+        :param length: (int) word length
+        :return: Tuple of np.arrays
+            - [0] word ids of shape (length, # words), each row sorted by
+              the letter at that position then by word id
+            - [1] offsets of shape (length, 28) where the ids of words with
+              letter code 'c' at position 'p' are [0][p, [1][p, c]:[1][p, c + 1]]
+        """
+
+        postings = self._postings.get(length, None)
+        if postings is None:
+            matrix = self.matrix(length)
+
+            order = np.argsort(matrix, axis=0, kind="stable").T.astype(np.int32)
+            offsets = np.zeros((length, MASK_CODE + 2), dtype=np.int64)
+            for position in range(length):
+                counts = np.bincount(matrix[:, position], minlength=MASK_CODE + 1)
+                offsets[position, 1:] = np.cumsum(counts[:MASK_CODE + 1])
+
+            postings = (order, offsets)
+            self._postings[length] = postings
+
+        return postings
+
+    def postings(self, length: int, position: int, letter: str) -> Type["np.array"]:
+        """
+        Return sorted ids of words of a given length with a letter at a position
+
+        :param length: (int) word length
+        :param position: (int) index of letter in word
+        :param letter: (str) letter at position
+        :return: (np.array) sorted int32 word ids, aligned with Index.matrix rows
+        """
+
+        order, offsets = self._positional(length)
+        code = ALPHABET.index(letter)
+
+        return order[position, offsets[position, code]:offsets[position, code + 1]]
+
+    def positions(self, length: int, letter: str, positions: List[int]) -> Type["np.array"]:
+        """
+        Return sorted ids of words of a given length with a letter at all of
+        the positions by intersecting postings, shortest first
+
+        :param length: (int) word length
+        :param letter: (str) letter at positions
+        :param positions: List[int] of indexes of letter in word
+        :return: (np.array) sorted int32 word ids, aligned with Index.matrix rows
+        """
+
+        if len(positions) == 0:
+            raise ValueError(f"No positions passed for letter [{letter}]")
+
+        postings = sorted(
+            [self.postings(length, x, letter) for x in positions], key=len
+        )
+
+        ids = postings[0]
+        for _ids in postings[1:]:
+            ids = np.intersect1d(ids, _ids, assume_unique=True)
+
+        return ids
+
+    def candidates(self, mask: str, wrong_letters: Iterable[str] = ()) -> Type["np.array"]:
+        """
+        Return all words consistent with a masked word & a set of incorrect
+        guesses i.e. mask="h_pp_" will return "happy" & "hippo" unless
+        wrong_letters contains "a" or "i"
+
+        :param mask: (str) masked word
+        :param wrong_letters: iterable of letters not in the word
+        :return: (np.array) sorted word ids, use Index.words(len(mask)) to
+            look up the words
+        """
+
+        length = len(mask)
+        matrix = self.matrix(length)
+
+        revealed = [x for x, y in enumerate(mask) if y != MASK_CHAR]
+        hidden = [x for x, y in enumerate(mask) if y == MASK_CHAR]
+
+        if len(revealed) > 0:
+            # Start with the shortest list of ids for a revealed letter
+            ids = min([self.postings(length, x, mask[x]) for x in revealed], key=len)
+            rows = matrix[ids]
+
+            # Then check all revealed letters match
+            codes = encode([mask], length)[0]
+            keep = (rows[:, revealed] == codes[revealed]).all(axis=1)
+
+            # Revealed letters can't be present at any masked position
+            if len(hidden) > 0:
+                lookup = np.zeros(MASK_CODE + 1, dtype=bool)
+                lookup[codes[revealed]] = True
+                keep = keep & ~lookup[rows[:, hidden]].any(axis=1)
+
+            ids = ids[keep]
+
+        else:
+            ids = np.arange(len(matrix))
+
+        bits = letter_bits(wrong_letters)
+        if bits:
+            ids = ids[(self.bits(length)[ids] & np.uint32(bits)) == 0]
+
+        return ids
@@ -1 +1,2 @@
 from hangman.model.basic.heuristic import Heuristic
+from hangman.model.basic.compiled import CompiledHeuristic
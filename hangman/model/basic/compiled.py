@@ -0,0 +1,292 @@
+"""
+Compiles the Heuristic player into a static decision tree per word
+length.  The heuristic is deterministic given the dictionary so every
+game state maps to one guess & every response to that guess maps to one
+child state.  Serving a guess is then a table lookup with no dictionary
+held in memory
+"""
+
+import os
+from typing import Dict, List, Type, Union
+
+import numpy as np
+
+import hangman.core.dictionary
+from hangman.core.candidates import partition
+from hangman.core.index import ALPHABET, MASK_CHAR, Index, digest
+from hangman.model import IPlayer
+
+TREE = os.path.join(hangman.core.dictionary.DATA, "heuristic-tree.npz")
+MAX_TRIES = 6
+
+
+class Tree:
+    """
+    Decision tree for words of one length.  Node 0 is the start of the
+    game, each node holds a guess & its edges map the positions revealed
+    by that guess (as a bit mask, 0 for an incorrect guess) to a child
+    node.  Responses that end the game have no edge
+    """
+
+    def __init__(
+            self,
+            guesses: Type["np.array"],
+            offsets: Type["np.array"],
+            patterns: Type["np.array"],
+            children: Type["np.array"],
+    ) -> None:
+        """
+        :param guesses: (np.array) uint8 letter code to guess at each node
+        :param offsets: (np.array) int32 of shape (# nodes + 1,), edges of
+            node 'i' are [offsets[i]:offsets[i + 1]]
+        :param patterns: (np.array) uint32 revealed positions of each edge,
+            sorted within each node
+        :param children: (np.array) int32 child node of each edge
+        """
+
+        self.guesses = guesses
+        self.offsets = offsets
+        self.patterns = patterns
+        self.children = children
+
+    def __len__(self) -> int:
+        return len(self.guesses)
+
+    def child(self, node: int, pattern: int) -> Union[int, None]:
+        """
+        Return child node reached from a node by a response
+
+        :param node: (int) current node
+        :param pattern: (int) bit mask of positions revealed by the guess
+        :return: (int) child node or None if the response isn't in the tree
+        """
+
+        start, end = self.offsets[node], self.offsets[node + 1]
+        idx = start + np.searchsorted(self.patterns[start:end], pattern)
+        if idx < end and self.patterns[idx] == pattern:
+            return int(self.children[idx])
+
+        return None
+
+
+def compile_length(index: Index, length: int, *, max_tries: int = MAX_TRIES) -> Tree:
+    """
+    Walk every game the Heuristic player can play for words of a given
+    length, partitioning candidate words by response after each guess
+
+    :param index: (hangman.core.index.Index) dictionary index
+    :param length: (int) word length
+    :param max_tries: (int) number of incorrect guesses allowed
+    :return: (Tree) decision tree
+    """
+
+    matrix = index.matrix(length)
+    all_hidden = (1 << length) - 1
+
+    guesses, offsets, patterns, children = [], [], [], []
+
+    # Queue of nodes to expand: (word ids, guessed letter mask, wrong guesses, hidden positions)
+    queue = [(np.arange(len(matrix)), 0, 0, all_hidden)]
+    head = 0
+
+    while head < len(queue):
+        ids, guessed, wrong, hidden = queue[head]
+        queue[head] = None
+        head = head + 1
+
+        if len(ids) == 1:
+            # Single candidate so skip array operations, same choice of
+            # letter as below for one word
+            word = matrix[ids[0]].tolist()
+            letter = min(
+                (x for x in set(word) if not (guessed >> x) & 1),
+                key=lambda x: (-word.count(x), x)
+            )
+
+        else:
+            # Most frequent letter not guessed yet, ties broken alphabetically
+            frequency = np.bincount(matrix[ids].ravel(), minlength=len(ALPHABET))
+            frequency = frequency[:len(ALPHABET)].astype(np.int64)
+            frequency[[x for x in range(len(ALPHABET)) if (guessed >> x) & 1]] = -1
+            letter = int(np.argmax(frequency))
+
+        guesses.append(letter)
+        offsets.append(len(patterns))
+
+        # Partition candidates by positions revealed
+        for pattern, _ids in partition(matrix, ids, ALPHABET[letter]):
+            _wrong = wrong + (pattern == 0)
+            _hidden = hidden & ~pattern
+
+            # Game over so no need for a child node
+            if _wrong >= max_tries or _hidden == 0:
+                continue
+
+            patterns.append(pattern)
+            children.append(len(queue))
+            queue.append((_ids, guessed | (1 << letter), _wrong, _hidden))
+
+    offsets.append(len(patterns))
+
+    return Tree(
+        guesses=np.array(guesses, dtype=np.uint8),
+        offsets=np.array(offsets, dtype=np.int32),
+        patterns=np.array(patterns, dtype=np.uint32),
+        children=np.array(children, dtype=np.int32),
+    )
+
+
+def compile_trees(
+        words: List[str] = None,
+        path: str = TREE,
+        *,
+        max_tries: int = MAX_TRIES,
+        verbose: bool = True,
+) -> Dict[int, Tree]:
+    """
+    Compile decision trees for every word length in the dictionary &
+    save them to a single compressed numpy file
+
+    :param words: List[str] dictionary, loaded with hangman.core.dictionary.load
+        when None
+    :param path: (str) file path to write trees to, None to skip writing
+    :param max_tries: (int) number of incorrect guesses allowed
+    :param verbose: (bool) when True print progress to std out
+    :return: Dict[int, Tree] trees keyed on word length
+    """
+
+    index = Index(hangman.core.dictionary.load() if words is None else words)
+
+    trees = {}
+    for length in index.lengths:
+        trees[length] = compile_length(index, length, max_tries=max_tries)
+        if verbose:
+            print(f"Compiled [{len(trees[length])}] nodes for length [{length}]")
+
+    if path is not None:
+        save(trees, path, index=index, max_tries=max_tries)
+
+    return trees
+
+
+def save(trees: Dict[int, Tree], path: str, *, index: Index, max_tries: int) -> None:
+    """
+    Save trees to a compressed numpy file
+
+    :param trees: Dict[int, Tree] trees keyed on word length
+    :param path: (str) file path to write to
+    :param index: (hangman.core.index.Index) index trees were compiled from
+    :param max_tries: (int) number of incorrect guesses allowed
+    """
+
+    arrays = {
+        "key": np.array(index.key),
+        "max_tries": np.array(max_tries),
+        # Letters ranked by whole dictionary frequency for states not in a tree
+        "fallback": np.argsort(-index.frequency(), kind="stable").astype(np.uint8),
+    }
+    for length, tree in trees.items():
+        arrays[f"{length}_guesses"] = tree.guesses
+        arrays[f"{length}_offsets"] = tree.offsets
+        arrays[f"{length}_patterns"] = tree.patterns
+        arrays[f"{length}_children"] = tree.children
+
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+class CompiledHeuristic(IPlayer):
+    """
+    Plays the same guesses as the Heuristic player by looking them up
+    in decision trees compiled by compile_trees.  If a game leaves the
+    tree, i.e. the word isn't in the dictionary, remaining letters are
+    guessed in order of frequency across the whole dictionary
+    """
+
+    def __init__(
+            self,
+            path: str = TREE,
+            *,
+            key: str = None,
+            dictionary: List[str] = None,
+    ) -> None:
+        """
+        Load decision trees from file, optionally checking they were compiled
+        from the dictionary in use
+
+        :param path: (str) file path written by compile_trees
+        :param key: (str) (default=None) expected digest of the dictionary,
+            i.e. hangman.core.index.digest(words)
+        :param dictionary: List[str] (default=None) dictionary games are played
+            with, only used to calculate key when it isn't passed.  The trees
+            aren't checked when neither is passed
+        """
+
+        if key is None and dictionary is not None:
+            key = digest(dictionary)
+
+        with np.load(path) as data:
+            self.key = str(data["key"])
+            if key is not None and self.key != key:
+                raise ValueError(
+                    f"Trees in [{path}] were compiled from a different dictionary, "
+                    f"recompile them with compile_trees"
+                )
+
+            self.max_tries = int(data["max_tries"])
+            self.fallback = [ALPHABET[x] for x in data["fallback"]]
+
+            self.trees = {}
+            for name in data.files:
+                length, _, field = name.partition("_")
+                if field == "guesses":
+                    self.trees[int(length)] = Tree(
+                        guesses=data[f"{length}_guesses"],
+                        offsets=data[f"{length}_offsets"],
+                        patterns=data[f"{length}_patterns"],
+                        children=data[f"{length}_children"],
+                    )
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset player state to play a new game"""
+
+        self._tree = None
+        self._node = None
+        self._word = None  # Previous word state
+        self._last = None  # Previous guess
+
+        self.guesses = set()
+
+    def guess(self, word: str) -> str:
+        """
+        Method for guessing letters based on input masked word
+
+        :param word: masked word to guess letters in i.e "h_pp_" (starts fully masked)
+        :return: (char) letter guess
+        """
+
+        if self._word is None:
+            # New game so start at the root of the tree for this length
+            self._tree = self.trees.get(len(word), None)
+            self._node = None if self._tree is None else 0
+
+        elif self._node is not None:
+            # Follow edge for positions revealed by the previous guess
+            pattern = sum(
+                1 << i for i, (x, y) in enumerate(zip(self._word, word))
+                if x == MASK_CHAR and y == self._last
+            )
+            self._node = self._tree.child(self._node, pattern)
+
+        if self._node is not None:
+            new_guess = ALPHABET[self._tree.guesses[self._node]]
+        else:
+            new_guess = next(x for x in self.fallback if x not in self.guesses)
+
+        self._word = word
+        self._last = new_guess
+        self.guesses.add(new_guess)
+
+        return new_guess
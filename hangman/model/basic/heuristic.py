@@ -3,13 +3,16 @@ Defines a heuristic approach to guessing letters
 """
 
 import warnings
-from collections import Counter
-from typing import List
-
-import numpy as np
+from typing import Iterable, List, Union
 
+from hangman.core.cache import LRUCache
+from hangman.core.candidates import Candidates, ranked
+from hangman.core.index import MASK_CHAR, Index, letter_bits
 from hangman.model import IPlayer
 
+# Guesses keyed on game state shared by all players & games
+CACHE = LRUCache()
+
 
 class Heuristic(IPlayer):
     """
@@ -18,31 +21,52 @@ class Heuristic(IPlayer):
     words of equivalent length from an input dictionary
     """
 
-    def __init__(self, dictionary: List[str]) -> None:
+    def __init__(
+            self,
+            dictionary: Union[List[str], Index],
+            *,
+            cache: Union[LRUCache, None] = CACHE,
+    ) -> None:
         """
         Create instance variables
 
         :param dictionary: List[str] of input words to use to formulate _guesses
+            or a pre-built hangman.core.index.Index to share between players
+        :param cache: (hangman.core.cache.LRUCache) cache of guesses keyed on
+            game state. Defaults to a cache shared by all players, None
+            disables caching
         """
 
-        self.dictionary = dictionary
-        self._words = self.dictionary.copy()
+        self.index = dictionary if isinstance(dictionary, Index) else Index(dictionary)
+        self.dictionary = self.index.dictionary
+        self.cache = cache
+
+        # Candidate words, set to the word length bucket on the first guess
+        self._candidates = None
 
         self._word = None  # Previous word state
         self._last = None  # Previous guess
 
         self.guesses = set()
         self.valid = set()
+        self._guessed = 0  # Letter presence mask of guesses
+
+        # Number of words read to update letter counts for each guess
+        self.touched = []
 
     def reset(self) -> None:
         """Reset player state to play a new game"""
-        self._words = self.dictionary.copy()
+        self._candidates = None
 
         self._word = None  # Previous word state
         self._last = None  # Previous guess
 
         self.guesses = set()
         self.valid = set()
+        self._guessed = 0  # Letter presence mask of guesses
+
+        # Number of words read to update letter counts for each guess
+        self.touched = []
 
     def _validate(self, word: str) -> bool:
         """
@@ -58,6 +82,10 @@ class Heuristic(IPlayer):
 
         word_changed = False
 
+        if self._candidates is None:
+            # New game so start with all words of the same length
+            self._candidates = Candidates(self.index, len(word))
+
         if self._word is not None:
 
             word_changed = self._word != word
@@ -66,30 +94,16 @@ class Heuristic(IPlayer):
                 # Update valid _guesses set
                 self.valid.update(self._last)
 
-                # Get all indexes of char in word
-                _valid = {i: c for i, c in enumerate(word) if c == self._last}
-
                 # Update word list leaving only words that have the current guess
                 # in matching position(s)
-                self._words = [
-                    x for x in self._words
-                    if (self._last in x) and
-                       (
-                           np.array(
-                               [
-                                   x[idx] == self._last for idx, _x in _valid.items()
-                                   if idx < len(x) - 1
-                               ]
-                           ).all()
-                       )
-                ]
+                self._candidates.correct(self._last, word)
 
                 # Reset last guess so not checked again
                 self._last = None
 
             # Assume incorrect Guess
             elif self._last is not None:
-                self._words = [x for x in self._words if self._last not in x]
+                self._candidates.wrong(self._last)
 
         self._word = word
 
@@ -102,8 +116,84 @@ class Heuristic(IPlayer):
             warnings.warn(f"New guess [{letter}] already guessed: [{self.guesses}]")
         else:
             self.guesses.update(letter)
+            self._guessed = self._guessed | letter_bits(letter)
             self._last = letter
 
+    def _record(self) -> None:
+        """Store number of words read to update letter counts since last guess"""
+        self.touched.append(self._candidates.touched - sum(self.touched))
+
+    @property
+    def _words(self) -> List[str]:
+        """Return List[str] of remaining candidate words"""
+        return [] if self._candidates is None else self._candidates.words
+
+    def _ranked(self, whole_dictionary: bool = False, exclude: int = 0) -> List[str]:
+        """
+        Return letters ordered by frequency across the candidate words
+
+        :param whole_dictionary: (bool) when True rank letters across
+            the whole dictionary instead
+        :param exclude: (int) letter presence mask of letters to leave out
+        :return: List[str] of letters, most frequent first
+        """
+
+        if whole_dictionary:
+            return ranked(self.index.frequency(), exclude)
+
+        return ranked(self._candidates.frequency(), exclude)
+
+    def _choose(self, candidates: Candidates, exclude: int) -> str:
+        """
+        Return most frequent letter across candidates that hasn't been guessed
+
+        :param candidates: (hangman.core.candidates.Candidates) remaining words
+        :param exclude: (int) letter presence mask of letters already guessed
+        :return: (char) letter guess
+        """
+
+        new_guess = ranked(candidates.frequency(), exclude)
+        if len(new_guess) == 0:
+            # We've run out of _guesses so fall back to the whole dictionary
+            new_guess = ranked(self.index.frequency(), exclude)
+            if len(new_guess) == 0:
+                raise ValueError("All letters already guessed")
+
+        return new_guess[0]
+
+    def _key(self, mask: str, wrong_letters: Iterable[str]) -> tuple:
+        """Return cache key for a game state"""
+        return self.index.key, mask, frozenset(wrong_letters)
+
+    def guess_for(self, mask: str, wrong_letters: Iterable[str] = ()) -> str:
+        """
+        Return the guess for a game state without using or changing any
+        player state, so it can be called for any game in any order
+
+        :param mask: masked word i.e "h_pp_"
+        :param wrong_letters: iterable of letters guessed that aren't in the word
+        :return: (char) letter guess
+        """
+
+        wrong_letters = frozenset(wrong_letters)
+
+        key = None
+        if self.cache is not None:
+            key = self._key(mask, wrong_letters)
+            new_guess = self.cache.get(key)
+            if new_guess is not None:
+                return new_guess
+
+        guessed = wrong_letters.union(mask).difference(MASK_CHAR)
+        new_guess = self._choose(
+            Candidates.from_state(self.index, mask, wrong_letters), letter_bits(guessed)
+        )
+
+        if key is not None:
+            self.cache.put(key, new_guess)
+
+        return new_guess
+
     def guess(self, word: str) -> str:
         """
         Method for guessing letters based on input masked word
@@ -115,18 +205,20 @@ class Heuristic(IPlayer):
         # Checks latest guess against input masked word
         self._validate(word)
 
-        # Most frequent letter
-        letters = ''.join(self._words)
-        frequency = Counter(letters)
+        # Game state always gives the same guess so check cache first
+        key = None
+        new_guess = None
+        if self.cache is not None:
+            key = self._key(word, self.guesses.difference(self.valid))
+            new_guess = self.cache.get(key)
 
-        new_guess = [x[0] for x in frequency.most_common() if x[0] not in self.guesses]
-        if len(new_guess) == 0:
-            # Reset words as we've run out of _guesses
-            self._words = self.dictionary.copy()
-            # Try again
-            return self.guess(word)
-        else:
-            new_guess = new_guess[0]
+        if new_guess is None:
+            # Most frequent letter
+            new_guess = self._choose(self._candidates, self._guessed)
+            if key is not None:
+                self.cache.put(key, new_guess)
+
+        self._record()
 
         self._update(new_guess)
 
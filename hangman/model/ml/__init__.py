@@ -1,3 +1,5 @@
 from hangman.model.ml.imodel import IModel
 from hangman.model.ml.lstm import LSTModel
 from hangman.model.ml.nnplayer import NNPlayer
+from hangman.model.ml.numpy_lstm import NumpyLSTModel
+from hangman.model.ml.service import InferenceService
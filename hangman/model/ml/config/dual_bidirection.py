@@ -4,18 +4,21 @@ Defines a dual layer bi-directional LSTM model
 import os
 from typing import Any, Type, Tuple
 
-import tensorflow
-
 import hangman.core.dictionary
+import hangman.model.ml.utils
 from hangman.model.ml.config.iconfig import IConfig
 
 MODEL_SPEC = os.path.join(hangman.core.dictionary.DATA, "lstm-dual-model.keras")
 WEIGHTS = os.path.join(hangman.core.dictionary.DATA, "lstm-dual-weights.keras")
+TFLITE = os.path.join(hangman.core.dictionary.DATA, "lstm-dual-int8.tflite")
 
 LOSS = "categorical_crossentropy"
+SPARSE_LOSS = "sparse_categorical_crossentropy"
 OPTIMIZER = "adam"
 DROPOUT = 0.2
 LSTM_UNITS = 256
+WORKERS = 1
+SYNC_STEPS = 50
 
 
 class DualBiDir(IConfig):
@@ -27,10 +30,14 @@ class DualBiDir(IConfig):
             dense_units: int = None,
             lstm_units: int = LSTM_UNITS,
             drop_out: float = DROPOUT,
-            loss: str = LOSS,
+            loss: str = None,
             optimizer: str = OPTIMIZER,
             model_path: str = MODEL_SPEC,
             weights_path: str = WEIGHTS,
+            tflite_path: str = TFLITE,
+            compact: bool = False,
+            workers: int = WORKERS,
+            sync_steps: int = SYNC_STEPS,
     ) -> None:
         """
         Create instance of LSTM model
@@ -40,10 +47,18 @@ class DualBiDir(IConfig):
         :param dense_units: (int) dimensionality of output data
         :param lstm_units: +ve (int), dimensionality of the output space
         :param drop_out: (float) fraction of input units to drop
-        :param loss: (str) loss function
+        :param loss: (str) loss function, LOSS or SPARSE_LOSS when compact if None
         :param optimizer: (str) name of optimizer
         :param model_path: (str) path to load '.keras' model config from
         :param weights_path: (str) path to load '.keras' weights file from
+        :param tflite_path: (str) path to write & load quantized '.tflite' model
+        :param compact: (bool) when True the model takes un-normalised codes &
+            class ids, as returned by hangman.model.ml.utils.model_input_compact,
+            normalising codes with its first layer
+        :param workers: (int) number of processes to train in, more than 1
+            trains data parallel (see hangman.model.ml.parallel)
+        :param sync_steps: (int) number of batches each process trains on
+            between averaging weights
         """
 
         # Store instance variables
@@ -51,16 +66,27 @@ class DualBiDir(IConfig):
         self.dense_units = dense_units
         self.lstm_units = lstm_units
         self.drop_out = drop_out
-        self.loss = loss
+        self.loss = (SPARSE_LOSS if compact else LOSS) if loss is None else loss
         self.optimizer = optimizer
         self.model_path = model_path
         self.weights_path = weights_path
+        self.tflite_path = tflite_path
+        self.compact = compact
+        self.workers = workers
+        self.sync_steps = sync_steps
 
     def build(self) -> Type["tensorflow.keras.models.Sequential"]:
         """Return instance of Keras Sequential model"""
 
+        import tensorflow
+
         model = tensorflow.keras.models.Sequential()
         model.add(tensorflow.keras.Input(shape=self.input))
+        if self.compact:
+            model.add(
+                tensorflow.keras.layers.Rescaling(1 / len(hangman.model.ml.utils.TO_CHAR))
+            )
+
         model.add(
             tensorflow.keras.layers.Bidirectional(
                 tensorflow.keras.layers.LSTM(self.lstm_units, return_sequences=True)
@@ -86,6 +112,8 @@ class DualBiDir(IConfig):
         :param compile_model: (bool) whether to comile model
         :return: Instance of keras model that has a train & prediction function
         """
+        import tensorflow
+
         model = tensorflow.keras.models.load_model(self.model_path)
         if compile_model:
             model.compile(loss=self.loss, optimizer=self.optimizer)
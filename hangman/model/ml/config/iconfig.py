@@ -8,6 +8,18 @@ from typing import Any
 
 class IConfig(metaclass=abc.ABCMeta):
 
+    # When True the model takes un-normalised codes & class ids, see
+    # hangman.model.ml.utils.model_input_compact
+    compact = False
+
+    # Number of processes to train in & batches each trains on between
+    # averaging weights, see hangman.model.ml.parallel.train
+    workers = 1
+    sync_steps = 50
+
+    # Path of quantized '.tflite' model, see hangman.model.ml.LSTModel.export_tflite
+    tflite_path = None
+
     @abc.abstractmethod
     def build(self) -> Any:
         """
@@ -1,7 +1,7 @@
 """Light-weight interface for defining ML models"""
 
 import abc
-from typing import Type
+from typing import Sequence, Type
 
 
 class IModel(metaclass=abc.ABCMeta):
@@ -20,3 +20,14 @@ class IModel(metaclass=abc.ABCMeta):
         :return: (str) prediction
         """
         pass
+
+    @abc.abstractmethod
+    def predict_batch(self, x: Sequence[Sequence[str]]) -> Type["np.array"]:
+        """
+        Predict probability of each y value for a batch of inputs
+
+        :param x: sequence of n-grams, each a sequence of chars i.e. ('a', '_')
+        :return: (np.array) 2D array (# Samples, # Classes) where column 'i' is
+            the probability of hangman.model.ml.utils.TO_CHAR[i]
+        """
+        pass
@@ -1,24 +1,33 @@
 """Define an LSTM model to guess letters"""
 
+import hashlib
 import os
-from typing import Type, List
+import time
+from typing import Any, Dict, List, Sequence, Type
 
 import numpy as np
-import tensorflow.keras.callbacks
-import tensorflow.keras.layers
-import tensorflow.keras.models
-import tensorflow.keras.models
-import tensorflow.keras.preprocessing.sequence
-import tensorflow.keras.utils
 
 import hangman.core.dictionary
+import hangman.model.ml.ngrams
+import hangman.model.ml.parallel
+import hangman.model.ml.sampler
 import hangman.model.ml.utils
+from hangman.core.cache import LRUCache
 from hangman.model.ml.config.iconfig import IConfig
 from hangman.model.ml.imodel import IModel
+from hangman.model.ml.ngrams import SHUFFLE_BUFFER
 
 OUTPUT_PATH = os.path.join(hangman.core.dictionary.DATA)
 SEQUENCE_LENGTH = 5
 
+# TFLite models have a fixed input shape so are exported for batches of
+# this size, smaller batches are padded
+TFLITE_BATCH_SIZE = 32
+
+# Losses taking class ids rather than one hot labels, used when training
+# on streamed ngrams
+SPARSE_LOSSES = {"categorical_crossentropy": "sparse_categorical_crossentropy"}
+
 
 class LSTModel(IModel):
     """
@@ -34,6 +43,8 @@ class LSTModel(IModel):
             ouput_path: str = OUTPUT_PATH,
             pad_sequence: bool = True,
             sequence_length: int = SEQUENCE_LENGTH,
+            cache_size: int = None,
+            cache_path: str = None,
     ) -> None:
         """
         Create LSTM model container
@@ -44,10 +55,18 @@ class LSTModel(IModel):
                                 'weights_path' cannot be None
             - 'load_model_weights' - loads model & weights from files. 'model_path'
                                      & 'weights_path' cannot be None
+            - 'tflite' - loads quantized model written by export_tflite for
+                         predictions only. 'tflite_path' cannot be None &
+                         pad_sequence must be True
         :param config: (IConfig) instance to build & load LSTM model
         :param ouput_path: (str) directory to output weights to during training
         :param pad_sequence: (bool) whether to pad input data for prediction
         :param sequence_length: (int) input sequence length
+        :param cache_size: (int) (default=None) max number of n-gram predictions
+            to cache, None disables caching
+        :param cache_path: (str) (default=None) file to load cached predictions
+            from & write them to with save_cache. Cached predictions are only
+            loaded if the model & weights files are unchanged
         """
 
         # Store instance params
@@ -58,6 +77,8 @@ class LSTModel(IModel):
 
         # Load model
         _model = None
+        _interpreter = None
+        _files = []
         build_or_load = build_or_load.lower()
         if build_or_load == "build":
             _model = self.config.build()
@@ -65,31 +86,181 @@ class LSTModel(IModel):
         elif build_or_load == "build_weights":
             _model = self.config.build()
             _model = self.config.load_weights(model=_model, compile_model=False)
+            _files = [self.config.weights_path]
 
         elif build_or_load == "load_model":
             _model = self.config.load(compile_model=True)
+            _files = [self.config.model_path]
 
         elif build_or_load == "load_model_weights":
             _model = self.config.load(compile_model=False)
             _model = self.config.load_weights(model=_model, compile_model=True)
+            _files = [self.config.model_path, self.config.weights_path]
+
+        elif build_or_load == "tflite":
+            if not pad_sequence:
+                raise ValueError("TFLite models have a fixed input shape, pad_sequence must be True")
+            if self.config.tflite_path is None:
+                raise ValueError("config.tflite_path cannot be None to load a TFLite model")
+
+            _interpreter = interpreter(self.config.tflite_path)
+            _files = [self.config.tflite_path]
 
         else:
             raise ValueError(f"Invalid value for build_or_load: [{build_or_load}]")
 
         self.__model = _model
+        self.__interpreter = _interpreter
+
+        if _interpreter is not None:
+            self.output_units = int(_interpreter.get_output_details()[0]["shape"][-1])
+        elif _model is not None:
+            self.output_units = int(_model.output_shape[-1])
+
+        # Cache of predictions keyed on encoded n-gram
+        self.cache = None if cache_size is None else LRUCache(max_size=cache_size)
+        self.cache_path = cache_path
+        self._digest = digest(_files, pad_sequence, sequence_length) if _files else None
+        if self.cache is not None and self.cache_path is not None:
+            self.load_cache()
 
         self.ouput_path = ouput_path
 
-    def train(self, epochs: int = 50, batch_size: int = 64):
-        """Train model"""
+    def train(
+            self,
+            epochs: int = 50,
+            batch_size: int = 64,
+            *,
+            x: Type["np.array"] = None,
+            y: Type["np.array"] = None,
+            ngram_path: str = None,
+            sampler: "hangman.model.ml.sampler.GameStateSampler" = None,
+            steps_per_epoch: int = None,
+            workers: int = 1,
+            shuffle_buffer: int = SHUFFLE_BUFFER,
+            seed: int = None,
+            weighted: bool = False,
+            verbose: bool = True,
+    ):
+        """
+        Train model, on in-memory 'x' & 'y', on ngrams streamed from shard
+        files or on ngrams sampled from game states on the fly, the latter
+        two with sparse labels.  Samples per second of each epoch are added
+        to the returned history as 'samples_per_sec' & memory used per
+        in-memory sample is printed.  When config.workers is more than 1
+        the model is trained data parallel in that many processes (see
+        hangman.model.ml.parallel.train)
+
+        :param epochs: (int) number of passes over the training data
+        :param batch_size: (int) number of samples per batch
+        :param x: (np.array) (default=None) model input, i.e. returned by
+            hangman.model.ml.utils.model_input_compact when config.compact
+        :param y: (np.array) (default=None) labels matching x
+        :param ngram_path: (str) (default=None) directory of shard files written
+            by hangman.model.ml.utils.build_ngrams to stream samples from
+        :param shuffle_buffer: (int) number of streamed samples to shuffle together
+        :param seed: (int) (default=None) random seed for shuffling streamed samples
+        :param weighted: (bool) when True weight streamed samples by the number
+            of times they occurred, for shards written by ngrams.dedupe
+        :param sampler: (GameStateSampler) (default=None) sampler to draw
+            batches from, n_max - 2 must equal sequence_length
+        :param steps_per_epoch: (int) number of batches sampled per epoch,
+            required with sampler
+        :param workers: (int) number of threads sampling batches, threads rather
+            than processes as forking a process that has initialised
+            TensorFlow isn't safe
+        :param verbose: (bool) when True print progress & samples per second
+        :return: (tensorflow.keras.callbacks.History) training history
+        """
 
-        return self.__model.fit(
-            self.x,
-            self.y,
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=call_backs(self.ouput_path) if self.ouput_path is not None else None
-        )
+        if self.__model is None:
+            raise ValueError("TFLite models only support predictions")
+
+        if sampler is not None and sampler.n_max - 2 != self.sequence_length:
+            raise ValueError(
+                f"Sampler ngrams of [{sampler.n_max - 2}] time steps don't match "
+                f"sequence_length [{self.sequence_length}]"
+            )
+
+        # Weights will change so cached predictions are no longer valid
+        self._digest = None
+        if self.cache is not None:
+            self.cache.clear()
+
+        callbacks = call_backs(self.ouput_path) if self.ouput_path is not None else []
+
+        if self.config.workers > 1:
+            if sampler is not None and steps_per_epoch is None:
+                raise ValueError("steps_per_epoch is required to train on a sampler")
+
+            return hangman.model.ml.parallel.train(
+                self.__model,
+                self.config,
+                x=self.x if x is None and ngram_path is None and sampler is None else x,
+                y=self.y if y is None and ngram_path is None and sampler is None else y,
+                ngram_path=ngram_path,
+                sampler=sampler,
+                samples=None if steps_per_epoch is None else steps_per_epoch * batch_size,
+                epochs=epochs,
+                batch_size=batch_size,
+                width=self.sequence_length,
+                weighted=weighted,
+                seed=seed,
+                callbacks=callbacks,
+                verbose=verbose,
+            )
+
+        if ngram_path is None and sampler is None:
+            x = self.x if x is None else x
+            y = self.y if y is None else y
+
+            if verbose:
+                print(f"Bytes per sample [{hangman.model.ml.utils.bytes_per_sample(x, y):.1f}]")
+
+            callbacks.append(throughput(len(x), verbose=verbose))
+            return self.__model.fit(
+                x,
+                y,
+                epochs=epochs,
+                batch_size=batch_size,
+                callbacks=callbacks,
+                verbose=int(verbose),
+            )
+
+        # Streamed labels are class ids so switch to the matching sparse loss
+        loss = SPARSE_LOSSES.get(self.config.loss, self.config.loss)
+        if self.__model.loss != loss:
+            self.__model.compile(loss=loss, optimizer=self.config.optimizer)
+
+        if sampler is not None:
+            if steps_per_epoch is None:
+                raise ValueError("steps_per_epoch is required to train on a sampler")
+
+            data = hangman.model.ml.sampler.dataset(
+                sampler,
+                batch_size=batch_size,
+                steps=steps_per_epoch,
+                normalise=not self.config.compact,
+                seed=seed,
+                workers=workers,
+            )
+            samples = steps_per_epoch * batch_size
+
+        else:
+            data = hangman.model.ml.ngrams.dataset(
+                ngram_path,
+                batch_size=batch_size,
+                width=self.sequence_length,
+                shuffle_buffer=shuffle_buffer,
+                seed=seed,
+                normalise=not self.config.compact,
+                weighted=weighted,
+            )
+            samples = sum(len(x) for x, _ in hangman.model.ml.ngrams.open_shards(ngram_path))
+
+        callbacks.append(throughput(samples, verbose=verbose))
+
+        return self.__model.fit(data, epochs=epochs, callbacks=callbacks, verbose=int(verbose))
 
     def predict(self, x: Type["np.array"]) -> str:
         """
@@ -99,24 +270,292 @@ class LSTModel(IModel):
         :return: (str) prediction
         """
 
-        p = [hangman.model.ml.utils.TO_INT[p] for p in x]
+        prediction = self.predict_batch([x])
+        index = np.argmax(prediction)
+        result = hangman.model.ml.utils.TO_CHAR[index]
 
-        _sequence_length = len(x)
-        if self.pad_sequence:
-            p = tensorflow.keras.preprocessing.sequence.pad_sequences(
-                [p], padding="post", maxlen=self.sequence_length
-            )
-            _sequence_length = self.sequence_length
+        return result
 
-        p = np.array(p).reshape(1, _sequence_length, 1)
-        p = p / len(hangman.model.ml.utils.TO_CHAR)
+    def predict_batch(self, x: Sequence[Sequence[str]]) -> Type["np.array"]:
+        """
+        Predict probability of each y value for a batch of inputs.  Inputs
+        are padded to the same length, or when pad_sequence is False grouped
+        by length, so the model is called once per group rather than once
+        per input
 
-        prediction = self.__model.predict(p, verbose=0)
-        index = np.argmax(prediction)
-        result = hangman.model.ml.utils.TO_CHAR[index]
+        :param x: sequence of n-grams, each a sequence of chars i.e. ('a', '_')
+        :return: (np.array) 2D array (# Samples, # Classes) where column 'i' is
+            the probability of hangman.model.ml.utils.TO_CHAR[i]
+        """
+
+        result = np.zeros((len(x), self.output_units), dtype=np.float32)
+        codes = [[hangman.model.ml.utils.TO_INT[c] for c in _x] for _x in x]
+
+        # Group input indexes not already cached by sequence length
+        groups = {}
+        for idx, _codes in enumerate(codes):
+            if self.cache is not None:
+                cached = self.cache.get(bytes(_codes))
+                if cached is not None:
+                    result[idx] = cached
+                    continue
+
+            _sequence_length = self.sequence_length if self.pad_sequence else len(_codes)
+            groups.setdefault(_sequence_length, []).append(idx)
+
+        for _sequence_length, idxs in groups.items():
+            p = [codes[idx] for idx in idxs]
+            if self.pad_sequence:
+                p = hangman.model.ml.utils.pad_sequences(p, maxlen=self.sequence_length)
+
+            p = np.array(p).reshape(len(idxs), _sequence_length, 1)
+            if not self.config.compact:
+                p = p / len(hangman.model.ml.utils.TO_CHAR)
+
+            if self.__interpreter is not None:
+                result[idxs] = self._invoke(p)
+            else:
+                result[idxs] = self.__model.predict_on_batch(p)
+
+            if self.cache is not None:
+                for idx in idxs:
+                    self.cache.put(bytes(codes[idx]), result[idx].copy())
 
         return result
 
+    def _invoke(self, x: Type["np.array"]) -> Type["np.array"]:
+        """
+        Run TFLite model over input in fixed size batches, padding the last
+
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (np.array) 2D array (# Samples, # Classes)
+        """
+
+        _input = self.__interpreter.get_input_details()[0]
+        _output = self.__interpreter.get_output_details()[0]
+        batch_size = _input["shape"][0]
+
+        result = np.zeros((len(x), self.output_units), dtype=np.float32)
+        for start in range(0, len(x), batch_size):
+            batch = np.zeros(_input["shape"], dtype=np.float32)
+            _x = x[start:start + batch_size]
+            batch[:len(_x)] = _x
+
+            self.__interpreter.set_tensor(_input["index"], batch)
+            self.__interpreter.invoke()
+            result[start:start + len(_x)] = self.__interpreter.get_tensor(_output["index"])[:len(_x)]
+
+        return result
+
+    def export_tflite(self, path: str = None, *, batch_size: int = TFLITE_BATCH_SIZE) -> str:
+        """
+        Convert model to a TFLite flatbuffer with weights quantized to int8
+        (dynamic range quantization), load it with build_or_load='tflite'
+
+        :param path: (str) file to write to, config.tflite_path when None
+        :param batch_size: (int) number of inputs per call of the TFLite model
+        :return: (str) path written to
+        """
+
+        import tensorflow
+
+        if self.__model is None:
+            raise ValueError("Only keras models can be exported")
+
+        path = self.config.tflite_path if path is None else path
+        if path is None:
+            raise ValueError("path is required when config.tflite_path is None")
+
+        # Fix input shape so LSTM layers convert to TFLite builtin ops
+        _input = tensorflow.keras.Input(
+            batch_shape=(batch_size, self.sequence_length, 1)
+        )
+        model = tensorflow.keras.Model(_input, self.__model(_input))
+
+        converter = tensorflow.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tensorflow.lite.Optimize.DEFAULT]
+
+        with open(path, "wb") as f:
+            f.write(converter.convert())
+
+        return path
+
+    def load_cache(self) -> bool:
+        """
+        Load cached predictions from cache_path, ignoring the file if it
+        was written by a model with different model or weights files
+
+        :return: (bool) True if predictions were loaded
+        """
+
+        if self.cache is None or self.cache_path is None or self._digest is None:
+            return False
+        if not os.path.exists(self.cache_path):
+            return False
+
+        with np.load(self.cache_path) as data:
+            if str(data["digest"]) != self._digest:
+                return False
+
+            for key, value in zip(data["keys"], data["values"]):
+                self.cache.put(bytes(key), value)
+
+        return True
+
+    def save_cache(self) -> None:
+        """Write cached predictions to cache_path"""
+
+        if self.cache is None or self.cache_path is None or self._digest is None:
+            return
+
+        items = self.cache.items()
+        keys = [x for x, _ in items]
+        values = [y for _, y in items]
+
+        with open(self.cache_path, "wb") as f:
+            np.savez(
+                f,
+                digest=np.array(self._digest),
+                keys=np.array(keys, dtype=bytes),
+                values=np.array(values, dtype=np.float32).reshape(len(keys), -1),
+            )
+
+
+def interpreter(path: str) -> Any:
+    """
+    Load TFLite model, using the LiteRT interpreter when installed
+
+    :param path: (str) path to '.tflite' file
+    :return: TFLite interpreter with tensors allocated
+    """
+
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow
+        Interpreter = tensorflow.lite.Interpreter
+
+    _interpreter = Interpreter(model_path=path)
+    _interpreter.allocate_tensors()
+
+    return _interpreter
+
+
+def compare(
+        models: Dict[str, IModel],
+        x: Sequence[Sequence[str]],
+        y: Sequence[str] = None,
+        *,
+        paths: Dict[str, str] = None,
+        repeats: int = 5,
+        verbose: bool = True,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare accuracy & latency of models on the same n-grams, i.e. a
+    quantized model against the keras model it was exported from
+
+    :param models: Dict[str, IModel] models keyed on name, the first is
+        the reference the others are compared to
+    :param x: sequence of n-grams, each a sequence of chars i.e. ('a', '_')
+    :param y: (default=None) sequence of chars following each n-gram, when
+        passed accuracy of each model is reported
+    :param paths: (default=None) Dict[str, str] model files keyed on name
+        to report their size
+    :param repeats: (int) number of times to time predicting all n-grams
+    :param verbose: (bool) when True print report to std out
+    :return: Dict keyed on model name of Dicts with keys
+        - 'latency_ms' best time to predict all n-grams in one batch
+        - 'latency_per_sample_us' latency_ms per n-gram
+        - 'agreement' fraction of top guesses equal to the reference model
+        - 'max_abs_diff' largest difference in probability to reference
+        - 'accuracy' fraction of top guesses equal to y (when y is passed)
+        - 'size_bytes' size of model file (when in paths)
+    """
+
+    paths = {} if paths is None else paths
+    reference = None
+
+    report = {}
+    for name, model in models.items():
+        probabilities = model.predict_batch(x)
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_batch(x)
+            timings.append(time.perf_counter() - start)
+
+        if reference is None:
+            reference = probabilities
+
+        guesses = probabilities.argmax(axis=1)
+        _report = {
+            "latency_ms": min(timings) * 1000,
+            "latency_per_sample_us": min(timings) * 1e6 / len(x),
+            "agreement": float((guesses == reference.argmax(axis=1)).mean()),
+            "max_abs_diff": float(np.abs(probabilities - reference).max()),
+        }
+        if y is not None:
+            _y = np.array([hangman.model.ml.utils.TO_INT[_c] for _c in y])
+            _report["accuracy"] = float((guesses == _y).mean())
+        if name in paths:
+            _report["size_bytes"] = os.path.getsize(paths[name])
+
+        report[name] = _report
+
+        if verbose:
+            print(f"[{name}] " + ", ".join(f"{k}=[{v:.4g}]" for k, v in _report.items()))
+
+    return report
+
+
+def digest(paths: List[str], *args) -> str:
+    """
+    Return digest of the contents of files & any extra arguments, used
+    to check cached predictions came from the same model
+
+    :param paths: List[str] of file paths
+    :param args: other values that change predictions
+    :return: (str) hex digest
+    """
+
+    _hash = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                _hash.update(chunk)
+
+    _hash.update(repr(args).encode())
+
+    return _hash.hexdigest()
+
+
+def throughput(samples: int, *, verbose: bool = True) -> "tensorflow.keras.callbacks.Callback":
+    """
+    Create model call back to time each epoch & add samples per second to
+    the training history
+
+    :param samples: (int) number of samples per epoch
+    :param verbose: (bool) when True print samples per second after each epoch
+    :return: "tensorflow.keras.callbacks.Callback"
+    """
+
+    import tensorflow.keras.callbacks
+
+    start = [0.0]
+
+    def _begin(epoch, logs=None) -> None:
+        start[0] = time.perf_counter()
+
+    def _end(epoch, logs=None) -> None:
+        samples_per_sec = samples / (time.perf_counter() - start[0])
+        if logs is not None:
+            logs["samples_per_sec"] = samples_per_sec
+        if verbose:
+            print(f"Epoch [{epoch + 1}] samples/sec [{samples_per_sec:.1f}]")
+
+    return tensorflow.keras.callbacks.LambdaCallback(on_epoch_begin=_begin, on_epoch_end=_end)
+
 
 def call_backs(ouput_path: str) -> List["tensorflow.keras.callbacks.ModelCheckpoint"]:
     """
@@ -127,6 +566,8 @@ def call_backs(ouput_path: str) -> List["tensorflow.keras.callbacks.ModelCheckpo
     :return: List["tensorflow.keras.callbacks.ModelCheckpoint"]
     """
 
+    import tensorflow.keras.callbacks
+
     # define the checkpoint
     filepath = os.path.join(ouput_path, "lstm-{epoch:02d}-{loss:.4f}.keras")
     checkpoint = tensorflow.keras.callbacks.ModelCheckpoint(
@@ -0,0 +1,480 @@
+"""
+Binary on-disk format for ngrams encoded as TO_INT codes (see
+hangman.model.ml.utils.n_gram_codes).  Each shard file holds a fixed size
+header followed by x as a uint8 array of shape (# ngrams, width) & y as a
+uint8 array of shape (# ngrams,), so shards are read with np.memmap
+without copying or parsing.  Deduplicated shards also hold a uint32
+array of the number of times each ngram occurred
+"""
+
+import concurrent.futures
+import json
+import os
+import tempfile
+from typing import Iterator, List, Tuple, Type
+
+import numpy as np
+
+SUFFIX = ".ngrams"
+MAGIC = b"HNG1"
+MAGIC_COUNTS = b"HNC1"
+SHARD_SIZE = 1 << 24
+
+# Rows read from a shard at a time & number of samples shuffled together
+# when streaming shards for training
+CHUNK_SIZE = 1 << 16
+SHUFFLE_BUFFER = 1 << 16
+
+# Number of on-disk partitions ngrams are hashed into when removing duplicates
+DEDUPE_BUCKETS = 64
+
+# Header of magic bytes, width of x & number of ngrams
+HEADER = np.dtype([("magic", "S4"), ("width", "<u4"), ("count", "<u8")])
+
+# Max number of codes packed into one int64 key, 5 bits per code
+MAX_PACKED = 12
+
+# Packed ngram & number of occurrences written to partition files by dedupe
+RECORD = np.dtype([("key", "<i8"), ("count", "<u4")])
+
+
+def write_shard(
+        path: str,
+        x: Type["np.array"],
+        y: Type["np.array"],
+        counts: Type["np.array"] = None,
+) -> None:
+    """
+    Write encoded ngrams to a shard file
+
+    :param path: (str) file path to write to
+    :param x: (np.array) uint8 array of shape (# ngrams, width)
+    :param y: (np.array) uint8 array of shape (# ngrams,)
+    :param counts: (np.array) (default=None) number of times each ngram occurred
+    """
+
+    if len(x) != len(y):
+        raise ValueError(f"Length of x [{len(x)}] doesn't match y [{len(y)}]")
+    if counts is not None and len(counts) != len(y):
+        raise ValueError(f"Length of counts [{len(counts)}] doesn't match y [{len(y)}]")
+
+    magic = MAGIC if counts is None else MAGIC_COUNTS
+    header = np.array([(magic, x.shape[1], len(x))], dtype=HEADER)
+
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(np.ascontiguousarray(x, dtype=np.uint8).tobytes())
+        f.write(np.ascontiguousarray(y, dtype=np.uint8).tobytes())
+        if counts is not None:
+            f.write(np.ascontiguousarray(counts, dtype="<u4").tobytes())
+
+
+def read_shard(path: str, *, counts: bool = False) -> Tuple[Type["np.memmap"], ...]:
+    """
+    Memory map encoded ngrams from a shard file
+
+    :param path: (str) file path written by write_shard
+    :param counts: (bool) when True also return number of times each ngram
+        occurred, all 1 for shards that weren't deduplicated
+    :return: Tuple of read only memmaps
+        - [0] x of shape (# ngrams, width)
+        - [1] y of shape (# ngrams,)
+        - [2] counts uint32 of shape (# ngrams,) when counts is True
+    """
+
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header["magic"][0] not in (MAGIC, MAGIC_COUNTS):
+        raise ValueError(f"Not an ngram shard: [{path}]")
+
+    width, count = int(header["width"][0]), int(header["count"][0])
+    if count == 0:
+        x, y = np.zeros((0, width), dtype=np.uint8), np.zeros(0, dtype=np.uint8)
+        return (x, y, np.zeros(0, dtype=np.uint32)) if counts else (x, y)
+
+    offset = HEADER.itemsize
+    x = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(count, width))
+    y = np.memmap(path, dtype=np.uint8, mode="r", offset=offset + count * width, shape=(count,))
+
+    if not counts:
+        return x, y
+
+    if header["magic"][0] == MAGIC_COUNTS:
+        _counts = np.memmap(
+            path, dtype="<u4", mode="r", offset=offset + count * (width + 1), shape=(count,)
+        )
+    else:
+        _counts = np.ones(count, dtype=np.uint32)
+
+    return x, y, _counts
+
+
+def write_shards(
+        name: str,
+        output_path: str,
+        x: Type["np.array"],
+        y: Type["np.array"],
+        *,
+        shard_size: int = SHARD_SIZE,
+) -> List[str]:
+    """
+    Write encoded ngrams to one or more shard files of at most shard_size ngrams
+
+    :param name: (str) file name prefix, shards are named '{name}-00000.ngrams' ...
+    :param output_path: (str) directory to write to
+    :param x: (np.array) uint8 array of shape (# ngrams, width)
+    :param y: (np.array) uint8 array of shape (# ngrams,)
+    :param shard_size: (int) max number of ngrams per shard
+    :return: List[str] paths written
+    """
+
+    paths = []
+    for idx, start in enumerate(range(0, max(len(x), 1), shard_size)):
+        path = os.path.join(output_path, f"{name}-{idx:05d}{SUFFIX}")
+        write_shard(path, x[start:start + shard_size], y[start:start + shard_size])
+        paths.append(path)
+
+    return paths
+
+
+def open_shards(
+        directory: str,
+        *,
+        counts: bool = False,
+) -> List[Tuple[Type["np.memmap"], ...]]:
+    """
+    Memory map every shard file in a directory, sorted by name
+
+    :param directory: (str) directory containing shard files
+    :param counts: (bool) when True also return counts (see read_shard)
+    :return: List of Tuples of (x, y) or (x, y, counts) memmaps (see read_shard)
+    """
+
+    return [
+        read_shard(os.path.join(directory, x), counts=counts)
+        for x in sorted(os.listdir(directory)) if x.endswith(SUFFIX)
+    ]
+
+
+def pack(x: Type["np.array"], y: Type["np.array"]) -> Type["np.array"]:
+    """
+    Pack each ngram into one int64 key, 5 bits per code as codes are < 32
+
+    :param x: (np.array) uint8 array of shape (# ngrams, width), width < MAX_PACKED
+    :param y: (np.array) uint8 array of shape (# ngrams,)
+    :return: (np.array) int64 array of shape (# ngrams,)
+    """
+
+    if x.shape[1] + 1 > MAX_PACKED:
+        raise ValueError(f"Ngrams of width [{x.shape[1]}] are too wide to pack")
+
+    shifts = 5 * np.arange(x.shape[1] + 1, dtype=np.int64)
+    return np.concatenate([x, y[:, None]], axis=1).astype(np.int64) @ (1 << shifts)
+
+
+def unpack(keys: Type["np.array"], width: int) -> Tuple[Type["np.array"], Type["np.array"]]:
+    """
+    Unpack keys returned by pack
+
+    :param keys: (np.array) int64 array of shape (# ngrams,)
+    :param width: (int) width of x
+    :return: Tuple
+        - [0] x uint8 array of shape (# ngrams, width)
+        - [1] y uint8 array of shape (# ngrams,)
+    """
+
+    shifts = 5 * np.arange(width + 1, dtype=np.int64)
+    codes = ((keys[:, None] >> shifts) & 31).astype(np.uint8)
+
+    return codes[:, :width], codes[:, width]
+
+
+def chunks(
+        shards: List[Tuple[Type["np.array"], ...]],
+        *,
+        width: int,
+        chunk_size: int = CHUNK_SIZE,
+        rng: Type["np.random.Generator"] = None,
+) -> Iterator[Tuple[Type["np.array"], ...]]:
+    """
+    Yield blocks of consecutive ngrams from shards, so only one block at a
+    time is read into memory
+
+    :param shards: List of Tuples of (x, y) or (x, y, counts) arrays, i.e.
+        returned by open_shards
+    :param width: (int) number of columns of x, narrower shards are padded
+        with 0 after & wider shards truncated
+    :param chunk_size: (int) max number of ngrams per block
+    :param rng: (np.random.Generator) (default=None) when passed blocks are
+        yielded in random order, otherwise in shard order
+    :return: Iterator of Tuples
+        - [0] x uint8 array of shape (# ngrams, width)
+        - [1] y uint8 array of shape (# ngrams,)
+        - [2] counts array of shape (# ngrams,) when in shards
+    """
+
+    spans = [
+        (idx, start)
+        for idx, (x, *_) in enumerate(shards) for start in range(0, len(x), chunk_size)
+    ]
+    if rng is not None:
+        rng.shuffle(spans)
+
+    for idx, start in spans:
+        _x = shards[idx][0][start:start + chunk_size, :width]
+        x = np.zeros((len(_x), width), dtype=np.uint8)
+        x[:, :_x.shape[1]] = _x
+
+        yield (x,) + tuple(np.array(z[start:start + chunk_size]) for z in shards[idx][1:])
+
+
+def dataset(
+        directory: str,
+        *,
+        batch_size: int = 64,
+        width: int = None,
+        shuffle_buffer: int = SHUFFLE_BUFFER,
+        chunk_size: int = CHUNK_SIZE,
+        seed: int = None,
+        normalise: bool = True,
+        weighted: bool = False,
+) -> "tensorflow.data.Dataset":
+    """
+    Create a tf.data pipeline streaming ngrams from shard files for
+    training, so the training set doesn't have to fit in memory.  Blocks
+    of ngrams are read in random order, shuffled with a bounded buffer,
+    batched & cast to model input as they are consumed
+
+    :param directory: (str) directory containing shard files
+    :param batch_size: (int) number of samples per batch
+    :param width: (int) number of time steps, max width of shards when None
+    :param shuffle_buffer: (int) number of samples to shuffle together, 0 to
+        read samples in shard order
+    :param chunk_size: (int) number of ngrams read from a shard at a time
+    :param seed: (int) (default=None) random seed for shuffling
+    :param normalise: (bool) when False x is left as codes, for models that
+        normalise input themselves
+    :param weighted: (bool) when True also yield the number of times each
+        ngram occurred as sample weights, see dedupe
+    :return: (tensorflow.data.Dataset) of Tuples
+        - [0] x float32 (normalised) of shape (batch_size, width, 1)
+        - [1] y int32 class ids (sparse labels) of shape (batch_size,)
+        - [2] float32 sample weights of shape (batch_size,) when weighted
+    """
+
+    import tensorflow
+
+    import hangman.model.ml.utils
+
+    shards = open_shards(directory, counts=weighted)
+    if width is None:
+        width = max((x.shape[1] for x, *_ in shards), default=0)
+
+    rng = np.random.default_rng(seed) if shuffle_buffer else None
+    scale = len(hangman.model.ml.utils.TO_CHAR) if normalise else 1
+
+    def _generator() -> Iterator[Tuple[Type["np.array"], ...]]:
+        return chunks(shards, width=width, chunk_size=chunk_size, rng=rng)
+
+    def _cast(x, y, *counts):
+        x = tensorflow.cast(x, tensorflow.float32)[..., None] / scale
+        y = tensorflow.cast(y, tensorflow.int32)
+        return (x, y) + tuple(tensorflow.cast(z, tensorflow.float32) for z in counts)
+
+    signature = (
+        tensorflow.TensorSpec(shape=(None, width), dtype=tensorflow.uint8),
+        tensorflow.TensorSpec(shape=(None,), dtype=tensorflow.uint8),
+    )
+    if weighted:
+        signature = signature + (tensorflow.TensorSpec(shape=(None,), dtype=tensorflow.uint32),)
+
+    data = tensorflow.data.Dataset.from_generator(_generator, output_signature=signature)
+    data = data.unbatch()
+    if shuffle_buffer:
+        data = data.shuffle(shuffle_buffer, seed=seed)
+
+    data = data.batch(batch_size)
+    data = data.map(_cast, num_parallel_calls=tensorflow.data.AUTOTUNE)
+
+    return data.prefetch(tensorflow.data.AUTOTUNE)
+
+
+def _bucket(keys: Type["np.array"], buckets: int) -> Type["np.array"]:
+    """Return bucket of each packed ngram using multiplicative hashing"""
+    _hash = keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((_hash >> np.uint64(32)) % np.uint64(buckets)).astype(np.int64)
+
+
+def _partition(
+        path: str,
+        temp_path: str,
+        idx: int,
+        buckets: int,
+        width: int,
+        chunk_size: int,
+) -> int:
+    """
+    Append packed ngrams & counts from a shard to one partition file per
+    bucket, named '{bucket}-{idx}.keys'
+
+    :return: (int) number of ngrams read
+    """
+
+    shard = read_shard(path, counts=True)
+    files = [
+        open(os.path.join(temp_path, f"{x:05d}-{idx:05d}.keys"), "wb") for x in range(buckets)
+    ]
+
+    try:
+        for x, y, counts in chunks([shard], width=width, chunk_size=chunk_size):
+            records = np.zeros(len(x), dtype=RECORD)
+            records["key"] = pack(x, y)
+            records["count"] = counts
+
+            bucket = _bucket(records["key"], buckets)
+            order = np.argsort(bucket, kind="stable")
+            bounds = np.searchsorted(bucket[order], np.arange(buckets + 1))
+
+            for b, f in enumerate(files):
+                f.write(records[order[bounds[b]:bounds[b + 1]]].tobytes())
+    finally:
+        for f in files:
+            f.close()
+
+    return len(shard[0])
+
+
+def _dedupe_bucket(paths: List[str], path: str, width: int) -> int:
+    """
+    Merge duplicate ngrams in partition files of one bucket, summing their
+    counts, & write unique ngrams to a shard file
+
+    :return: (int) number of unique ngrams written
+    """
+
+    records = np.concatenate([np.fromfile(x, dtype=RECORD) for x in paths])
+    for x in paths:
+        os.remove(x)
+
+    if len(records) == 0:
+        return 0
+
+    keys, inverse = np.unique(records["key"], return_inverse=True)
+    counts = np.bincount(inverse, weights=records["count"], minlength=len(keys))
+
+    x, y = unpack(keys, width)
+    write_shard(path, x, y, counts.astype(np.uint32))
+
+    return len(keys)
+
+
+def dedupe(
+        input_path: str,
+        output_path: str,
+        *,
+        name: str = "dedupe",
+        buckets: int = DEDUPE_BUCKETS,
+        processes: int = None,
+        chunk_size: int = CHUNK_SIZE,
+        verbose: bool = True,
+) -> Tuple[int, int]:
+    """
+    Remove duplicate ngrams across shard files without loading them all
+    into memory.  Ngrams are hashed into buckets written to disk, so each
+    bucket holds every copy of its ngrams, then each bucket is deduplicated
+    on its own & written as a shard with the number of times each ngram
+    occurred, to be used as sample weights (see dataset)
+
+    :param input_path: (str) directory containing shard files
+    :param output_path: (str) directory to write deduplicated shards to,
+        named '{name}-00000.ngrams' ... one per non empty bucket.  Shards
+        with the same name prefix from earlier runs are removed first
+    :param name: (str) file name prefix of shards written
+    :param buckets: (int) number of buckets, each must fit in memory
+    :param processes: (int) (default=None) number of processes to partition
+        shards & deduplicate buckets in parallel, None uses one per cpu & 1
+        runs in this process
+    :param chunk_size: (int) number of ngrams read from a shard at a time
+    :param verbose: (bool) when True print number of ngrams before & after
+    :return: Tuple
+        - [0] (int) number of ngrams read
+        - [1] (int) number of unique ngrams written
+    """
+
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        raise ValueError("Output path must be different to input path")
+
+    paths = [
+        os.path.join(input_path, x) for x in sorted(os.listdir(input_path)) if x.endswith(SUFFIX)
+    ]
+    width = max((read_shard(x)[0].shape[1] for x in paths), default=0)
+
+    # Shards of an earlier run would otherwise be read with the new ones
+    os.makedirs(output_path, exist_ok=True)
+    for x in os.listdir(output_path):
+        if x.startswith(f"{name}-") and x.endswith(SUFFIX):
+            os.remove(os.path.join(output_path, x))
+
+    with tempfile.TemporaryDirectory(dir=output_path) as temp_path:
+        partition_args = [
+            (path, temp_path, idx, buckets, width, chunk_size) for idx, path in enumerate(paths)
+        ]
+        dedupe_args = [
+            (
+                [os.path.join(temp_path, f"{x:05d}-{idx:05d}.keys") for idx in range(len(paths))],
+                os.path.join(output_path, f"{name}-{x:05d}{SUFFIX}"),
+                width,
+            )
+            for x in range(buckets)
+        ]
+
+        if processes == 1 or len(paths) == 0:
+            samples = sum(_partition(*x) for x in partition_args)
+            unique = sum(_dedupe_bucket(*x) for x in dedupe_args)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+                samples = sum(executor.map(_partition, *zip(*partition_args)))
+                unique = sum(executor.map(_dedupe_bucket, *zip(*dedupe_args)))
+
+    if verbose:
+        print(f"Deduplicated [{samples}] ngrams to [{unique}] unique ngrams")
+
+    return samples, unique
+
+
+def convert_json(
+        directory: str,
+        output_path: str = None,
+        *,
+        shard_size: int = SHARD_SIZE,
+) -> List[str]:
+    """
+    Convert ngram json files, written by earlier versions of build_ngrams,
+    to shard files
+
+    :param directory: (str) directory containing json files with keys 'x' & 'y'
+    :param output_path: (str) directory to write shards to, directory when None
+    :param shard_size: (int) max number of ngrams per shard
+    :return: List[str] paths written
+    """
+
+    import hangman.model.ml.utils
+
+    output_path = directory if output_path is None else output_path
+
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        _name, ext = os.path.splitext(name)
+        if ext != ".json":
+            continue
+
+        with open(os.path.join(directory, name)) as f:
+            _json = json.load(f)
+
+        x = hangman.model.ml.utils.pad_sequences(
+            [[hangman.model.ml.utils.TO_INT[c] for c in _x] for _x in _json["x"]]
+        ).astype(np.uint8)
+        y = np.array([hangman.model.ml.utils.TO_INT[c] for c in _json["y"]], dtype=np.uint8)
+
+        paths = paths + write_shards(_name, output_path, x, y, shard_size=shard_size)
+
+    return paths
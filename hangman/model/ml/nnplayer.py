@@ -4,8 +4,10 @@ that defines logic for a player that uses neural network
 to drive guess choices
 """
 
-from collections import Counter, deque
-from typing import List
+import concurrent.futures
+import threading
+from collections import deque
+from typing import List, Set, Tuple
 
 import numpy as np
 
@@ -13,6 +15,25 @@ import hangman.model.ml.utils
 from hangman.model.basic.heuristic import Heuristic
 from hangman.model.ml.imodel import IModel
 
+# Threads running ML guesses against a deadline, shared by all players &
+# created on first use
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return executor shared by all players, creating it on first call"""
+
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="nnplayer"
+            )
+
+    return _EXECUTOR
+
 
 class NNPlayer(Heuristic):
     """
@@ -31,6 +52,8 @@ class NNPlayer(Heuristic):
             model: IModel,
             verbose: bool = False,
             heuristic_thershold: float = 0.5,
+            deadline: float = None,
+            warm: bool = True,
     ) -> None:
         """
         Create instance variables & instantiate base class
@@ -38,6 +61,14 @@ class NNPlayer(Heuristic):
         :param dictionary: List[str] of input words to use to formulate _guesses
         :param model: (hangman.model.ml.imodel.IModel) to use to generate ML driven _guesses
         :param verbose: (bool) when True prints out the source of the guess to std out
+        :param deadline: (float) (default=None) seconds to wait for ML guesses,
+            when exceeded the heuristic guess is used instead.  None waits for
+            the model however long it takes
+        :param warm: (bool) when True ML guesses that miss the deadline still run
+            in the background so their predictions are reused by later guesses,
+            otherwise those not started yet are cancelled.  While one is still
+            running later guesses fall back to the heuristic rather than
+            queueing behind it
         """
         super().__init__(dictionary)
 
@@ -46,30 +77,173 @@ class NNPlayer(Heuristic):
         self.verbose = verbose
         self.heuristic_thershold = heuristic_thershold
 
+        self.deadline = deadline
+        self.warm = warm
+
+        # ML guesses run on the shared executor when there is a deadline,
+        # at most one at a time per player & holding the lock while n-gram
+        # state is updated
+        self._future = None
+        self._lock = threading.Lock()
+
+        # Number of ML guesses made against the deadline & that missed it
+        self.deadline_calls = 0
+        self.fallbacks = 0
+
+        self._reset_n_grams()
+
     def reset(self) -> None:
         """Reset player state to play a new game"""
         super().reset() # Reset base
 
         self._ml_guesses = deque()
 
+        # Waits for any ML guess still running from the last game
+        with self._lock:
+            self._reset_n_grams()
+
+    @property
+    def fallback_rate(self) -> float:
+        """Return fraction of ML guesses that missed the deadline"""
+        return self.fallbacks / self.deadline_calls if self.deadline_calls > 0 else 0.0
+
+    def _reset_n_grams(self) -> None:
+        """
+        Clear n-grams of the masked word & their predictions.  These are
+        kept between guesses so only n-grams covering newly revealed
+        letters are recreated & predicted
+        """
+
+        self._mask = None
+        self._windows = {}  # N-gram keyed on span of word it was read from
+        self._counts = {}  # Number of spans each unique n-gram was read from
+
+        self._predictions = {}  # Probabilities keyed on unique n-gram
+        self._total = None  # Probabilities summed across unique n-grams
+        self._argmax = {}  # Number of unique n-grams predicting each letter
+
+    def _n_grams(self, word_masked: str) -> Tuple[Set[Tuple[str]], Set[Tuple[str]]]:
+        """
+        Update n-grams of the masked word, the same as those created by
+        hangman.model.ml.utils.n_gram, recreating only n-grams covering
+        letters that changed since the last call
+
+        :param word_masked: (str) masked word i.e. "h_pp_"
+        :return: Tuple
+            - [0] Set of unique n-grams added
+            - [1] Set of unique n-grams removed
+        """
+
+        removed = set()
+        if self._mask is None or len(self._mask) != len(word_masked):
+            self._reset_n_grams()
+            windows = hangman.model.ml.utils.n_gram_windows(word_masked)
+        else:
+            changed = [
+                i for i, (x, y) in enumerate(zip(self._mask, word_masked)) if x != y
+            ]
+            windows = hangman.model.ml.utils.n_gram_windows(word_masked, changed)
+
+        self._mask = word_masked
+
+        added = set()
+        for key, x in windows.items():
+            old = self._windows.get(key, None)
+            if old == x:
+                continue
+
+            if old is not None:
+                self._counts[old] = self._counts[old] - 1
+                if self._counts[old] == 0:
+                    del self._counts[old]
+                    removed.add(old)
+
+            self._windows[key] = x
+            self._counts[x] = self._counts.get(x, 0) + 1
+            if self._counts[x] == 1:
+                added.add(x)
+
+        return added.difference(removed), removed.difference(added)
+
     def _guess(self, word_masked):
+        with self._lock:
+            return self._guess_locked(word_masked)
 
-        # Create all n_grams to pass to model
-        pred_x, pred_y = hangman.model.ml.utils.n_gram([word_masked])
+    def _guess_locked(self, word_masked):
+
+        added, removed = self._n_grams(word_masked)
+
+        # Drop predictions of n-grams no longer in the word
+        for x in removed:
+            probabilities = self._predictions.pop(x, None)
+            if probabilities is not None:
+                self._total = self._total - probabilities
+                letter = int(np.argmax(probabilities))
+                self._argmax[letter] = self._argmax[letter] - 1
 
         # Remove any occurrences that are made up of only the masked character
-        pred = [
-            x for x in set(pred_x)
-            if not (np.array(x) == hangman.model.ml.utils.MASKED_CHAR).all()
+        pred = sorted(
+            x for x in added
+            if any(c != hangman.model.ml.utils.MASKED_CHAR for c in x)
+        )
+
+        # Get the model predictions for new n-grams in one batch
+        if len(pred) > 0:
+            probabilities = self.model.predict_batch(pred)
+            self._predictions.update(zip(pred, probabilities))
+
+            total = probabilities.sum(axis=0)
+            self._total = total if self._total is None else self._total + total
+            for letter in np.argmax(probabilities, axis=1).tolist():
+                self._argmax[letter] = self._argmax.get(letter, 0) + 1
+
+        if len(self._predictions) == 0:
+            return []
+
+        # Letters predicted by at least one n-gram, ordered by probability
+        # summed across all n-grams
+        predicted = {x for x, y in self._argmax.items() if y > 0}
+        order = np.argsort(-self._total, kind="stable")
+        outputs = [
+            hangman.model.ml.utils.TO_CHAR[x] for x in order
+            if x in predicted and x in hangman.model.ml.utils.TO_CHAR
         ]
 
-        # Get the model prediction
-        outputs = [self.model.predict(p) for p in pred]
         # Filter out anything that has already been _guesses
-        outputs_f = [x for x in outputs if x not in self.guesses]
+        return [
+            x for x in outputs
+            if x not in self.guesses and x != hangman.model.ml.utils.MASKED_CHAR
+        ]
+
+    def _guess_before_deadline(self, word_masked: str) -> List[str]:
+        """
+        Return ML guesses if the model responds before the deadline
+
+        :param word_masked: (str) masked word i.e. "h_pp_"
+        :return: List[str] of ML guesses, empty if the deadline was missed
+        """
+
+        if self.deadline is None:
+            return self._guess(word_masked)
+
+        self.deadline_calls = self.deadline_calls + 1
+
+        # Don't queue behind a guess that already missed the deadline, the
+        # next guess picks up the n-grams that changed since then
+        if self._future is not None and not self._future.done():
+            self.fallbacks = self.fallbacks + 1
+            return []
+
+        future = self._future = _executor().submit(self._guess, word_masked)
+
+        try:
+            return future.result(timeout=self.deadline)
+        except concurrent.futures.TimeoutError:
+            self.fallbacks = self.fallbacks + 1
+            if not self.warm:
+                future.cancel()
 
-        # Return the _guesses in the order of what has been predicted the most
-        return [x[0] for x in Counter(outputs_f).most_common()]
+            return []
 
     def guess(self, word: str) -> str:
         """
@@ -95,15 +269,13 @@ class NNPlayer(Heuristic):
             # has changed since last call
             if super()._validate(word):
                 # Most frequent letter
-                letters = ''.join(self._words)
-                frequency = Counter(letters)
-                most_frequent = set([x for x, y in frequency.most_common()[:3]])
+                most_frequent = set(self._ranked()[:3])
 
                 # Get ML guess(es)
-                ml_guesses = self._guess(word)
+                ml_guesses = self._guess_before_deadline(word)
 
-                # Take intersection between two
-                intersect = most_frequent.intersection(set(ml_guesses))
+                # Take intersection between two, in order of ML preference
+                intersect = [x for x in ml_guesses if x in most_frequent]
 
                 self._ml_guesses = deque(intersect)
 
@@ -111,6 +283,7 @@ class NNPlayer(Heuristic):
             if len(self._ml_guesses) > 0:
                 new_guess = self._ml_guesses.popleft()
                 self._update(new_guess)
+                self._record()
                 guess_type = "ml"
             else:
                 new_guess = super().guess(word)
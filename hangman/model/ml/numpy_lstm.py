@@ -0,0 +1,328 @@
+"""
+Inference only LSTM model that runs forward passes in NumPy.  Reads the
+architecture & trained weights from '.keras' files so that guessing
+doesn't need TensorFlow, supporting the layers used by the models in
+hangman.model.ml.config (Rescaling, LSTM, Bidirectional, Dropout & Dense)
+"""
+
+import io
+import json
+import zipfile
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+import numpy as np
+
+import hangman.model.ml.utils
+from hangman.model.ml.config.trilayer import WEIGHTS
+from hangman.model.ml.imodel import IModel
+from hangman.model.ml.lstm import SEQUENCE_LENGTH
+
+
+def sigmoid(x: Type["np.array"]) -> Type["np.array"]:
+    """Logistic sigmoid"""
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def softmax(x: Type["np.array"]) -> Type["np.array"]:
+    """Softmax across last axis"""
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": sigmoid,
+    "softmax": softmax,
+    "tanh": np.tanh,
+}
+
+
+class LSTM:
+    """Forward pass of a keras LSTM layer"""
+
+    def __init__(self, config: Dict[str, Any], weights: List[Type["np.array"]]) -> None:
+        """
+        :param config: keras layer config
+        :param weights: [kernel, recurrent kernel, bias] with gates
+            ordered input, forget, cell, output
+        """
+
+        self.units = config["units"]
+        self.return_sequences = config.get("return_sequences", False)
+        self.go_backwards = config.get("go_backwards", False)
+        self.activation = ACTIVATIONS[config.get("activation", "tanh")]
+        self.recurrent_activation = ACTIVATIONS[config.get("recurrent_activation", "sigmoid")]
+
+        self.kernel = weights[0].astype(np.float32)
+        self.recurrent_kernel = weights[1].astype(np.float32)
+        self.bias = (
+            weights[2].astype(np.float32) if len(weights) > 2
+            else np.zeros(4 * self.units, dtype=np.float32)
+        )
+
+    def __call__(self, x: Type["np.array"]) -> Type["np.array"]:
+        """
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (np.array) 3D array (# Samples, # Time Steps, units) if
+            return_sequences else 2D array (# Samples, units)
+        """
+
+        n, steps, _ = x.shape
+        u = self.units
+
+        if self.go_backwards:
+            x = x[:, ::-1]
+
+        # Input contribution for all time steps in one matrix multiply
+        z_x = x @ self.kernel + self.bias
+
+        h = np.zeros((n, u), dtype=np.float32)
+        c = np.zeros((n, u), dtype=np.float32)
+        outputs = []
+
+        for t in range(steps):
+            z = z_x[:, t] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :u])
+            f = self.recurrent_activation(z[:, u:2 * u])
+            c = f * c + i * self.activation(z[:, 2 * u:3 * u])
+            o = self.recurrent_activation(z[:, 3 * u:])
+            h = o * self.activation(c)
+            outputs.append(h)
+
+        if self.return_sequences:
+            return np.stack(outputs, axis=1)
+
+        return h
+
+
+class Bidirectional:
+    """Forward pass of a keras Bidirectional wrapper around LSTM layers"""
+
+    def __init__(
+            self,
+            config: Dict[str, Any],
+            forward: List[Type["np.array"]],
+            backward: List[Type["np.array"]],
+    ) -> None:
+        """
+        :param config: keras layer config
+        :param forward: weights of forward layer (see LSTM)
+        :param backward: weights of backward layer (see LSTM)
+        """
+
+        if config.get("merge_mode", "concat") != "concat":
+            raise ValueError(f"Unsupported merge mode: [{config['merge_mode']}]")
+
+        layer = config["layer"]["config"]
+        backward_config = config.get("backward_layer", {}).get(
+            "config", {**layer, "go_backwards": not layer.get("go_backwards", False)}
+        )
+
+        self.forward = LSTM(layer, forward)
+        self.backward = LSTM(backward_config, backward)
+
+    def __call__(self, x: Type["np.array"]) -> Type["np.array"]:
+        """
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (np.array) forward & backward outputs concatenated
+        """
+
+        forward = self.forward(x)
+        backward = self.backward(x)
+
+        # Align backward sequence outputs with input time steps
+        if self.backward.return_sequences:
+            backward = backward[:, ::-1]
+
+        return np.concatenate([forward, backward], axis=-1)
+
+
+class Dense:
+    """Forward pass of a keras Dense layer"""
+
+    def __init__(self, config: Dict[str, Any], weights: List[Type["np.array"]]) -> None:
+        """
+        :param config: keras layer config
+        :param weights: [kernel, bias]
+        """
+
+        self.activation = ACTIVATIONS[config.get("activation", "linear")]
+        self.kernel = weights[0].astype(np.float32)
+        self.bias = (
+            weights[1].astype(np.float32) if len(weights) > 1
+            else np.zeros(self.kernel.shape[1], dtype=np.float32)
+        )
+
+    def __call__(self, x: Type["np.array"]) -> Type["np.array"]:
+        return self.activation(x @ self.kernel + self.bias)
+
+
+class Rescaling:
+    """Forward pass of a keras Rescaling layer"""
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        """
+        :param config: keras layer config
+        """
+
+        self.scale = np.float32(config.get("scale", 1.0))
+        self.offset = np.float32(config.get("offset", 0.0))
+
+    def __call__(self, x: Type["np.array"]) -> Type["np.array"]:
+        return x * self.scale + self.offset
+
+
+def load(path: str) -> Tuple[List[Any], int]:
+    """
+    Build NumPy layers from a '.keras' file
+
+    :param path: (str) path to '.keras' file containing model config & weights
+    :return: Tuple
+        - [0] List of callable layers
+        - [1] (int) dimensionality of output
+    """
+
+    import h5py
+
+    with zipfile.ZipFile(path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+
+    def _vars(group) -> List[Type["np.array"]]:
+        _group = group["vars"]
+        return [np.array(_group[str(x)]) for x in range(len(_group))]
+
+    layers, counts = [], {}
+    with weights:
+        for layer in config["config"]["layers"]:
+            name = layer["class_name"]
+            _config = layer["config"]
+
+            # Weights are stored by class name with a counter i.e. 'lstm_1'
+            _name = name.lower()
+            count = counts.get(_name, 0)
+            counts[_name] = count + 1
+            group = weights["layers"].get(_name if count == 0 else f"{_name}_{count}", None)
+
+            if name in ("InputLayer", "Dropout"):
+                continue
+            elif name == "Rescaling":
+                layers.append(Rescaling(_config))
+            elif name == "LSTM":
+                layers.append(LSTM(_config, _vars(group["cell"])))
+            elif name == "Bidirectional":
+                layers.append(
+                    Bidirectional(
+                        _config,
+                        _vars(group["forward_layer"]["cell"]),
+                        _vars(group["backward_layer"]["cell"]),
+                    )
+                )
+            elif name == "Dense":
+                layers.append(Dense(_config, _vars(group)))
+            else:
+                raise ValueError(f"Unsupported layer: [{name}]")
+
+    return layers, layers[-1].kernel.shape[1]
+
+
+class NumpyLSTModel(IModel):
+    """
+    Defines an inference only container for a pre-trained LSTM model
+    that runs predictions in NumPy.  It can't be trained, train with
+    hangman.model.ml.LSTModel & load the '.keras' file it writes
+    """
+
+    def __init__(
+            self,
+            path: str = WEIGHTS,
+            *,
+            pad_sequence: bool = True,
+            sequence_length: int = SEQUENCE_LENGTH,
+    ) -> None:
+        """
+        Load model from file
+
+        :param path: (str) path to '.keras' file containing model config & weights
+            i.e. IConfig.weights_path
+        :param pad_sequence: (bool) whether to pad input data for prediction
+        :param sequence_length: (int) input sequence length
+        """
+
+        self.path = path
+        self.pad_sequence = pad_sequence
+        self.sequence_length = sequence_length
+
+        self.layers, self.output_units = load(path)
+
+        # Models built with compact=True normalise input themselves
+        self.compact = any(isinstance(x, Rescaling) for x in self.layers)
+
+    def train(self, epochs: int = 50, batch_size: int = 64):
+        """
+        Inference only, raises TypeError.  Train with hangman.model.ml.LSTModel
+        & load the '.keras' file it writes
+        """
+        raise TypeError("NumpyLSTModel is inference only, train with LSTModel")
+
+    def forward(self, x: Type["np.array"]) -> Type["np.array"]:
+        """
+        Run forward pass
+
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (np.array) 2D array (# Samples, # Classes)
+        """
+
+        x = x.astype(np.float32)
+        for layer in self.layers:
+            x = layer(x)
+
+        return x
+
+    def predict(self, x: Type["np.array"]) -> str:
+        """
+        Predict y values based on pre-trained model
+
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (str) prediction
+        """
+
+        prediction = self.predict_batch([x])
+        index = np.argmax(prediction)
+        result = hangman.model.ml.utils.TO_CHAR[index]
+
+        return result
+
+    def predict_batch(self, x: Sequence[Sequence[str]]) -> Type["np.array"]:
+        """
+        Predict probability of each y value for a batch of inputs.  Inputs
+        are padded to the same length, or when pad_sequence is False grouped
+        by length, so each group is a single batched forward pass
+
+        :param x: sequence of n-grams, each a sequence of chars i.e. ('a', '_')
+        :return: (np.array) 2D array (# Samples, # Classes) where column 'i' is
+            the probability of hangman.model.ml.utils.TO_CHAR[i]
+        """
+
+        result = np.zeros((len(x), self.output_units), dtype=np.float32)
+        codes = [[hangman.model.ml.utils.TO_INT[c] for c in _x] for _x in x]
+
+        # Group input indexes by sequence length
+        groups = {}
+        for idx, _codes in enumerate(codes):
+            _sequence_length = self.sequence_length if self.pad_sequence else len(_codes)
+            groups.setdefault(_sequence_length, []).append(idx)
+
+        for _sequence_length, idxs in groups.items():
+            p = hangman.model.ml.utils.pad_sequences(
+                [codes[idx] for idx in idxs], maxlen=_sequence_length
+            )
+
+            p = p.reshape(len(idxs), _sequence_length, 1)
+            if not self.compact:
+                p = p / len(hangman.model.ml.utils.TO_CHAR)
+
+            result[idxs] = self.forward(p)
+
+        return result
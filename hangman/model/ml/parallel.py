@@ -0,0 +1,384 @@
+"""
+Data parallel training on CPU by parameter averaging.  Each worker
+process holds a copy of the model & trains it on its own part of the
+training data for a number of steps, then the weights of all workers are
+averaged & sent back to them before the next round
+"""
+
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Type
+
+import numpy as np
+
+import hangman.model.ml.ngrams
+import hangman.model.ml.utils
+from hangman.model.ml.config.iconfig import IConfig
+
+SCALING_WORKERS = (1, 2, 4)
+
+
+def _arrays(
+        directory: str,
+        worker: int,
+        workers: int,
+        batch_size: int,
+        rng: Type["np.random.Generator"],
+) -> Iterator[Tuple[Type["np.array"], ...]]:
+    """Yield batches of every workers-th row of in-memory arrays saved to directory"""
+
+    x = np.load(os.path.join(directory, "x.npy"), mmap_mode="r")[worker::workers]
+    y = np.load(os.path.join(directory, "y.npy"), mmap_mode="r")[worker::workers]
+
+    while True:
+        order = rng.permutation(len(x))
+        for start in range(0, len(order), batch_size):
+            idxs = np.sort(order[start:start + batch_size])
+            yield x[idxs], y[idxs]
+
+
+def _shards(
+        directory: str,
+        worker: int,
+        workers: int,
+        batch_size: int,
+        rng: Type["np.random.Generator"],
+        width: int,
+        normalise: bool,
+        weighted: bool,
+        seed: int,
+) -> Iterator[Tuple[Type["np.array"], ...]]:
+    """
+    Yield batches of every workers-th block of shard files.  Blocks are
+    read in the same random order by all workers, so each block is read
+    by exactly one worker each epoch
+    """
+
+    shards = hangman.model.ml.ngrams.open_shards(directory, counts=weighted)
+    scale = len(hangman.model.ml.utils.TO_CHAR) if normalise else 1
+
+    epoch = 0
+    while True:
+        # Same seed in every worker so they agree on the order of blocks
+        order = np.random.default_rng([0 if seed is None else seed, epoch])
+
+        blocks = hangman.model.ml.ngrams.chunks(shards, width=width, rng=order)
+        for idx, block in enumerate(blocks):
+            if idx % workers != worker:
+                continue
+
+            perm = rng.permutation(len(block[0]))
+            for start in range(0, len(perm), batch_size):
+                idxs = perm[start:start + batch_size]
+                x = block[0][idxs].reshape(len(idxs), width, 1).astype(np.float32) / scale
+                yield (x, block[1][idxs].astype(np.int32)) + tuple(
+                    z[idxs].astype(np.float32) for z in block[2:]
+                )
+
+        epoch = epoch + 1
+
+
+def _sampled(
+        sampler: "hangman.model.ml.sampler.GameStateSampler",
+        batch_size: int,
+        rng: Type["np.random.Generator"],
+        normalise: bool,
+) -> Iterator[Tuple[Type["np.array"], ...]]:
+    """Yield batches sampled from game states"""
+
+    scale = len(hangman.model.ml.utils.TO_CHAR) if normalise else 1
+    while True:
+        x, y = sampler.sample(batch_size, rng)
+        yield x.reshape(len(x), x.shape[1], 1).astype(np.float32) / scale, y.astype(np.int32)
+
+
+def _worker(
+        config: IConfig,
+        source: Tuple[str, Any],
+        worker: int,
+        workers: int,
+        batch_size: int,
+        width: int,
+        weighted: bool,
+        seed: int,
+        connection: Any,
+) -> None:
+    """
+    Worker process loop.  Receives (weights, steps), trains for steps
+    batches & sends back (weights, mean loss, samples, seconds) until
+    None is received
+    """
+
+    try:
+        import tensorflow
+
+        # Share cores between workers rather than every worker using all of them
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        tensorflow.config.threading.set_intra_op_parallelism_threads(threads)
+        tensorflow.config.threading.set_inter_op_parallelism_threads(threads)
+
+        from hangman.model.ml.lstm import SPARSE_LOSSES
+
+        model = config.build()
+
+        rng = np.random.default_rng(None if seed is None else [seed, worker])
+        kind, value = source
+        normalise = not config.compact
+        if kind == "arrays":
+            batches = _arrays(value, worker, workers, batch_size, rng)
+        else:
+            # Streamed labels are class ids so use the matching sparse loss
+            loss = SPARSE_LOSSES.get(config.loss, config.loss)
+            if model.loss != loss:
+                model.compile(loss=loss, optimizer=config.optimizer)
+
+            if kind == "ngrams":
+                batches = _shards(
+                    value, worker, workers, batch_size, rng, width, normalise, weighted, seed
+                )
+            else:
+                batches = _sampled(value, batch_size, rng, normalise)
+
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+
+            weights, steps = message
+            model.set_weights(weights)
+
+            start = time.perf_counter()
+            losses, samples = [], 0
+            for _ in range(steps):
+                x, y, *sample_weight = next(batches)
+                losses.append(float(model.train_on_batch(
+                    x, y, sample_weight=sample_weight[0] if sample_weight else None
+                )))
+                samples = samples + len(y)
+
+            connection.send(
+                (model.get_weights(), float(np.mean(losses)), samples, time.perf_counter() - start)
+            )
+
+    except Exception as error:
+        connection.send(error)
+
+    finally:
+        connection.close()
+
+
+def train(
+        model: Any,
+        config: IConfig,
+        *,
+        x: Type["np.array"] = None,
+        y: Type["np.array"] = None,
+        ngram_path: str = None,
+        sampler: "hangman.model.ml.sampler.GameStateSampler" = None,
+        samples: int = None,
+        epochs: int = 50,
+        batch_size: int = 64,
+        workers: int = None,
+        sync_steps: int = None,
+        width: int = None,
+        weighted: bool = False,
+        seed: int = None,
+        callbacks: List[Any] = None,
+        verbose: bool = True,
+) -> "tensorflow.keras.callbacks.History":
+    """
+    Train model in worker processes by parameter averaging, on in-memory
+    'x' & 'y', on ngrams streamed from shard files or on ngrams sampled
+    from game states.  After each epoch the averaged weights are set on
+    model & passed to callbacks, i.e. ModelCheckpoint from call_backs
+
+    :param model: keras model built by config, holds the averaged weights
+    :param config: (IConfig) config workers build their model from
+    :param x: (np.array) (default=None) model input
+    :param y: (np.array) (default=None) labels matching x
+    :param ngram_path: (str) (default=None) directory of shard files
+    :param sampler: (GameStateSampler) (default=None) sampler to draw batches from
+    :param samples: (int) number of samples per epoch, required with sampler
+    :param epochs: (int) number of epochs
+    :param batch_size: (int) number of samples per batch per worker
+    :param workers: (int) number of worker processes, config.workers when None
+    :param sync_steps: (int) number of batches each worker trains on between
+        averaging weights, config.sync_steps when None
+    :param width: (int) (default=None) number of time steps of the training
+        data, the model's input time steps when None.  Must match them when
+        the model has a fixed input length
+    :param weighted: (bool) when True weight streamed ngrams by their counts
+    :param seed: (int) (default=None) random seed for shuffling & sampling
+    :param callbacks: List of keras callbacks to call after each epoch
+    :param verbose: (bool) when True print loss & throughput after each epoch
+    :return: (tensorflow.keras.callbacks.History) training history with
+        'loss', 'samples_per_sec' & 'worker_samples_per_sec' (per worker)
+    """
+
+    import tensorflow.keras.callbacks
+
+    workers = config.workers if workers is None else workers
+    sync_steps = config.sync_steps if sync_steps is None else sync_steps
+
+    # Check the data matches the model input here rather than in the workers
+    time_steps = model.input_shape[1]
+    width = time_steps if width is None else width
+    if x is not None and ngram_path is None and sampler is None:
+        width = x.shape[1] if width is None else width
+        if x.shape[1] != width:
+            raise ValueError(f"x has [{x.shape[1]}] time steps, expected [{width}]")
+    if sampler is not None and sampler.n_max - 2 != width:
+        raise ValueError(
+            f"Sampler ngrams have [{sampler.n_max - 2}] time steps, expected [{width}]"
+        )
+    if width is None:
+        raise ValueError("width is required for models without a fixed input length")
+    if time_steps is not None and width != time_steps:
+        raise ValueError(f"width [{width}] doesn't match model input of [{time_steps}] time steps")
+
+    history = tensorflow.keras.callbacks.History()
+    callbacks = [history] + ([] if callbacks is None else list(callbacks))
+    for callback in callbacks:
+        callback.set_model(model)
+        callback.on_train_begin()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Workers are started with spawn as forking a process that has
+        # initialised TensorFlow isn't safe, so data is passed by file
+        if ngram_path is not None:
+            source = ("ngrams", ngram_path)
+            samples = sum(len(_x) for _x, _ in hangman.model.ml.ngrams.open_shards(ngram_path))
+        elif sampler is not None:
+            if samples is None:
+                raise ValueError("samples is required to train on a sampler")
+            source = ("sampler", sampler)
+        else:
+            np.save(os.path.join(directory, "x.npy"), x)
+            np.save(os.path.join(directory, "y.npy"), y)
+            source = ("arrays", directory)
+            samples = len(x)
+
+        context = multiprocessing.get_context("spawn")
+        connections, processes = [], []
+        for worker in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(config, source, worker, workers, batch_size, width, weighted, seed, child),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+
+            connections.append(parent)
+            processes.append(process)
+
+        try:
+            steps = math.ceil(samples / (batch_size * workers))
+
+            for epoch in range(epochs):
+                start = time.perf_counter()
+                losses, worker_samples, worker_seconds = [], [0] * workers, [0.0] * workers
+
+                for _start in range(0, steps, sync_steps):
+                    weights = model.get_weights()
+                    for connection in connections:
+                        connection.send((weights, min(sync_steps, steps - _start)))
+
+                    results = [connection.recv() for connection in connections]
+                    for result in results:
+                        if isinstance(result, Exception):
+                            raise RuntimeError("Training worker failed") from result
+
+                    model.set_weights([
+                        np.mean(x, axis=0) for x in zip(*[result[0] for result in results])
+                    ])
+
+                    for worker, (_, loss, _samples, seconds) in enumerate(results):
+                        losses.append(loss)
+                        worker_samples[worker] = worker_samples[worker] + _samples
+                        worker_seconds[worker] = worker_seconds[worker] + seconds
+
+                logs = {
+                    "loss": float(np.mean(losses)),
+                    "samples_per_sec": sum(worker_samples) / (time.perf_counter() - start),
+                    "worker_samples_per_sec": [
+                        x / y if y > 0 else 0.0 for x, y in zip(worker_samples, worker_seconds)
+                    ],
+                }
+                for callback in callbacks:
+                    callback.on_epoch_end(epoch, logs)
+
+                if verbose:
+                    print(
+                        f"Epoch [{epoch + 1}] loss [{logs['loss']:.4f}] "
+                        f"samples/sec [{logs['samples_per_sec']:.1f}] per worker "
+                        f"[{', '.join(f'{x:.1f}' for x in logs['worker_samples_per_sec'])}]"
+                    )
+
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for process in processes:
+                process.join()
+
+    for callback in callbacks:
+        callback.on_train_end()
+
+    return history
+
+
+def scaling(
+        config: IConfig,
+        workers: Sequence[int] = SCALING_WORKERS,
+        *,
+        epochs: int = 1,
+        verbose: bool = True,
+        **kwargs,
+) -> Dict[int, Dict[str, float]]:
+    """
+    Measure throughput of data parallel training for different numbers of
+    workers, training a newly built model for each
+
+    :param config: (IConfig) config to build models from
+    :param workers: sequence of numbers of workers to train with, the first
+        is the baseline efficiency is measured against
+    :param epochs: (int) number of epochs, throughput of the last is reported
+    :param verbose: (bool) when True print report to std out
+    :param kwargs: training data & other arguments passed to train
+    :return: Dict keyed on number of workers of Dicts with keys
+        - 'samples_per_sec' total throughput
+        - 'worker_samples_per_sec' mean throughput per worker
+        - 'speedup' samples_per_sec relative to the baseline
+        - 'efficiency' speedup divided by the relative number of workers
+    """
+
+    report = {}
+    for _workers in workers:
+        history = train(
+            config.build(), config, workers=_workers, epochs=epochs, verbose=False, **kwargs
+        )
+        report[_workers] = {
+            "samples_per_sec": history.history["samples_per_sec"][-1],
+            "worker_samples_per_sec": float(
+                np.mean(history.history["worker_samples_per_sec"][-1])
+            ),
+        }
+
+    base_workers = workers[0]
+    for _workers, _report in report.items():
+        _report["speedup"] = _report["samples_per_sec"] / report[base_workers]["samples_per_sec"]
+        _report["efficiency"] = _report["speedup"] * base_workers / _workers
+
+        if verbose:
+            print(f"[{_workers}] workers " + ", ".join(
+                f"{k}=[{v:.4g}]" for k, v in _report.items()
+            ))
+
+    return report
@@ -0,0 +1,237 @@
+"""
+Cached pipeline building training data from a word list.  Each stage
+(masks -> ngrams -> model input) writes its output to a directory named
+by a digest of its inputs, so reruns with the same inputs skip stages
+already completed & stages interrupted part way resume where they stopped
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple, Type
+
+import numpy as np
+
+import hangman.core.dictionary
+import hangman.core.index
+import hangman.model.ml.utils
+
+CACHE_PATH = os.path.join(hangman.core.dictionary.DATA, "cache")
+STAGES = ("masks", "ngrams", "model_input")
+
+# File written to a stage directory once the stage has completed
+COMPLETE = "COMPLETE"
+
+# Version of the code & output format of each stage, part of its cache key.
+# Bump when a change to hangman.model.ml.utils changes what a stage writes
+FORMAT_VERSION = {"masks": 1, "ngrams": 1, "model_input": 1}
+
+
+def digest(*args: Any) -> str:
+    """
+    Return digest of stage inputs, word lists are passed as their
+    hangman.core.index.digest
+
+    :param args: values that change the output of a stage
+    :return: (str) hex digest
+    """
+
+    _hash = hashlib.blake2b(digest_size=16)
+    _hash.update(repr(args).encode())
+
+    return _hash.hexdigest()
+
+
+class Pipeline:
+    """
+    Builds model input from a word list, caching the output of each stage
+    under a digest of every input it depends on, i.e. changing n_max
+    rebuilds ngrams & model input but reuses the masks
+    """
+
+    def __init__(
+            self,
+            words: List[str],
+            cache_path: str = CACHE_PATH,
+            *,
+            min: int = 3,
+            max: int = 15,
+            min_letters: int = 2,
+            sample: int = None,
+            seed: int = None,
+            n_min: int = 2,
+            n_max: int = 7,
+            clean_mask: bool = True,
+            reverse: bool = True,
+            compact: bool = True,
+            processes: int = None,
+            verbose: bool = True,
+    ) -> None:
+        """
+        Create pipeline, no stages are run until model_input is called
+
+        :param words: List[str] all words to build training data from
+        :param cache_path: (str) directory to write stage outputs to
+        :param min: (int) min word length, see hangman.model.ml.utils.build_masks
+        :param max: (int) max word length
+        :param min_letters: (int) minimum actual letters to leave in each mask
+        :param sample: (int) (default=None) max number of masks per word
+        :param seed: (int) (default=None) seed for sampling masks
+        :param n_min: (int) min ngram length, see hangman.model.ml.utils.n_gram_codes
+        :param n_max: (int) max ngram length
+        :param clean_mask: (bool) see hangman.model.ml.utils.n_gram_codes
+        :param reverse: (bool) see hangman.model.ml.utils.n_gram_codes
+        :param compact: (bool) when True build model input with model_input_compact
+            otherwise model_input_codes
+        :param processes: (int) (default=None) number of processes to build masks
+        :param verbose: (bool) when True print time taken by each stage
+        """
+
+        self.words = words
+        self.cache_path = cache_path
+        self.processes = processes
+        self.verbose = verbose
+
+        self.masks_args = (min, max, min_letters, sample, seed)
+        self.ngrams_args = (n_min, n_max, clean_mask, reverse)
+        self.compact = compact
+
+        self.keys = {}
+        self.timings = {}
+
+    def key(self, stage: str) -> str:
+        """
+        Return digest of all inputs to a stage & the stages before it,
+        including the FORMAT_VERSION of each
+
+        :param stage: (str) one of STAGES
+        :return: (str) hex digest
+        """
+
+        if stage not in self.keys:
+            if stage == "masks":
+                self.keys[stage] = digest(
+                    FORMAT_VERSION[stage],
+                    hangman.core.index.digest(self.words),
+                    *self.masks_args,
+                )
+            elif stage == "ngrams":
+                self.keys[stage] = digest(
+                    FORMAT_VERSION[stage], self.key("masks"), *self.ngrams_args
+                )
+            elif stage == "model_input":
+                self.keys[stage] = digest(FORMAT_VERSION[stage], self.key("ngrams"), self.compact)
+            else:
+                raise ValueError(f"Invalid stage: [{stage}]")
+
+        return self.keys[stage]
+
+    def path(self, stage: str) -> str:
+        """Return directory stage output is written to"""
+        return os.path.join(self.cache_path, f"{stage}-{self.key(stage)}")
+
+    def _run(self, stage: str, build) -> str:
+        """
+        Run stage unless its output is complete, timing it
+
+        :param stage: (str) one of STAGES
+        :param build: callable taking the stage directory that writes its output
+        :return: (str) stage directory
+        """
+
+        path = self.path(stage)
+        complete = os.path.join(path, COMPLETE)
+
+        start = time.perf_counter()
+        hit = os.path.exists(complete)
+        if not hit:
+            os.makedirs(path, exist_ok=True)
+            build(path)
+
+            with open(complete, "w") as f:
+                json.dump({"key": self.key(stage), "seconds": time.perf_counter() - start}, f)
+
+        self.timings[stage] = {"hit": hit, "seconds": time.perf_counter() - start}
+        if self.verbose:
+            print(
+                f"Stage [{stage}] {'cache hit' if hit else 'built'} "
+                f"in [{self.timings[stage]['seconds']:.2f}]s"
+            )
+
+        return path
+
+    def masks(self) -> str:
+        """Build masked words, return directory of '{length}.txt' files"""
+
+        min, max, min_letters, sample, seed = self.masks_args
+
+        def _build(path: str) -> None:
+            hangman.model.ml.utils.build_masks(
+                self.words,
+                path,
+                min,
+                max,
+                min_letters=min_letters,
+                sample=sample,
+                seed=seed,
+                processes=self.processes,
+                resume=True,
+            )
+
+        return self._run("masks", _build)
+
+    def ngrams(self) -> str:
+        """Build ngrams of masked words, return directory of shard files"""
+
+        masks = self.masks()
+        n_min, n_max, clean_mask, reverse = self.ngrams_args
+
+        def _build(path: str) -> None:
+            hangman.model.ml.utils.build_ngrams(
+                sorted(glob.glob(os.path.join(masks, "*.txt"))),
+                path,
+                n_min=n_min,
+                n_max=n_max,
+                clean_mask=clean_mask,
+                reverse=reverse,
+                resume=True,
+                verbose=self.verbose,
+            )
+
+        return self._run("ngrams", _build)
+
+    def model_input(self) -> Tuple[Type["np.array"], Type["np.array"]]:
+        """
+        Run all stages not already cached
+
+        :return: Tuple of model input, memory mapped from the cache
+            - [0] x 3D array (# Samples, # Time Steps, # Features)
+            - [1] y class ids when compact otherwise one hot encoded
+        """
+
+        ngrams = self.ngrams()
+
+        def _build(path: str) -> None:
+            x, y = hangman.model.ml.utils.load_ngrams(ngrams)
+            if self.compact:
+                x, y = hangman.model.ml.utils.model_input_compact(x, y)
+            else:
+                x, y = hangman.model.ml.utils.model_input_codes(x, y)
+
+            np.save(os.path.join(path, "x.npy"), x)
+            np.save(os.path.join(path, "y.npy"), y)
+
+        path = self._run("model_input", _build)
+
+        return (
+            np.load(os.path.join(path, "x.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "y.npy"), mmap_mode="r"),
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return dict keyed on stage of cache key, whether it was a hit & seconds taken"""
+        return {
+            x: {"key": self.key(x), **self.timings[x]} for x in STAGES if x in self.timings
+        }
@@ -0,0 +1,272 @@
+"""
+Samples training ngrams from game states generated on the fly, rather
+than enumerating every masked combination of every word to disk.  Words
+are sampled from the dictionary & letters revealed in a random order, so
+training can run for any number of steps without the training set being
+held in memory or on disk
+"""
+
+from typing import List, Tuple, Type
+
+import numpy as np
+
+import hangman.model.ml.utils
+
+ORDERS = ("frequency", "random")
+
+# Keras PyDataset subclass, created on first use so importing this module
+# doesn't import TensorFlow.  Accessed as GameStateDataset through the module
+# __getattr__ so instances can be pickled by reference
+_DATASET = None
+
+
+class GameStateSampler:
+    """
+    Samples masked game states & ngrams from them.  A game state is a word
+    with some of its distinct letters revealed, in the order a player could
+    have guessed them, & each sample is one ngram of it split into x & y
+    as hangman.model.ml.utils.n_gram_codes splits them
+    """
+
+    def __init__(
+            self,
+            words: List[str],
+            *,
+            n_min: int = 2,
+            n_max: int = 7,
+            order: str = "frequency",
+            clean_mask: bool = True,
+            reverse: bool = True,
+    ) -> None:
+        """
+        Encode dictionary for sampling
+
+        :param words: List[str] words to sample from, words shorter than
+            n_min are ignored
+        :param n_min: (int) min size of ngram
+        :param n_max: (int) max size of ngram
+        :param order: (str) order letters are revealed in. Options:
+            - 'frequency' - random order weighted by letter frequency in the
+                            dictionary, similar to the Heuristic player
+            - 'random' - uniformly random order
+        :param clean_mask: (bool) drop ngrams predicting the masked char or
+            with only masked chars in x
+        :param reverse: (bool) also sample ngrams in reverse
+        """
+
+        if order not in ORDERS:
+            raise ValueError(f"Invalid value for order: [{order}]")
+
+        words = [x.lower() for x in words if len(x) >= n_min]
+        if len(words) == 0:
+            raise ValueError(f"No words of at least [{n_min}] letters to sample from")
+
+        self.n_min = n_min
+        self.n_max = n_max
+        self.order = order
+        self.clean_mask = clean_mask
+        self.reverse = reverse
+
+        # Words as TO_INT codes padded with 0 after
+        self.lengths = np.array([len(x) for x in words])
+        self.matrix = np.zeros((len(words), self.lengths.max()), dtype=np.uint8)
+        for length, matrix in hangman.model.ml.utils.encode(words).items():
+            self.matrix[self.lengths == length, :length] = matrix
+
+        # Log weight of each letter code when ordering reveals
+        frequency = np.bincount(
+            self.matrix.ravel(), minlength=len(hangman.model.ml.utils.TO_CHAR) + 1
+        )
+        self.weights = np.zeros(len(frequency))
+        if order == "frequency":
+            self.weights = np.log(np.maximum(frequency, 1) / frequency[1:].sum())
+
+    def states(
+            self,
+            size: int,
+            rng: Type["np.random.Generator"],
+    ) -> Tuple[Type["np.array"], Type["np.array"]]:
+        """
+        Sample masked game states
+
+        :param size: (int) number of states
+        :param rng: (np.random.Generator) random number generator
+        :return: Tuple
+            - [0] uint8 array of shape (size, max length) of codes padded
+              with 0 after, hidden letters replaced by the masked char
+            - [1] int array of shape (size,) of word lengths
+        """
+
+        idxs = rng.integers(len(self.matrix), size=size)
+        words, lengths = self.matrix[idxs], self.lengths[idxs]
+        rows = np.arange(size)
+
+        # Distinct letters of each word
+        present = np.zeros((size, len(self.weights)), dtype=bool)
+        present[rows[:, None], words] = True
+        present[:, 0] = False
+
+        # Order letters by weight plus Gumbel noise, i.e. sampled without
+        # replacement with probability proportional to frequency
+        keys = self.weights + rng.gumbel(size=present.shape)
+        keys[~present] = -np.inf
+
+        # Reveal the first k letters, from none up to all but one
+        k = (rng.random(size) * present.sum(axis=1)).astype(np.int64)
+        ordered = -np.sort(-keys, axis=1)
+        threshold = np.where(k > 0, ordered[rows, np.maximum(k - 1, 0)], np.inf)
+        revealed = keys >= threshold[:, None]
+
+        masked = hangman.model.ml.utils.TO_INT[hangman.model.ml.utils.MASKED_CHAR]
+        states = np.where(revealed[rows[:, None], words] | (words == 0), words, masked)
+
+        return states.astype(np.uint8), lengths
+
+    def sample(
+            self,
+            size: int,
+            rng: Type["np.random.Generator"] = None,
+    ) -> Tuple[Type["np.array"], Type["np.array"]]:
+        """
+        Sample ngrams from random game states
+
+        :param size: (int) number of ngrams
+        :param rng: (np.random.Generator) (default=None) random number generator
+        :return: Tuple
+            - [0] x uint8 array of shape (size, n_max - 2) of codes padded
+              with 0 after
+            - [1] y uint8 array of shape (size,) of codes
+        """
+
+        rng = np.random.default_rng() if rng is None else rng
+        width = self.n_max - 1
+        columns = np.arange(width)
+        masked = hangman.model.ml.utils.TO_INT[hangman.model.ml.utils.MASKED_CHAR]
+
+        x, y, count = [], [], 0
+        while count < size:
+            # Oversample as some ngrams are dropped by clean_mask
+            _size = 2 * (size - count)
+            states, lengths = self.states(_size, rng)
+            rows = np.arange(_size)
+
+            # Ngram size & start position within each word
+            n = rng.integers(self.n_min, np.minimum(self.n_max - 1, lengths) + 1)
+            start = (rng.random(_size) * (lengths - n + 1)).astype(np.int64)
+
+            idxs = np.minimum(start[:, None] + columns, states.shape[1] - 1)
+            ngrams = np.where(columns < n[:, None], states[rows[:, None], idxs], 0)
+
+            # Reverse the first 'n' codes of half of the ngrams
+            if self.reverse:
+                flip = rng.random(_size) < 0.5
+                order = np.where(
+                    flip[:, None] & (columns < n[:, None]), n[:, None] - 1 - columns, columns
+                )
+                ngrams = np.take_along_axis(ngrams, order, axis=1)
+
+            _y = ngrams[rows, n - 1]
+            ngrams[rows, n - 1] = 0
+            _x = ngrams[:, :width - 1]
+
+            if self.clean_mask:
+                keep = (_y != masked) & ((_x != masked) & (_x != 0)).any(axis=1)
+                _x, _y = _x[keep], _y[keep]
+
+            x.append(_x[:size - count])
+            y.append(_y[:size - count])
+            count = count + len(x[-1])
+
+        return np.concatenate(x).astype(np.uint8), np.concatenate(y).astype(np.uint8)
+
+
+def _dataset_class() -> type:
+    """Create GameStateDataset, a keras PyDataset subclass, on first call"""
+
+    global _DATASET
+
+    if _DATASET is None:
+        import keras
+
+        class GameStateDataset(keras.utils.PyDataset):
+            """Batches of ngrams sampled from random game states"""
+
+            def __init__(self, sampler, batch_size, steps, scale, seed, **kwargs) -> None:
+                super().__init__(**kwargs)
+
+                self.sampler = sampler
+                self.batch_size = batch_size
+                self.steps = steps
+                self.scale = scale
+                self.seed = seed
+                self.epoch = 0
+
+            def __len__(self) -> int:
+                return self.steps
+
+            def __getitem__(self, idx: int) -> Tuple[Type["np.array"], Type["np.array"]]:
+                rng = np.random.default_rng(
+                    None if self.seed is None else [self.seed, self.epoch, idx]
+                )
+                x, y = self.sampler.sample(self.batch_size, rng)
+
+                x = x.reshape(len(x), x.shape[1], 1).astype(np.float32) / self.scale
+                return x, y.astype(np.int32)
+
+            def on_epoch_end(self) -> None:
+                self.epoch = self.epoch + 1
+
+        # Top level name so pickle finds the class through __getattr__
+        GameStateDataset.__qualname__ = "GameStateDataset"
+        GameStateDataset.__module__ = __name__
+        _DATASET = GameStateDataset
+
+    return _DATASET
+
+
+def __getattr__(name: str):
+    if name == "GameStateDataset":
+        return _dataset_class()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def dataset(
+        sampler: GameStateSampler,
+        *,
+        batch_size: int = 64,
+        steps: int = 1000,
+        normalise: bool = True,
+        seed: int = None,
+        workers: int = 1,
+        use_multiprocessing: bool = False,
+) -> "keras.utils.PyDataset":
+    """
+    Create a keras dataset of batches sampled on the fly, for training with
+    LSTModel.train.  Each batch is sampled independently so batches can be
+    built in parallel by workers
+
+    :param sampler: (GameStateSampler) sampler to draw batches from
+    :param batch_size: (int) number of samples per batch
+    :param steps: (int) number of batches per epoch
+    :param normalise: (bool) when False x is left as codes, for models that
+        normalise input themselves
+    :param seed: (int) (default=None) random seed, batch 'i' of epoch 'j' is
+        the same every run when passed
+    :param workers: (int) number of workers sampling batches
+    :param use_multiprocessing: (bool) when True workers are processes
+        rather than threads
+    :return: (keras.utils.PyDataset) of Tuples
+        - [0] x float32 (normalised) of shape (batch_size, n_max - 2, 1)
+        - [1] y int32 class ids (sparse labels) of shape (batch_size,)
+    """
+
+    return _dataset_class()(
+        sampler,
+        batch_size,
+        steps,
+        len(hangman.model.ml.utils.TO_CHAR) if normalise else 1,
+        seed,
+        workers=workers,
+        use_multiprocessing=use_multiprocessing,
+    )
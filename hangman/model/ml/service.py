@@ -0,0 +1,286 @@
+"""
+In-process inference service shared by many players.  Requests for
+n-gram predictions from concurrent games are queued & flushed to the
+model as one batch, trading a small wait for far fewer model calls
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Sequence, Type
+
+import numpy as np
+
+import hangman.model.ml.utils
+from hangman.model.ml.imodel import IModel
+
+MAX_BATCH_SIZE = 512
+MAX_WAIT = 0.002
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_MS_BOUNDS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+QUEUE_DEPTH_BOUNDS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+class Histogram:
+    """Counts of values falling into fixed buckets"""
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        """
+        :param bounds: sorted upper bounds of each bucket, values above the
+            last bound are counted in an overflow bucket
+        """
+
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def add(self, value: float) -> None:
+        """Add value to its bucket"""
+
+        self.counts[int(np.searchsorted(self.bounds, value))] += 1
+        self.total = self.total + value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Return upper bound of the bucket holding the q-th percentile
+
+        :param q: (float) percentile between 0 & 100
+        :return: (float) bucket bound, max value seen for the overflow bucket
+        """
+
+        if len(self) == 0:
+            return 0.0
+
+        idx = int(np.searchsorted(np.cumsum(self.counts), q / 100 * len(self)))
+        return self.bounds[idx] if idx < len(self.bounds) else self.max
+
+    def stats(self) -> Dict[str, float]:
+        """Return dict of bucket counts keyed on upper bound, mean & percentiles"""
+
+        stats = {f"<={x}": y for x, y in zip(self.bounds, self.counts)}
+        stats[f">{self.bounds[-1]}"] = self.counts[-1]
+        stats["mean"] = self.total / len(self) if len(self) > 0 else 0.0
+        stats["p50"] = self.percentile(50)
+        stats["p99"] = self.percentile(99)
+        stats["max"] = self.max
+
+        return stats
+
+
+class _Request:
+    """N-grams from one caller waiting for predictions"""
+
+    __slots__ = ("x", "start", "done", "result", "error")
+
+    def __init__(self, x: Sequence[Sequence[str]]) -> None:
+        self.x = x
+        self.start = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceService(IModel):
+    """
+    Wraps a model so that predict_batch calls from many threads are
+    queued & run as a single batch.  A batch is flushed once it holds
+    max_batch_size n-grams or the oldest request has waited max_wait
+    seconds.  The service is an IModel so it can be passed to NNPlayer
+    in place of the model, the wrapped model is only called from the
+    service thread
+    """
+
+    def __init__(
+            self,
+            model: IModel,
+            *,
+            max_batch_size: int = MAX_BATCH_SIZE,
+            max_wait: float = MAX_WAIT,
+    ) -> None:
+        """
+        Start service thread
+
+        :param model: (hangman.model.ml.imodel.IModel) model to run batches on
+        :param max_batch_size: (int) number of n-grams that triggers a flush
+        :param max_wait: (float) seconds a request can wait for a batch to fill
+        """
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.batch_size = Histogram(BATCH_SIZE_BOUNDS)
+        self.latency_ms = Histogram(LATENCY_MS_BOUNDS)
+        self.queue_depth = Histogram(QUEUE_DEPTH_BOUNDS)
+        self.requests = 0
+        self.batches = 0
+
+        # Guards _closed so no request is queued after the stop sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "InferenceService":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush queued requests & stop service thread"""
+
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+
+        self._thread.join()
+
+        # Fail requests the service thread didn't get to, i.e. if it died
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is not None:
+                request.error = RuntimeError("InferenceService is closed")
+                request.done.set()
+
+    def train(self, epochs: int = 50, batch_size: int = 64):
+        """
+        Not supported, raises TypeError.  The wrapped model is only called
+        from the service thread, so train it before creating the service
+        """
+        raise TypeError("InferenceService only runs predictions, train the wrapped model")
+
+    def predict(self, x: Type["np.array"]) -> str:
+        """
+        Predict y values based on pre-trained model
+
+        :param x: (np.array) 3D array (# Samples, # Time Steps, # Features)
+        :return: (str) prediction
+        """
+
+        prediction = self.predict_batch([x])
+        index = np.argmax(prediction)
+        result = hangman.model.ml.utils.TO_CHAR[index]
+
+        return result
+
+    def predict_batch(self, x: Sequence[Sequence[str]]) -> Type["np.array"]:
+        """
+        Queue n-grams & block until the batch they are added to has run
+
+        :param x: sequence of n-grams, each a sequence of chars i.e. ('a', '_')
+        :return: (np.array) 2D array (# Samples, # Classes) where column 'i' is
+            the probability of hangman.model.ml.utils.TO_CHAR[i]
+        """
+
+        request = _Request(x)
+        with self._lock:
+            if self._closed or not self._thread.is_alive():
+                raise RuntimeError("InferenceService is closed")
+            self._queue.put(request)
+
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def _collect(self, request: _Request) -> List[_Request]:
+        """
+        Add queued requests to a batch until it is full or the first
+        request has waited max_wait seconds
+
+        :param request: (_Request) first request of the batch
+        :return: List of requests, ending with None if the service was closed
+        """
+
+        batch = [request]
+        size = len(request.x)
+        deadline = request.start + self.max_wait
+
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                if timeout > 0:
+                    _request = self._queue.get(timeout=timeout)
+                else:
+                    _request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            batch.append(_request)
+            if _request is None:
+                break
+
+            size = size + len(_request.x)
+
+        return batch
+
+    def _run(self) -> None:
+        """Service thread loop, run batches until closed"""
+
+        stop = False
+        while not stop:
+            request = self._queue.get()
+            if request is None:
+                break
+
+            batch = self._collect(request)
+            if batch[-1] is None:
+                batch, stop = batch[:-1], True
+
+            self.queue_depth.add(self._queue.qsize())
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Request]) -> None:
+        """Run model once over all n-grams in a batch & return results"""
+
+        x = [y for request in batch for y in request.x]
+
+        try:
+            probabilities = self.model.predict_batch(x)
+        except Exception as error:
+            for request in batch:
+                request.error = error
+                request.done.set()
+            return
+
+        self.batches = self.batches + 1
+        self.batch_size.add(len(x))
+
+        start = 0
+        end = time.perf_counter()
+        for request in batch:
+            request.result = probabilities[start:start + len(request.x)]
+            start = start + len(request.x)
+
+            self.requests = self.requests + 1
+            self.latency_ms.add((end - request.start) * 1000)
+
+            request.done.set()
+
+    def stats(self) -> Dict[str, object]:
+        """Return dict of request & batch counts & histograms"""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "requests_per_batch": self.requests / self.batches if self.batches > 0 else 0.0,
+            "batch_size": self.batch_size.stats(),
+            "latency_ms": self.latency_ms.stats(),
+            "queue_depth": self.queue_depth.stats(),
+        }
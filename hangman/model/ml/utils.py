@@ -3,18 +3,16 @@ Utility module that has useful functions to support ML process.
 Building training data etc
 """
 
-import itertools
-import json
+import concurrent.futures
 import os
 import string
-from typing import List, Tuple, Type
+from typing import Dict, Iterable, Iterator, List, Tuple, Type
 
-import nltk
 import numpy as np
-import tensorflow.keras.preprocessing.sequence
 
 import hangman.model.ml
-import hangman.core.dictionary
+import hangman.model.ml.ngrams
+from hangman.model.ml.ngrams import SHARD_SIZE
 
 MASKED_CHAR = "_"
 TO_CHAR = {
@@ -22,6 +20,108 @@ TO_CHAR = {
 }
 TO_INT = {y: x for x, y in TO_CHAR.items()}
 
+# Approximate max number of masked words held in memory at once
+CHUNK_SIZE = 1 << 20
+
+
+def pad_sequences(x: List[List[int]], maxlen: int = None) -> Type["np.array"]:
+    """
+    Pad sequences of letter codes with zeros after & truncate them from
+    the start to the same length, matching
+    tensorflow.keras.preprocessing.sequence.pad_sequences(x, padding="post")
+
+    :param x: List of sequences of ints
+    :param maxlen: (int) length to pad to, length of longest sequence when None
+    :return: (np.array) int32 array of shape (# sequences, maxlen)
+    """
+
+    if maxlen is None:
+        maxlen = max((len(_x) for _x in x), default=0)
+
+    result = np.zeros((len(x), maxlen), dtype=np.int32)
+    for idx, _x in enumerate(x):
+        _x = _x[-maxlen:] if maxlen > 0 else []
+        result[idx, :len(_x)] = _x
+
+    return result
+
+
+def mask_patterns(length: int, *, min_letters: int = 2) -> Type["np.array"]:
+    """
+    Create every way of masking a word of a given length, from the bit
+    patterns 1 ... 2^length - 2 where bit 'i' set masks letter 'i'
+
+    :param length: (int) word length
+    :param min_letters: (int) minimum actual letters to leave in each mask
+
+    :return: (np.array) bool array of shape (# patterns, length), True
+        where a letter is masked
+    """
+
+    patterns = np.arange(1, (1 << length) - 1, dtype=np.int64)
+    masked = ((patterns[:, None] >> np.arange(length)) & 1).astype(bool)
+
+    return masked[(length - masked.sum(axis=1)) >= min_letters]
+
+
+def mask_words(
+        words: List[str],
+        *,
+        min_letters: int = 2,
+        sample: int = None,
+        rng: "np.random.Generator" = None,
+        chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Type["np.array"]]:
+    """
+    Create masked combinations of a list of same length words in chunks
+
+    :param words: List[str] of lower case words all the same length
+    :param min_letters: (int) minimum actual letters to leave in each mask
+    :param sample: (int) (default=None) max number of masks to randomly
+        choose for each word, None creates all masks
+    :param rng: (np.random.Generator) random generator used for sampling
+    :param chunk_size: (int) approximate max number of masks per chunk, or
+        of patterns drawn from per chunk when sampling
+
+    :return: Iterator of uint8 arrays of ascii codes of shape (# masks, length)
+    """
+
+    if sample is not None and sample < 1:
+        raise ValueError(f"Invalid value for sample: [{sample}]")
+
+    if len(words) == 0:
+        return
+
+    length = len(words[0])
+    masked = mask_patterns(length, min_letters=min_letters)
+    if len(masked) == 0:
+        return
+
+    if sample is not None and sample < len(masked):
+        rng = np.random.default_rng() if rng is None else rng
+    else:
+        sample = None
+
+    encoded = np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8)
+    encoded = encoded.reshape(len(words), length)
+
+    # Sampling draws a random key for every pattern of every word, so chunks
+    # are bounded by the number of patterns rather than the number sampled
+    step = max(1, chunk_size // len(masked))
+
+    for start in range(0, len(encoded), step):
+        _encoded = encoded[start:start + step]
+
+        if sample is None:
+            _masked = masked[None, :, :]
+        else:
+            # Random patterns for each word, without replacement
+            choice = np.argpartition(rng.random((len(_encoded), len(masked))), sample, axis=1)
+            _masked = masked[choice[:, :sample]]
+
+        chunk = np.where(_masked, np.uint8(ord(MASKED_CHAR)), _encoded[:, None, :])
+        yield chunk.reshape(-1, length)
+
 
 def mask_generator(word: str, *, min_letters: int = 2) -> List[str]:
     """
@@ -37,34 +137,61 @@ def mask_generator(word: str, *, min_letters: int = 2) -> List[str]:
     :return: List[str] of all newly created combinations of masked words
     """
 
-    # Basic variables
-    word_len = len(word)
-    indexes = list(range(0, word_len))
-    _range = range(len(indexes) + 1)
+    return [
+        x.tobytes().decode("ascii")
+        for chunk in mask_words([word], min_letters=min_letters)
+        for x in chunk
+    ]
+
+
+def _build_masks(
+        words: List[str],
+        path: str,
+        min_letters: int,
+        sample: int,
+        seed: int,
+        resume: bool,
+) -> int:
+    """
+    Write masked combinations of same length words to a file, one per line
+
+    :return: (int) number of masks written
+    """
 
-    # Get all combinations of indices and lengths in word apart from () or all
-    combos = [y for n in _range for y in list(itertools.combinations(indexes, n))][1:-1]
+    if resume and os.path.exists(path):
+        # Lines are the same length so count from file size
+        return os.path.getsize(path) // (len(words[0]) + 1) if len(words) > 0 else 0
 
-    # Create list of dictionaries where key is index in target word based on combos
-    # generated above & value is masked_char
-    _l = [
-        {x: MASKED_CHAR for x in y}
-        for y in combos if (word_len - len(y)) >= min_letters
-    ]
+    rng = None
+    if seed is not None and len(words) > 0:
+        rng = np.random.default_rng([seed, len(words[0])])
 
-    # Convert word into dict where key is index & value is letter
-    # then duplicate into a list same size as combos
-    _wd = dict(enumerate(word))
-    _wd = [_wd] * len(combos)
+    # Write to a temporary file first so an interrupted build leaves no partial file
+    count = 0
+    with open(path + ".tmp", "wb") as f:
+        for chunk in mask_words(words, min_letters=min_letters, sample=sample, rng=rng):
+            lines = np.full((len(chunk), chunk.shape[1] + 1), ord("\n"), dtype=np.uint8)
+            lines[:, :-1] = chunk
+            f.write(lines.tobytes())
+            count = count + len(chunk)
 
-    # Merge base dict of word with all letters to each newly masked
-    # dict where some letters are replaced by masked_char
-    new_words = ["".join({**x, **y}.values()) for x, y in zip(_wd, _l)]
+    os.replace(path + ".tmp", path)
 
-    return new_words
+    return count
 
 
-def build_masks(words: List[str], mask_path: str, min: int = 3, max: int = 15) -> None:
+def build_masks(
+        words: List[str],
+        mask_path: str,
+        min: int = 3,
+        max: int = 15,
+        *,
+        min_letters: int = 2,
+        sample: int = None,
+        seed: int = None,
+        processes: int = None,
+        resume: bool = False,
+) -> Dict[int, int]:
     """
     Build all combinations of masked words for all words with lengths
     ranging between min & max
@@ -72,19 +199,139 @@ def build_masks(words: List[str], mask_path: str, min: int = 3, max: int = 15) -
     :param words: List[str] all words to build masked combinations over
     :param mask_path: dense_units path to write masked combinations to. A new
         file will be created for each word length
+    :param min_letters: (int) minimum actual letters to leave in each mask
+    :param sample: (int) (default=None) max number of masks to randomly
+        choose for each word, None writes all masks
+    :param seed: (int) (default=None) seed for sampling masks
+    :param processes: (int) (default=None) number of processes to build word
+        lengths in parallel, None uses one per cpu & 1 builds in this process
+    :param resume: (bool) when True skip word lengths with a file already
+        in mask_path, i.e. written before the build was interrupted
+
+    :return: Dict[int, int] number of masks written keyed on word length
+    """
 
-    :return: None
+    buckets = {x: [] for x in range(min, max + 1)}
+    for word in words:
+        if len(word) in buckets:
+            buckets[len(word)].append(word.lower())
+
+    args = [
+        (_words, os.path.join(mask_path, f"{str(_l)}.txt"), min_letters, sample, seed, resume)
+        for _l, _words in buckets.items()
+    ]
+
+    if processes == 1:
+        counts = [_build_masks(*x) for x in args]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            counts = list(executor.map(_build_masks, *zip(*args)))
+
+    return dict(zip(buckets, counts))
+
+
+def encode(words: List[str]) -> Dict[int, Type["np.array"]]:
+    """
+    Encode words into matrices of TO_INT codes, one per word length
+
+    :param words: List[str] of words containing only keys of TO_INT
+
+    :return: Dict keyed on word length of uint8 arrays of shape (# words, length)
+    """
+
+    # Code 0 is padding so it marks chars that aren't keys of TO_INT
+    codes = np.zeros(256, dtype=np.uint8)
+    codes[[ord(x) for x in TO_INT]] = list(TO_INT.values())
+
+    buckets = {}
+    for word in words:
+        buckets.setdefault(len(word), []).append(word)
+
+    result = {}
+    for length, _words in buckets.items():
+        text = "".join(_words)
+        try:
+            matrix = codes[np.frombuffer(text.encode("ascii"), dtype=np.uint8)]
+        except UnicodeEncodeError:
+            matrix = np.zeros(len(text), dtype=np.uint8)
+
+        if not matrix.all():
+            invalid = sorted({x for x in text if x not in TO_INT})
+            raise ValueError(f"Invalid characters: {invalid}")
+
+        result[length] = matrix.reshape(len(_words), length)
+
+    return result
+
+
+def n_gram_codes(
+        words: List[str],
+        *,
+        n_min: int = 2,
+        n_max: int = 7,
+        clean_mask: bool = False,
+        reverse: bool = True,
+) -> Tuple[Type["np.array"], Type["np.array"]]:
+    """
+    Create the same ngrams as n_gram as arrays of TO_INT codes.  Windows
+    of every word are packed into integer keys to remove duplicates
+
+    :param words: words to calculate ngrams for
+    :param n_min: min size of ngram
+    :param n_max: max size of ngrams, at most MAX_PACKED + 1 so windows
+        fit in one key
+    :param clean_mask: remove ngrams that are predicting the masked char
+    :param reverse: add in all reversed ngrams
+
+    :return: Tuple
+        - [0] x = uint8 array of shape (# ngrams, n_max - 2) of ngrams [:-1]
+          padded with 0 after, as model_input pads them
+        - [1] y = uint8 array of shape (# ngrams,) of ngrams [-1]
     """
 
-    # Get dataframe of words with length
-    word_df = hangman.core.dictionary.dataframe(words=words)
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    width = n_max - 1
+    if width > hangman.model.ml.ngrams.MAX_PACKED:
+        raise ValueError(
+            f"n_max [{n_max}] is too large, windows of more than "
+            f"[{hangman.model.ml.ngrams.MAX_PACKED}] codes don't fit in one key"
+        )
+
+    shifts = 5 * np.arange(width, dtype=np.int64)  # codes are < 32
 
-    for _l in range(min, max + 1):
-        with open(os.path.join(mask_path, f"{str(_l)}.txt"), 'w') as f:
-            _words = list(word_df[word_df.len == _l].word)
-            for _w in _words:
-                f.write("\n".join(mask_generator(_w)))
-                f.write("\n")
+    # Pack every window into an int64 key, padded with 0 after
+    keys = []
+    for length, matrix in encode(words).items():
+        for n in range(n_min, min(n_max, length + 1)):
+            windows = sliding_window_view(matrix, n, axis=1).reshape(-1, n)
+            keys.append(windows.astype(np.int64) @ (1 << shifts[:n]))
+
+    keys = np.unique(np.concatenate(keys)) if len(keys) > 0 else np.zeros(0, dtype=np.int64)
+    ngrams = ((keys[:, None] >> shifts) & 31).astype(np.uint8)
+    lengths = (ngrams > 0).sum(axis=1)
+
+    # Add ngrams in reverse, reversing only the first 'length' codes
+    if reverse:
+        columns = np.arange(width)
+        order = np.where(columns < lengths[:, None], lengths[:, None] - 1 - columns, columns)
+        ngrams = np.concatenate([ngrams, np.take_along_axis(ngrams, order, axis=1)])
+        lengths = np.concatenate([lengths, lengths])
+
+    # Split last code of each ngram off as y
+    rows = np.arange(len(ngrams))
+    y = ngrams[rows, lengths - 1]
+    ngrams[rows, lengths - 1] = 0
+    x = ngrams[:, :width - 1]
+
+    # Remove ngrams that are predicting the masked_char or all masked_char(s)
+    # are making the prediction
+    if clean_mask:
+        masked = TO_INT[MASKED_CHAR]
+        keep = (y != masked) & ((x != masked) & (x != 0)).any(axis=1)
+        x, y = x[keep], y[keep]
+
+    return x, y
 
 
 def n_gram(
@@ -109,115 +356,172 @@ def n_gram(
         - y = Tuple of all ngrams [-1] (single Tuple)
     """
 
-    ngrams = [list(nltk.ngrams(x, y)) for x in words for y in range(n_min, n_max)]
-    ngrams_unpac = [y for x in ngrams for y in x]  # unpack nested ngram lists
-    ngrams_unique = list(set(ngrams_unpac))  # remove duplicates
+    x, y = n_gram_codes(
+        words, n_min=n_min, n_max=n_max, clean_mask=clean_mask, reverse=reverse
+    )
 
-    # Add ngrams in reverse
-    if reverse:
-        ngrams_unique = ngrams_unique + [tuple(reversed(x)) for x in ngrams_unique]
+    x_char = tuple(tuple(TO_CHAR[c] for c in _x if c != 0) for _x in x.tolist())
+    y_char = tuple(TO_CHAR[c] for c in y.tolist())
 
-    xy = [(x[:-1], x[-1]) for x in ngrams_unique]
+    return x_char, y_char
 
-    # Remove ngrams that are predicting the masked_char or all masked_char(s)
-    # are making the prediction i.e. either (('a,'b','c'), ('_')) or
-    # (('_', '_'), ('a')) are both filtered out
-    if clean_mask:
-        xy = [
-            x for x in xy
-            if (x[1] != MASKED_CHAR) and (not (np.array(x[0]) == MASKED_CHAR).all())
-        ]
 
-    # Unzip into two tuples where [0] will be used to predict [1]
-    x_char, y_char = zip(*xy)
+def n_gram_windows(
+        word: str,
+        positions: Iterable[int] = None,
+        *,
+        n_min: int = 2,
+        n_max: int = 7,
+        reverse: bool = True,
+) -> Dict[Tuple[int, int, bool], Tuple[str]]:
+    """
+    Create the x values of the ngrams n_gram creates for a single word,
+    keyed on the span of the word each one is read from.  Passing
+    positions only creates those whose span covers a position so they
+    can be updated when letters in a word change
+
+    :param word: (str) word to calculate ngrams for
+    :param positions: (default=None) indexes of letters in word, when None
+        all ngrams are created
+    :param n_min: min size of ngram
+    :param n_max: max size of ngrams
+    :param reverse: add in all reversed ngrams
+
+    :return: Dict keyed on Tuple (start, end, reversed) of word[start:end]
+        with values of x i.e. Tuple[str] of word[start:end] (reversed)
+    """
 
-    xchar_len = len(x_char)
-    assert xchar_len == len(y_char)
+    positions = None if positions is None else sorted(positions)
 
-    xchar_half = round(xchar_len / 2)
-    assert xy[xchar_half][0] == x_char[xchar_half]
-    assert xy[xchar_half][1] == y_char[xchar_half]
+    windows = {}
+    for n in range(n_min, n_max):
+        for start in range(0, len(word) - n + 1):
+            # x of ngram is first n - 1 letters, or last n - 1 letters reversed
+            spans = [(start, start + n - 1, False)]
+            if reverse:
+                spans.append((start + 1, start + n, True))
 
-    return x_char, y_char
+            for _start, _end, _reverse in spans:
+                if positions is not None and not any(_start <= x < _end for x in positions):
+                    continue
+
+                x = tuple(word[_start:_end])
+                windows[(_start, _end, _reverse)] = x[::-1] if _reverse else x
 
+    return windows
 
-def build_ngrams(input_paths: List[str], output_path: str) -> None:
+
+def build_ngrams(
+        input_paths: List[str],
+        output_path: str,
+        *,
+        n_min: int = 2,
+        n_max: int = 7,
+        clean_mask: bool = True,
+        reverse: bool = True,
+        shard_size: int = SHARD_SIZE,
+        resume: bool = False,
+        verbose: bool = True,
+) -> None:
     """
-    Build all ngrams for words loaded from input paths & dense_units them
-    to json to target dense_units path.  Each json will be a dict with
-    two keys:
-        - 'x' = x_char return from n_gram function
-        - 'y' = y_char return from n_gram function
+    Build all ngrams for words loaded from input paths & write them as
+    binary shard files to the output path (see hangman.model.ml.ngrams)
 
     :param input_paths: list of files to load words from
-    :param output_path: directory to write json files to. File names
-        will match input file names changing to json extension
+    :param output_path: directory to write shard files to. File names
+        will match input file names i.e. '5.txt' -> '5-00000.ngrams'
+    :param n_min: (int) min ngram length, see n_gram_codes
+    :param n_max: (int) max ngram length, see n_gram_codes
+    :param clean_mask: (bool) see n_gram_codes
+    :param reverse: (bool) see n_gram_codes
+    :param shard_size: (int) max number of ngrams per shard file
+    :param resume: (bool) when True skip input files whose shards were all
+        written before the build was interrupted
+    :param verbose: (bool) when True print progress to std out
 
     :return: None
     """
 
     for path in input_paths:
-        _path, _mfn = os.path.splitext(_mfn)
+        _mfn = os.path.basename(path)
+        _mfn_name, _mfn_ext = os.path.splitext(_mfn)
 
-        print(f"Building ngrams for [{_mfn}]")
+        # Marker written once all shards of an input file are written
+        done = os.path.join(output_path, f"{_mfn_name}.done")
+        if resume and os.path.exists(done):
+            continue
+
+        if verbose:
+            print(f"Building ngrams for [{_mfn}]")
 
         # Load word file
         with open(path) as file:
             _words = [line.rstrip() for line in file]
 
         # Build ngrams for loaded file
-        _ngrams = n_gram(_words, clean_mask=True)
+        x, y = n_gram_codes(
+            _words, n_min=n_min, n_max=n_max, clean_mask=clean_mask, reverse=reverse
+        )
 
-        print(f"Calculated n=[{len(_ngrams[0])}] ngrams for [{_mfn}]")
+        if verbose:
+            print(f"Calculated n=[{len(x)}] ngrams for [{_mfn}]")
 
-        # Write ngrams to json
-        _data_out = {"x": _ngrams[0], "y": _ngrams[1]}
-        _mfn_name, _mfn_ext = os.path.splitext(_mfn)
+        hangman.model.ml.ngrams.write_shards(_mfn_name, output_path, x, y, shard_size=shard_size)
 
-        with open(os.path.join(output_path, f"{_mfn_name}.json"), 'w') as f:
-            json.dump(_data_out, f)
+        with open(done, "w"):
+            pass
 
 
-def load_ngrams(directory: str) -> List[Tuple[Tuple[Tuple[str]], Tuple[str]]]:
+def load_ngrams(directory: str) -> Tuple[Type["np.array"], Type["np.array"]]:
     """
-    Load ngrams from json files
-
-    :param directory: directory containing jsons
-
-    :return: List of Tuples
-        - [1] - x_char from n_gram function concatenated across input files
-        - [2] - y_char from n_gram function concatenated across input files
+    Load ngrams from shard files into memory, removing duplicates across
+    files & ngrams where x is only masked chars.  Use
+    hangman.model.ml.ngrams.convert_json to convert json files written by
+    earlier versions of build_ngrams
+
+    This copies every shard into one array so is for training sets that fit
+    in memory.  For larger sets use hangman.model.ml.ngrams.open_shards to
+    memory map shards without copying, hangman.model.ml.ngrams.dedupe to
+    remove duplicates on disk & hangman.model.ml.ngrams.dataset to stream
+    them into training
+
+    :param directory: directory containing shard files
+
+    :return: Tuple of arrays of TO_INT codes rather than the Tuples of
+        chars returned by earlier versions, pass them to model_input_codes
+        or model_input_compact (model_input also accepts them)
+        - [0] x uint8 array of codes padded with 0 after, as returned
+          by n_gram_codes concatenated across input files
+        - [1] y uint8 array of codes
     """
 
-    x_char, y_char = [], []
-    ngram_path_files_path = os.listdir(directory)
-
-    for _ngfn in ngram_path_files_path:
-
-        if os.path.splitext(_ngfn)[1] != ".json":
-            continue
+    shards = hangman.model.ml.ngrams.open_shards(directory)
+    width = max((x.shape[1] for x, *_ in shards), default=0)
 
-        print(f"Loading ngrams from [{_ngfn}]")
+    x = np.zeros((sum(len(_x) for _x, _ in shards), width), dtype=np.uint8)
+    y = np.zeros(len(x), dtype=np.uint8)
 
-        # Read ngrams from json
-        with open(os.path.join(directory, _ngfn)) as f:
-            _json = json.load(f)
+    start = 0
+    for _x, _y in shards:
+        x[start:start + len(_x), :_x.shape[1]] = _x
+        y[start:start + len(_y)] = _y
+        start = start + len(_x)
 
-        x_char = x_char + [tuple(x) for x in _json["x"]]
-        y_char = y_char + _json["y"]
+    # Remove duplicates by packing x & y into one key
+    _, idxs = np.unique(hangman.model.ml.ngrams.pack(x, y), return_index=True)
+    x, y = x[idxs], y[idxs]
 
-    assert len(x_char) == len(y_char)
+    masked = TO_INT[MASKED_CHAR]
+    keep = ((x != masked) & (x != 0)).any(axis=1)
 
-    _xy = tuple(set(zip(x_char, y_char)))
-    _xy = [z for z in _xy if not (np.array(z[0]) == MASKED_CHAR).all()]
-    _x, _y = zip(*_xy)
-
-    assert len(_x) == len(_y) == len(_xy)
-
-    return _x, _y
+    return x[keep], y[keep]
 
 
 def model_input(x_char: Tuple[Tuple[str]], y_char: Tuple[str]) -> Tuple[Type["np.array"]]:
+    # Ngrams already encoded as codes, i.e. returned by load_ngrams
+    if isinstance(x_char, np.ndarray):
+        return model_input_codes(x_char, np.asarray(y_char))
+
     # Map input chars to ints
     x = [[hangman.model.ml.utils.TO_INT[xb] for xb in x] for x in x_char]
     y = [hangman.model.ml.utils.TO_INT[y] for y in y_char]
@@ -231,13 +535,70 @@ def model_input(x_char: Tuple[Tuple[str]], y_char: Tuple[str]) -> Tuple[Type["np
     assert y[x_half] == hangman.model.ml.utils.TO_INT[y_char[x_half]]
 
     # Pad sequence to same left to the right
-    x = tensorflow.keras.preprocessing.sequence.pad_sequences(x, padding="post")
+    x = pad_sequences(x)
     assert len(x) == x_len
 
+    return model_input_codes(x, np.array(y))
+
+
+def model_input_codes(x: Type["np.array"], y: Type["np.array"]) -> Tuple[Type["np.array"]]:
+    """
+    Create model input from ngrams encoded as TO_INT codes, i.e. returned
+    by n_gram_codes
+
+    :param x: (np.array) 2D array of codes padded with 0 after
+    :param y: (np.array) 1D array of codes
+
+    :return: Tuple
+        - [0] x as 3D array (# Samples, # Time Steps, # Features) normalised
+        - [1] y one hot encoded
+    """
+
+    assert len(x) == len(y)
+
+    # Drop padding columns not used by any ngram
+    x = x[:, :int((x != 0).sum(axis=1).max(initial=0))]
+
     # Reshape to 3D Array for LSTM input (# Samples, # Time Steps, # Features)
-    x = np.array(x).reshape(x_len, len(x[0]), 1)
+    x = np.array(x).reshape(len(x), x.shape[1], 1)
     # Normalise
     x = x / len(hangman.model.ml.utils.TO_CHAR)
-    y = tensorflow.keras.utils.to_categorical(y)
+    y = np.eye(int(y.max()) + 1, dtype=np.float32)[y]
 
     return x, y
+
+
+def model_input_compact(x: Type["np.array"], y: Type["np.array"]) -> Tuple[Type["np.array"]]:
+    """
+    Create compact model input from ngrams encoded as TO_INT codes, for
+    models built with compact=True that normalise codes themselves & take
+    class ids as labels.  Uses 1 byte per time step & label compared to
+    float64 time steps & a float32 column per class from model_input_codes
+
+    :param x: (np.array) 2D array of codes padded with 0 after
+    :param y: (np.array) 1D array of codes
+
+    :return: Tuple
+        - [0] x uint8 3D array (# Samples, # Time Steps, # Features) of codes
+        - [1] y uint8 1D array of class ids
+    """
+
+    if len(x) != len(y):
+        raise ValueError(f"Length of x [{len(x)}] doesn't match y [{len(y)}]")
+
+    # Drop padding columns not used by any ngram
+    x = x[:, :int((x != 0).sum(axis=1).max(initial=0))]
+
+    return x.astype(np.uint8).reshape(len(x), x.shape[1], 1), y.astype(np.uint8)
+
+
+def bytes_per_sample(*arrays: Type["np.array"]) -> float:
+    """
+    Return memory used per sample by model input arrays
+
+    :param arrays: (np.array) arrays with samples along the first axis
+    :return: (float) total bytes divided by number of samples
+    """
+
+    samples = len(arrays[0]) if arrays else 0
+    return sum(x.nbytes for x in arrays) / samples if samples > 0 else 0.0
@@ -0,0 +1,60 @@
+"""
+Test LRUCache class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import unittest
+
+import hangman.core.cache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_put(self):
+        """Test values are returned & hits/misses counted"""
+
+        cache = hangman.core.cache.LRUCache(max_size=10)
+
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIn("a", cache)
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_evict_size(self):
+        """Test least recently used entries are evicted when full"""
+
+        cache = hangman.core.cache.LRUCache(max_size=2)
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_evict_bytes(self):
+        """Test entries are evicted when over memory limit"""
+
+        size = hangman.core.cache.sizeof("a") + hangman.core.cache.sizeof(1)
+        cache = hangman.core.cache.LRUCache(max_bytes=size * 2)
+
+        for x in "abcd":
+            cache.put(x, 1)
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.bytes, size * 2)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.bytes, 0)
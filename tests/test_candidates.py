@@ -0,0 +1,98 @@
+"""
+Test Candidates class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import unittest
+
+import hangman.core.candidates
+import hangman.core.index
+
+
+class TestCandidates(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = hangman.core.index.Index(
+            ["hello", "jelly", "belly", "hippo", "happy", "yes", "lolly"]
+        )
+
+    @classmethod
+    def instance(cls):
+        """Return an instance of Candidates class for 5 letter words"""
+        return hangman.core.candidates.Candidates(cls.index, 5)
+
+    def test_correct(self):
+        """Test words are kept only when letter positions match exactly"""
+
+        candidates = self.instance()
+        candidates.correct("l", "__ll_")
+
+        self.assertListEqual(candidates.words, ["hello", "jelly", "belly"])
+        self.assertListEqual(candidates.ids.tolist(), [0, 1, 2])
+
+    def test_wrong(self):
+        """Test words containing incorrect letters are removed"""
+
+        candidates = self.instance()
+        candidates.wrong("e")
+        self.assertListEqual(candidates.words, ["hippo", "happy", "lolly"])
+
+        candidates.exclude("oi")
+        self.assertListEqual(candidates.words, ["happy"])
+        self.assertEqual(len(candidates), 1)
+
+    def test_frequency(self):
+        """Test letter counts & ranking across remaining words"""
+
+        candidates = self.instance()
+        self.assertEqual(
+            candidates.frequency().tolist(), self.index.frequency(5).tolist()
+        )
+
+        candidates.wrong("l")
+        self.assertListEqual(
+            hangman.core.candidates.ranked(candidates.frequency()),
+            ["p", "h", "a", "i", "o", "y"]
+        )
+        self.assertListEqual(
+            hangman.core.candidates.ranked(
+                candidates.frequency(), hangman.core.index.letter_bits("ph")
+            ),
+            ["a", "i", "o", "y"]
+        )
+
+    def test_incremental_frequency(self):
+        """Test letter counts are updated by reading only the words that changed"""
+
+        def recount(candidates):
+            return hangman.core.index.Index(candidates.words).frequency(5).tolist()
+
+        candidates = self.instance()
+        candidates.frequency()
+        self.assertEqual(candidates.touched, 0)
+
+        # 1 word removed so its counts are subtracted
+        candidates.wrong("s")
+        candidates.wrong("b")
+        self.assertListEqual(candidates.frequency().tolist(), recount(candidates))
+        self.assertEqual(candidates.touched, 1)
+
+        # 2 words removed & 3 remain so removed words are subtracted
+        candidates.wrong("e")
+        self.assertListEqual(candidates.frequency().tolist(), recount(candidates))
+        self.assertEqual(candidates.touched, 1 + 2)
+
+        # 2 words removed & 1 remains so remaining word is counted
+        candidates.wrong("o")
+        self.assertListEqual(candidates.frequency().tolist(), recount(candidates))
+        self.assertEqual(candidates.touched, 1 + 2 + 1)
+
+        # No change so nothing is read
+        candidates.frequency()
+        self.assertEqual(candidates.touched, 1 + 2 + 1)
@@ -0,0 +1,91 @@
+"""
+Test CompiledHeuristic class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import tempfile
+import unittest
+
+import hangman.core
+import hangman.core.api
+import hangman.core.index
+import hangman.model.basic
+import hangman.model.basic.compiled
+
+
+class TestCompiledHeuristic(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = [
+            "hello", "jelly", "belly", "hippo", "happy", "lolly", "yes", "has", "his", "hi"
+        ]
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "tree.npz")
+        cls.trees = hangman.model.basic.compiled.compile_trees(
+            cls.words, cls.path, verbose=False
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def play(self, player, word):
+        """Play a game returning the list of guesses"""
+
+        api = hangman.core.API(self.words, word=word)
+        player.reset()
+        guesses = []
+
+        response = None
+        while response is None or response.status == hangman.core.api.Status.ONGOING:
+            guesses.append(player.guess(api.word))
+            response = api.guess(guesses[-1])
+
+        return guesses
+
+    def test_tree(self):
+        """Test trees are built for each word length"""
+
+        self.assertListEqual(sorted(self.trees), [2, 3, 5])
+
+        # 'hi' is the only 2 letter word so guesses follow a single path
+        tree = self.trees[2]
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.child(0, 0b01), 1)
+        self.assertIsNone(tree.child(0, 0b10))
+
+    def test_guess(self):
+        """Test compiled player matches Heuristic player"""
+
+        compiled = hangman.model.basic.compiled.CompiledHeuristic(self.path, dictionary=self.words)
+        heuristic = hangman.model.basic.Heuristic(self.words, cache=None)
+
+        # Last two words aren't in the dictionary so leave the tree
+        for word in self.words + ["hilly", "zzzzz"]:
+            self.assertListEqual(self.play(compiled, word), self.play(heuristic, word))
+
+    def test_dictionary(self):
+        """Test trees compiled from a different dictionary are rejected"""
+
+        self.assertRaises(
+            ValueError,
+            hangman.model.basic.compiled.CompiledHeuristic,
+            self.path,
+            dictionary=self.words[:-1],
+        )
+        self.assertRaises(
+            ValueError,
+            hangman.model.basic.compiled.CompiledHeuristic,
+            self.path,
+            key=hangman.core.index.digest(self.words[:-1]),
+        )
+
+        # Trees are only checked when asked to
+        compiled = hangman.model.basic.compiled.CompiledHeuristic(self.path)
+        self.assertEqual(compiled.key, hangman.core.index.digest(self.words))
@@ -0,0 +1,62 @@
+"""
+Test exhaustive evaluation
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import unittest
+
+import hangman.core
+import hangman.core.evaluate
+import hangman.model.basic
+
+
+class TestEvaluate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = [
+            "hello", "jelly", "belly", "hippo", "happy", "lolly", "yes", "has", "his", "hi",
+            "fuzzy", "jazzy", "buzz", "quiz", "quay",
+        ]
+
+    def test_evaluate(self):
+        """Test results match playing one game per word"""
+
+        player = hangman.model.basic.Heuristic(self.words, cache=None)
+        result = hangman.core.evaluate.evaluate(
+            self.words, player.guess_for, max_tries=3
+        )
+
+        expected = hangman.core.evaluate.Evaluation()
+        for word in self.words:
+            api = hangman.core.API(self.words, word=word, max_tries=3)
+            response = hangman.core.Hangman(api=api, player=player).start_game(verbose=False)
+
+            expected.update(
+                hangman.core.evaluate.Evaluation(
+                    games=1,
+                    wins=int(response.win),
+                    num_guesses={api.num_tries: 1},
+                    guess_map=response.guess_map,
+                )
+            )
+
+        self.assertEqual(result.games, len(self.words))
+        self.assertEqual(result.wins, expected.wins)
+        self.assertLess(result.wins, result.games)
+        self.assertDictEqual(result.num_guesses, expected.num_guesses)
+        self.assertDictEqual(result.guess_map, expected.guess_map)
+
+        self.assertListEqual(sorted(result.by_length), [2, 3, 4, 5])
+        self.assertEqual(sum(x.games for x in result.by_length.values()), result.games)
+
+    def test_repeated_guess(self):
+        """Test policies that repeat a guess are rejected"""
+
+        with self.assertRaises(ValueError):
+            hangman.core.evaluate.evaluate(["ab"], lambda mask, wrong: "a")
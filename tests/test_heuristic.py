@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
 
 import unittest
 
+import hangman.core.cache
 import hangman.model.basic
 
 
@@ -17,7 +18,7 @@ class TestHeuristic(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.words = ["hello", "hi", "yes", "please"]
+        cls.words = ["hello", "hi", "yes", "please", "jelly"]
 
     @classmethod
     def instance(cls):
@@ -27,10 +28,79 @@ class TestHeuristic(unittest.TestCase):
     def test_guess(self):
         """Test expected guessed based on short dictionary of words"""
 
-        word_masked = ["_____", "_e___", "_ell_", "hell_", "hello"]
+        word_masked = ["_____", "__ll_", "_ell_", "hell_", "hello"]
         player = self.instance()
-        guesses = ["e", "l", "h", "o"]
+        guesses = ["l", "e", "h", "o"]
 
         for g, w in zip(guesses, word_masked):
             guess = player.guess(w)
             self.assertEqual(g, guess)
+
+    def test_reset(self):
+        """Test player starts from the full word length bucket after a reset"""
+
+        player = self.instance()
+        player.guess("_____")
+        player.guess("_____")
+
+        player.reset()
+        self.assertIsNone(player._candidates)
+        self.assertEqual("l", player.guess("_____"))
+        self.assertListEqual(player._words, ["hello", "jelly"])
+
+    def test_filter(self):
+        """Test candidate words are filtered on correct & incorrect guesses"""
+
+        player = hangman.model.basic.Heuristic(["hello", "jelly", "belly", "hippo", "happy"])
+
+        self.assertEqual("l", player.guess("_____"))
+        self.assertEqual("p", player.guess("_____"))
+        self.assertListEqual(player._words, ["hippo", "happy"])
+        self.assertEqual("h", player.guess("__pp_"))
+        self.assertEqual("a", player.guess("h_pp_"))
+        self.assertEqual("y", player.guess("happ_"))
+        self.assertListEqual(player._words, ["happy"])
+
+    def test_touched(self):
+        """Test number of words read to update letter counts is stored per guess"""
+
+        player = hangman.model.basic.Heuristic(
+            ["hello", "jelly", "belly", "hippo", "happy"], cache=None
+        )
+
+        player.guess("_____")  # pre-calculated counts
+        player.guess("_____")  # 'l' removes 3 words & 2 remain so count those 2
+        player.guess("__pp_")  # 'p' removes nothing
+
+        self.assertListEqual(player.touched, [0, 2, 0])
+
+    def test_unknown_length(self):
+        """Test guesses fall back to whole dictionary for unseen word lengths"""
+
+        player = self.instance()
+        self.assertEqual("e", player.guess("________"))
+
+    def test_guess_for(self):
+        """Test stateless guesses match guesses made during a game"""
+
+        player = hangman.model.basic.Heuristic(
+            ["hello", "jelly", "belly", "hippo", "happy"], cache=None
+        )
+
+        states = [("_____", ""), ("_____", "l"), ("__pp_", "l"), ("h_pp_", "l")]
+        for mask, wrong in states:
+            self.assertEqual(player.guess(mask), player.guess_for(mask, wrong))
+
+    def test_cache(self):
+        """Test guesses are cached across players"""
+
+        cache = hangman.core.cache.LRUCache()
+        player = hangman.model.basic.Heuristic(self.words, cache=cache)
+        other = hangman.model.basic.Heuristic(self.words, cache=cache)
+
+        self.assertEqual(player.guess("_____"), "l")
+        self.assertEqual(cache.misses, 1)
+
+        self.assertEqual(other.guess("_____"), "l")
+        self.assertEqual(other.guess_for("_____", []), "l")
+        self.assertEqual(cache.hits, 2)
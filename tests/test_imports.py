@@ -0,0 +1,70 @@
+"""
+Test heavy dependencies are only imported by code paths that use them
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import json
+import subprocess
+import unittest
+
+import hangman
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(hangman.__file__)))
+HEAVY = ("tensorflow", "keras", "nltk", "pandas")
+
+# Generous upper bound on import time so the test only fails when a heavy
+# dependency is imported again, TensorFlow alone takes seconds
+MAX_SECONDS = 2.0
+
+
+def import_time(statement: str) -> dict:
+    """
+    Run import statement in a new interpreter
+
+    :param statement: (str) python import statement
+    :return: dict with keys
+        - 'seconds' time taken to run the statement
+        - 'modules' heavy dependencies in sys.modules afterwards
+    """
+
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"modules = [x for x in {HEAVY!r} if x in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'modules': modules}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+class TestImports(unittest.TestCase):
+
+    def test_import_time(self):
+        """Test player modules import without heavy dependencies"""
+
+        for statement in (
+                "import hangman.core",
+                "import hangman.model.basic",
+                "import hangman.model.ml",
+                "import hangman.model.ml.config",
+                "import hangman.model.ml.utils",
+        ):
+            result = import_time(statement)
+            message = f"[{statement}] took [{result['seconds']:.3f}] seconds"
+
+            self.assertListEqual(result["modules"], [], message)
+            self.assertLess(result["seconds"], MAX_SECONDS, message)
@@ -0,0 +1,109 @@
+"""
+Test dictionary Index class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import unittest
+
+import numpy as np
+
+import hangman.core.index
+
+
+class TestIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "hi", "yes", "please", "jelly", "happy", "hippo", "lolly"]
+
+    @classmethod
+    def instance(cls):
+        """Return an instance of Index class"""
+        return hangman.core.index.Index(cls.words)
+
+    def test_encode(self):
+        """Test words are encoded to letter codes"""
+
+        np.testing.assert_array_equal(
+            hangman.core.index.encode(["abc", "z_a"], 3),
+            np.array([[0, 1, 2], [25, 26, 0]], dtype=np.uint8)
+        )
+
+        with self.assertRaises(ValueError):
+            hangman.core.index.encode(["a-c"], 3)
+
+    def test_buckets(self):
+        """Test words are bucketed by length"""
+
+        index = self.instance()
+
+        self.assertListEqual(index.lengths, [2, 3, 5, 6])
+        self.assertListEqual(index.words(5), ["hello", "jelly", "happy", "hippo", "lolly"])
+        self.assertListEqual(index.words(4), [])
+        self.assertEqual(index.matrix(5).shape, (5, 5))
+        self.assertEqual(index.matrix(4).shape, (0, 4))
+
+    def test_frequency(self):
+        """Test letter counts per bucket & across the dictionary"""
+
+        index = self.instance()
+
+        frequency = index.frequency(5)
+        self.assertEqual(frequency[hangman.core.index.ALPHABET.index("l")], 7)
+        self.assertEqual(frequency[hangman.core.index.ALPHABET.index("e")], 2)
+        self.assertEqual(frequency.sum(), 25)
+        self.assertEqual(index.frequency().sum(), sum(len(x) for x in self.words))
+
+    def test_bits(self):
+        """Test letter presence masks are aligned with encoded words"""
+
+        index = self.instance()
+
+        self.assertEqual(hangman.core.index.letter_bits("ac"), 0b101)
+        self.assertEqual(hangman.core.index.letter_bits(""), 0)
+
+        bits = index.bits(5)
+        self.assertEqual(bits.dtype, np.uint32)
+        self.assertListEqual(
+            bits.tolist(),
+            [hangman.core.index.letter_bits(x) for x in index.words(5)]
+        )
+        self.assertEqual(len(index.bits(4)), 0)
+
+        # mask char is not counted as a letter
+        np.testing.assert_array_equal(
+            hangman.core.index.presence(hangman.core.index.encode(["a_"], 2)),
+            np.array([1], dtype=np.uint32)
+        )
+
+    def test_postings(self):
+        """Test positional inverted index returns sorted word ids"""
+
+        index = self.instance()
+
+        self.assertListEqual(index.postings(5, 0, "h").tolist(), [0, 2, 3])
+        self.assertListEqual(index.postings(5, 3, "l").tolist(), [0, 1, 4])
+        self.assertListEqual(index.postings(5, 0, "z").tolist(), [])
+        self.assertListEqual(index.positions(5, "p", [2, 3]).tolist(), [2, 3])
+
+    def test_candidates(self):
+        """Test masked word & incorrect letter queries"""
+
+        index = self.instance()
+
+        def words(mask, wrong=()):
+            return [index.words(len(mask))[x] for x in index.candidates(mask, wrong)]
+
+        self.assertListEqual(words("_____"), index.words(5))
+        self.assertListEqual(words("h_pp_"), ["happy", "hippo"])
+        self.assertListEqual(words("h_pp_", "a"), ["hippo"])
+        self.assertListEqual(words("__ll_"), ["hello", "jelly"])
+        self.assertListEqual(words("__ll_", "e"), [])
+        self.assertListEqual(words("_____", "lp"), [])
+        self.assertListEqual(words("___"), ["yes"])
+        self.assertListEqual(words("____"), [])
@@ -0,0 +1,200 @@
+"""
+Test LSTModel class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+import hangman.model.ml
+import hangman.model.ml.lstm
+import hangman.model.ml.ngrams
+import hangman.model.ml.utils
+from hangman.model.ml.config import TriLayer
+from hangman.model.ml.config.iconfig import IConfig
+
+
+class ConfigMinimal(IConfig):
+    """Config implementing only the IConfig interface"""
+
+    def build(self):
+        return TriLayer(input=(5, 1), dense_units=28, lstm_units=4).build()
+
+    def load(self, compile_model):
+        raise ValueError("Not saved")
+
+    def load_weights(self, model, compile_model):
+        raise ValueError("Not saved")
+
+
+class TestLSTModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.x = [("a", "_"), ("h", "e", "l"), ("_", "p", "p"), ("e",)]
+
+    @classmethod
+    def instance(cls, **kwargs):
+        """Return an instance of LSTModel class with pre-trained weights"""
+        return hangman.model.ml.LSTModel(
+            "load_model_weights", config=TriLayer(), pad_sequence=False, **kwargs
+        )
+
+    def test_config_defaults(self):
+        """Test configs only implementing IConfig can be used for predictions"""
+
+        model = hangman.model.ml.LSTModel("build", config=ConfigMinimal(), ouput_path=None)
+        self.assertEqual(model.predict_batch(self.x).shape, (len(self.x), 28))
+
+        # No TFLite model path to load from or export to
+        self.assertRaises(
+            ValueError, hangman.model.ml.LSTModel, "tflite", config=ConfigMinimal()
+        )
+        self.assertRaises(ValueError, model.export_tflite)
+
+        x = np.zeros((16, 5, 1), dtype=np.float32)
+        y = np.eye(28, dtype=np.float32)[np.arange(16) % 28]
+        history = model.train(1, 8, x=x, y=y, verbose=False)
+        self.assertEqual(len(history.history["loss"]), 1)
+
+    def test_predict_batch(self):
+        """Test batch predictions match single predictions"""
+
+        model = self.instance()
+        probabilities = model.predict_batch(self.x)
+
+        self.assertEqual(probabilities.shape, (len(self.x), 27))
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-4)
+        self.assertListEqual(
+            [hangman.model.ml.utils.TO_CHAR[x] for x in probabilities.argmax(axis=1)],
+            [model.predict(x) for x in self.x]
+        )
+
+    def test_cache(self):
+        """Test predictions are cached & persisted between instances"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.npz")
+
+            model = self.instance(cache_size=100, cache_path=path)
+            expected = model.predict_batch(self.x)
+            model.predict_batch(self.x)
+
+            self.assertEqual(model.cache.misses, len(self.x))
+            self.assertEqual(model.cache.hits, len(self.x))
+
+            model.save_cache()
+
+            loaded = self.instance(cache_size=100, cache_path=path)
+            self.assertEqual(len(loaded.cache), len(self.x))
+            np.testing.assert_allclose(loaded.predict_batch(self.x), expected, rtol=1e-6)
+            self.assertEqual(loaded.cache.hits, len(self.x))
+
+            # Different input padding gives different predictions so isn't loaded
+            padded = hangman.model.ml.LSTModel(
+                "load_model_weights", config=TriLayer(), cache_size=100, cache_path=path
+            )
+            self.assertEqual(len(padded.cache), 0)
+
+    def test_tflite(self):
+        """Test quantized TFLite model gives similar predictions to keras"""
+
+        x, y = hangman.model.ml.utils.n_gram(["hello", "h_pp_", "world", "_a__"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = TriLayer(tflite_path=os.path.join(directory, "model.tflite"))
+
+            model = hangman.model.ml.LSTModel("load_model_weights", config=config)
+            model.export_tflite(batch_size=8)
+
+            quantized = hangman.model.ml.LSTModel("tflite", config=config)
+            probabilities = quantized.predict_batch(x)
+
+            self.assertEqual(probabilities.shape, (len(x), 27))
+            np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-3)
+            self.assertEqual(quantized.predict(x[0]), hangman.model.ml.utils.TO_CHAR[
+                probabilities[0].argmax()
+            ])
+
+            report = hangman.model.ml.lstm.compare(
+                {"keras": model, "tflite": quantized},
+                x,
+                y,
+                paths={"keras": config.weights_path, "tflite": config.tflite_path},
+                repeats=1,
+                verbose=False,
+            )
+
+            self.assertEqual(report["keras"]["agreement"], 1.0)
+            self.assertGreater(report["tflite"]["agreement"], 0.9)
+            self.assertLess(report["tflite"]["size_bytes"], report["keras"]["size_bytes"])
+
+            self.assertRaises(ValueError, quantized.train)
+            self.assertRaises(
+                ValueError, hangman.model.ml.LSTModel, "tflite", config=config, pad_sequence=False
+            )
+
+    def test_train_stream(self):
+        """Test model trains on ngrams streamed from shard files"""
+
+        x, y = hangman.model.ml.utils.n_gram_codes(["hello", "h_pp_", "world", "_a__"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            hangman.model.ml.ngrams.write_shards("5", directory, x, y, shard_size=20)
+
+            model = hangman.model.ml.LSTModel(
+                "build",
+                config=TriLayer(input=(5, 1), dense_units=28, lstm_units=4),
+                ouput_path=None,
+            )
+            history = model.train(2, 8, ngram_path=directory, seed=0, weighted=True, verbose=False)
+
+        self.assertEqual(len(history.history["loss"]), 2)
+        self.assertEqual(len(history.history["samples_per_sec"]), 2)
+        self.assertTrue(all(x > 0 for x in history.history["samples_per_sec"]))
+        self.assertEqual(model.predict_batch([("a", "_")]).shape, (1, 28))
+
+    def test_train_compact(self):
+        """Test compact model trains on uint8 codes & class ids"""
+
+        x, y = hangman.model.ml.utils.n_gram_codes(["hello", "h_pp_", "world", "_a__"])
+        x, y = hangman.model.ml.utils.model_input_compact(x, y)
+
+        config = TriLayer(input=(x.shape[1], 1), dense_units=28, lstm_units=4, compact=True)
+        self.assertEqual(config.loss, "sparse_categorical_crossentropy")
+
+        model = hangman.model.ml.LSTModel(
+            "build", config=config, ouput_path=None, sequence_length=x.shape[1]
+        )
+        history = model.train(1, 8, x=x, y=y, verbose=False)
+
+        self.assertEqual(len(history.history["samples_per_sec"]), 1)
+        self.assertEqual(model.predict_batch([("a", "_")]).shape, (1, 28))
+
+    def test_train_sampler(self):
+        """Test model trains on ngrams sampled from game states"""
+
+        from hangman.model.ml.sampler import GameStateSampler
+
+        model = hangman.model.ml.LSTModel(
+            "build",
+            config=TriLayer(input=(5, 1), dense_units=28, lstm_units=4),
+            ouput_path=None,
+        )
+        sampler = GameStateSampler(["hello", "h_pp_", "world"])
+
+        self.assertRaises(ValueError, model.train, 1, 8, sampler=sampler)
+        self.assertRaises(
+            ValueError, model.train, 1, 8, sampler=GameStateSampler(["hello"], n_max=5),
+            steps_per_epoch=3,
+        )
+
+        history = model.train(2, 8, sampler=sampler, steps_per_epoch=3, seed=0, verbose=False)
+        self.assertEqual(len(history.history["samples_per_sec"]), 2)
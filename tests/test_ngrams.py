@@ -0,0 +1,210 @@
+"""
+Test binary ngram shard files
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+import hangman.model.ml.ngrams
+import hangman.model.ml.utils
+
+
+class TestNgrams(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "h_pp_", "jelly", "_a__"]
+        cls.x, cls.y = hangman.model.ml.utils.n_gram_codes(cls.words, clean_mask=True)
+
+    def test_shard(self):
+        """Test ngrams are read back from a shard without copying"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.ngrams")
+            hangman.model.ml.ngrams.write_shard(path, self.x, self.y)
+
+            x, y = hangman.model.ml.ngrams.read_shard(path)
+            self.assertIsInstance(x, np.memmap)
+            np.testing.assert_array_equal(x, self.x)
+            np.testing.assert_array_equal(y, self.y)
+
+            with open(path, "wb") as f:
+                f.write(b"{}")
+            self.assertRaises(ValueError, hangman.model.ml.ngrams.read_shard, path)
+
+    def test_shards(self):
+        """Test ngrams are split across shards & read back in order"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = hangman.model.ml.ngrams.write_shards(
+                "5", directory, self.x, self.y, shard_size=10
+            )
+            self.assertEqual(len(paths), -(-len(self.x) // 10))
+
+            shards = hangman.model.ml.ngrams.open_shards(directory)
+            np.testing.assert_array_equal(np.concatenate([x for x, _ in shards]), self.x)
+            np.testing.assert_array_equal(np.concatenate([y for _, y in shards]), self.y)
+
+    def test_build_load(self):
+        """Test ngrams built from word files are loaded without duplicates"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, words in (("5.txt", self.words), ("4.txt", ["_a__", "ab_c"])):
+                paths.append(os.path.join(directory, name))
+                with open(paths[-1], "w") as f:
+                    f.write("\n".join(words))
+
+            hangman.model.ml.utils.build_ngrams(paths, directory, shard_size=50)
+            x, y = hangman.model.ml.utils.load_ngrams(directory)
+
+        expected_x, expected_y = hangman.model.ml.utils.n_gram_codes(
+            self.words + ["ab_c"], clean_mask=True
+        )
+        self.assertSetEqual(
+            set(zip(map(tuple, x.tolist()), y.tolist())),
+            set(zip(map(tuple, expected_x.tolist()), expected_y.tolist()))
+        )
+        self.assertEqual(len(x), len(set(zip(map(tuple, x.tolist()), y.tolist()))))
+
+        # Loaded codes can be passed to model_input as n_gram chars were
+        model_x, model_y = hangman.model.ml.utils.model_input(x, y)
+        codes_x, codes_y = hangman.model.ml.utils.model_input_codes(x, y)
+        np.testing.assert_array_equal(model_x, codes_x)
+        np.testing.assert_array_equal(model_y, codes_y)
+
+    def test_convert_json(self):
+        """Test json ngram files are converted to shards"""
+
+        x_char, y_char = hangman.model.ml.utils.n_gram(self.words, clean_mask=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "5.json"), "w") as f:
+                json.dump({"x": x_char, "y": y_char}, f)
+
+            paths = hangman.model.ml.ngrams.convert_json(directory)
+            self.assertListEqual(paths, [os.path.join(directory, "5-00000.ngrams")])
+
+            x, y = hangman.model.ml.ngrams.read_shard(paths[0])
+
+        # Json ngrams are padded to the longest ngram in the file
+        self.assertListEqual(
+            sorted(zip(
+                [tuple(_x) + (0,) * (self.x.shape[1] - x.shape[1]) for _x in x.tolist()],
+                y.tolist()
+            )),
+            sorted(zip(map(tuple, self.x.tolist()), self.y.tolist()))
+        )
+
+    def test_dataset(self):
+        """Test shards are streamed as batches of model input with sparse labels"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            hangman.model.ml.ngrams.write_shards(
+                "5", directory, self.x[:, :3], self.y, shard_size=10
+            )
+
+            for shuffle_buffer in (0, 16):
+                batches = list(hangman.model.ml.ngrams.dataset(
+                    directory, batch_size=4, width=5, shuffle_buffer=shuffle_buffer,
+                    chunk_size=3, seed=0
+                ))
+
+                x = np.concatenate([_x.numpy() for _x, _ in batches])
+                y = np.concatenate([_y.numpy() for _, _y in batches])
+
+                self.assertEqual(x.dtype, np.float32)
+                self.assertEqual(x.shape, (len(self.x), 5, 1))
+                self.assertEqual(y.dtype, np.int32)
+
+                codes = np.rint(x[..., 0] * len(hangman.model.ml.utils.TO_CHAR)).astype(np.uint8)
+                expected = np.zeros_like(self.x)
+                expected[:, :3] = self.x[:, :3]
+                self.assertListEqual(
+                    sorted(zip(map(tuple, codes.tolist()), y.tolist())),
+                    sorted(zip(map(tuple, expected.tolist()), self.y.tolist()))
+                )
+
+    def test_pack(self):
+        """Test ngrams are unpacked from keys"""
+
+        keys = hangman.model.ml.ngrams.pack(self.x, self.y)
+        x, y = hangman.model.ml.ngrams.unpack(keys, self.x.shape[1])
+
+        np.testing.assert_array_equal(x, self.x)
+        np.testing.assert_array_equal(y, self.y)
+        self.assertRaises(
+            ValueError, hangman.model.ml.ngrams.pack, np.zeros((1, 12), dtype=np.uint8), self.y[:1]
+        )
+
+    def test_dedupe(self):
+        """Test duplicate ngrams across shards are merged & counted"""
+
+        x = np.concatenate([self.x, self.x[::2], self.x[:, :3].repeat(2, axis=1)[:, :5]])
+        y = np.concatenate([self.y, self.y[::2], self.y])
+
+        keys, counts = np.unique(hangman.model.ml.ngrams.pack(x, y), return_counts=True)
+
+        for processes in (1, 2):
+            with tempfile.TemporaryDirectory() as directory:
+                input_path = os.path.join(directory, "input")
+                output_path = os.path.join(directory, "output")
+                os.mkdir(input_path)
+
+                hangman.model.ml.ngrams.write_shards("a", input_path, x[:30], y[:30], shard_size=20)
+                hangman.model.ml.ngrams.write_shards("b", input_path, x[30:], y[30:], shard_size=20)
+
+                # Output directory is created & shards of earlier runs replaced
+                hangman.model.ml.ngrams.dedupe(
+                    input_path, output_path, buckets=8, processes=processes, verbose=False
+                )
+                samples, unique = hangman.model.ml.ngrams.dedupe(
+                    input_path, output_path, buckets=4, processes=processes, verbose=False
+                )
+                self.assertEqual(samples, len(x))
+                self.assertEqual(unique, len(keys))
+
+                # Only shard files are left in the output directory
+                self.assertTrue(all(x.endswith(".ngrams") for x in os.listdir(output_path)))
+                self.assertLessEqual(len(os.listdir(output_path)), 4)
+
+                shards = hangman.model.ml.ngrams.open_shards(output_path, counts=True)
+                _keys = np.concatenate(
+                    [hangman.model.ml.ngrams.pack(_x, _y) for _x, _y, _ in shards]
+                )
+                _counts = np.concatenate([_counts for _, _, _counts in shards])
+
+            self.assertDictEqual(
+                dict(zip(_keys.tolist(), _counts.tolist())),
+                dict(zip(keys.tolist(), counts.tolist()))
+            )
+
+    def test_dataset_weighted(self):
+        """Test counts of deduplicated shards are streamed as sample weights"""
+
+        counts = np.arange(len(self.y), dtype=np.uint32)
+
+        with tempfile.TemporaryDirectory() as directory:
+            hangman.model.ml.ngrams.write_shard(
+                os.path.join(directory, "5.ngrams"), self.x, self.y, counts
+            )
+            hangman.model.ml.ngrams.write_shard(
+                os.path.join(directory, "6.ngrams"), self.x, self.y
+            )
+
+            batches = list(hangman.model.ml.ngrams.dataset(
+                directory, batch_size=8, shuffle_buffer=0, weighted=True
+            ))
+
+        weights = np.concatenate([w.numpy() for _, _, w in batches])
+        self.assertEqual(weights.dtype, np.float32)
+        np.testing.assert_array_equal(weights, np.concatenate([counts, np.ones(len(counts))]))
@@ -0,0 +1,150 @@
+"""
+Test NNPlayer class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import threading
+import unittest
+
+import numpy as np
+
+import hangman.model.ml
+import hangman.model.ml.utils
+
+
+class ModelDummy(hangman.model.ml.IModel):
+    """Dummy model predicting the letter after the last char of each n-gram"""
+
+    def __init__(self):
+        self.calls = []
+
+    def train(self, epochs: int = 50, batch_size: int = 64):
+        pass
+
+    def predict(self, x):
+        return hangman.model.ml.utils.TO_CHAR[np.argmax(self.predict_batch([x]))]
+
+    def predict_batch(self, x):
+        self.calls.append(len(x))
+
+        result = np.zeros((len(x), len(hangman.model.ml.utils.TO_CHAR) + 1))
+        for idx, _x in enumerate(x):
+            last = [c for c in _x if c != hangman.model.ml.utils.MASKED_CHAR]
+            code = hangman.model.ml.utils.TO_INT[last[-1]] % 26 + 1 if last else 1
+            result[idx, code] = 1.0
+
+        return result
+
+
+class ModelSlow(ModelDummy):
+    """Dummy model that blocks predictions until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def predict_batch(self, x):
+        self.release.wait()
+        return super().predict_batch(x)
+
+
+class TestNNPlayer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "jelly", "belly", "hippo", "happy", "lolly", "yes", "has"]
+
+    def instance(self, model):
+        """Return an instance of NNPlayer class"""
+        return hangman.model.ml.NNPlayer(
+            self.words, model=model, heuristic_thershold=0.5
+        )
+
+    def test_batch(self):
+        """Test model is called once per ML guess with all n-grams"""
+
+        model = ModelDummy()
+        player = self.instance(model)
+
+        self.assertEqual(player.guess("_____"), "l")
+        self.assertEqual(len(model.calls), 0)
+
+        # Over half the letters found so ML guesses are generated
+        player.guess("__ll_")
+        self.assertEqual(len(model.calls), 1)
+        self.assertGreater(model.calls[0], 1)
+
+    def test_ml_guess(self):
+        """Test ML guesses are ranked by probability & exclude guesses"""
+
+        model = ModelDummy()
+        player = self.instance(model)
+
+        player.guess("_____")
+        player.guess("__ll_")
+
+        # 'm' is predicted after each 'l' but isn't a top 3 heuristic letter
+        self.assertListEqual(player._guess("__ll_"), ["m"])
+        self.assertListEqual(player._guess("_ell_"), ["m", "f"])
+
+    def test_incremental(self):
+        """Test only n-grams changed since the last ML guess are predicted"""
+
+        model = ModelDummy()
+        player = self.instance(model)
+
+        first = player._guess("__ll_")
+        self.assertEqual(model.calls, [len(player._predictions)])
+
+        second = player._guess("_ell_")
+        x, _ = hangman.model.ml.utils.n_gram(["_ell_"])
+        expected = {y for y in x if set(y) != {hangman.model.ml.utils.MASKED_CHAR}}
+        self.assertSetEqual(set(player._predictions), expected)
+
+        # N-grams not covering the revealed letter are reused
+        self.assertLess(model.calls[1], len(expected))
+        self.assertListEqual(second, self.instance(ModelDummy())._guess("_ell_"))
+        self.assertListEqual(first, self.instance(ModelDummy())._guess("__ll_"))
+
+    def test_deadline(self):
+        """Test heuristic guess is used when the model misses the deadline"""
+
+        model = ModelSlow()
+        player = hangman.model.ml.NNPlayer(
+            self.words, model=model, heuristic_thershold=0.5, deadline=0.01
+        )
+
+        player.guess("_____")
+        self.assertEqual(player.guess("__ll_"), self.instance(ModelDummy()).guess_for("__ll_"))
+        self.assertEqual(player.fallbacks, 1)
+        self.assertEqual(player.fallback_rate, 1.0)
+
+        # Guesses while the late one is still running don't queue behind it
+        self.assertListEqual(player._guess_before_deadline("_ell_"), [])
+        self.assertEqual(player.fallbacks, 2)
+
+        # Late predictions still complete & are reused by the next guess
+        model.release.set()
+        player._future.result()
+        self.assertEqual(len(model.calls), 1)
+        self.assertGreater(len(player._predictions), 0)
+
+    def test_deadline_met(self):
+        """Test ML guesses are used when the model meets the deadline"""
+
+        model = ModelDummy()
+        player = hangman.model.ml.NNPlayer(
+            self.words, model=model, heuristic_thershold=0.5, deadline=10.0
+        )
+        expected = self.instance(ModelDummy())
+
+        for word in ("_____", "__ll_"):
+            self.assertEqual(player.guess(word), expected.guess(word))
+
+        self.assertEqual(player.deadline_calls, 1)
+        self.assertEqual(player.fallbacks, 0)
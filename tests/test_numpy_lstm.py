@@ -0,0 +1,83 @@
+"""
+Test NumpyLSTModel class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+import hangman.model.ml
+from hangman.model.ml.config import DualBiDir, TriLayer
+from hangman.model.ml.numpy_lstm import NumpyLSTModel
+
+
+class TestNumpyLSTModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.x = [("a", "_"), ("h", "e", "l"), ("_", "p", "p"), ("e",), ("_",) * 7]
+
+    def test_trilayer(self):
+        """Test predictions match keras for the pre-trained model"""
+
+        for pad_sequence in (True, False):
+            expected = hangman.model.ml.LSTModel(
+                "load_model_weights", config=TriLayer(), pad_sequence=pad_sequence
+            )
+            model = NumpyLSTModel(pad_sequence=pad_sequence)
+
+            np.testing.assert_allclose(
+                model.predict_batch(self.x), expected.predict_batch(self.x), atol=1e-5
+            )
+            self.assertListEqual(
+                [model.predict(x) for x in self.x], [expected.predict(x) for x in self.x]
+            )
+
+    def test_bidirectional(self):
+        """Test predictions match keras for a bi-directional model"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "weights.keras")
+
+            # Untrained model with randomly initialised weights
+            config = DualBiDir(input=(5, 1), dense_units=27, lstm_units=8, weights_path=path)
+            config.build().save(path)
+
+            expected = hangman.model.ml.LSTModel("build_weights", config=config)
+
+            model = NumpyLSTModel(path)
+
+            np.testing.assert_allclose(
+                model.predict_batch(self.x), expected.predict_batch(self.x), atol=1e-5
+            )
+
+    def test_compact(self):
+        """Test predictions match keras for a model normalising its own input"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "weights.keras")
+
+            config = TriLayer(
+                input=(5, 1), dense_units=27, lstm_units=8, weights_path=path, compact=True
+            )
+            config.build().save(path)
+
+            expected = hangman.model.ml.LSTModel("build_weights", config=config)
+
+            model = NumpyLSTModel(path)
+            self.assertTrue(model.compact)
+
+            np.testing.assert_allclose(
+                model.predict_batch(self.x), expected.predict_batch(self.x), atol=1e-5
+            )
+
+    def test_train(self):
+        """Test training is rejected as the model is inference only"""
+        self.assertRaises(TypeError, NumpyLSTModel().train)
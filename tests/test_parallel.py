@@ -0,0 +1,114 @@
+"""
+Test data parallel training
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+import hangman.model.ml
+import hangman.model.ml.ngrams
+import hangman.model.ml.parallel
+import hangman.model.ml.utils
+from hangman.model.ml.config import TriLayer
+from hangman.model.ml.sampler import GameStateSampler
+
+
+class TestParallel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "h_pp_", "world", "_a__", "jelly"]
+        cls.x, cls.y = hangman.model.ml.utils.n_gram_codes(cls.words, clean_mask=True)
+
+    @classmethod
+    def config(cls, **kwargs) -> TriLayer:
+        """Return a small compact config"""
+        return TriLayer(
+            input=(5, 1), dense_units=28, lstm_units=4, compact=True, sync_steps=2, **kwargs
+        )
+
+    def test_train(self):
+        """Test weights are averaged across workers & checkpoints written"""
+
+        x, y = hangman.model.ml.utils.model_input_compact(self.x, self.y)
+        x = np.pad(x, ((0, 0), (0, 5 - x.shape[1]), (0, 0)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            model = hangman.model.ml.LSTModel(
+                "build", config=self.config(workers=2), ouput_path=directory
+            )
+            history = model.train(2, 8, x=x, y=y, seed=0, verbose=False)
+
+            self.assertEqual(len(history.history["loss"]), 2)
+            self.assertEqual(len(history.history["worker_samples_per_sec"][-1]), 2)
+            self.assertTrue(all(x > 0 for x in history.history["worker_samples_per_sec"][-1]))
+
+            # Same checkpoints as a single process fit writes
+            checkpoints = [x for x in os.listdir(directory) if x.endswith(".keras")]
+            self.assertTrue(checkpoints)
+            self.assertTrue(sorted(checkpoints)[0].startswith("lstm-01-"))
+
+            path = os.path.join(directory, sorted(checkpoints)[-1])
+            probabilities = hangman.model.ml.NumpyLSTModel(path).predict_batch([("a", "_")])
+            self.assertEqual(probabilities.shape, (1, 28))
+            np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, rtol=1e-4)
+
+    def test_stream(self):
+        """Test scaling of workers training on shards"""
+
+        config = self.config()
+
+        with tempfile.TemporaryDirectory() as directory:
+            hangman.model.ml.ngrams.write_shards("5", directory, self.x, self.y, shard_size=20)
+
+            report = hangman.model.ml.parallel.scaling(
+                config, (1, 2), ngram_path=directory, batch_size=8, width=5, verbose=False
+            )
+
+        self.assertListEqual(list(report), [1, 2])
+        self.assertEqual(report[1]["efficiency"], 1.0)
+        self.assertGreater(report[2]["samples_per_sec"], 0)
+        self.assertAlmostEqual(report[2]["efficiency"], report[2]["speedup"] / 2)
+
+    def test_sampled(self):
+        """Test batches sampled for a worker are model input"""
+
+        sampler = GameStateSampler(self.words)
+        batches = hangman.model.ml.parallel._sampled(sampler, 8, np.random.default_rng(0), True)
+
+        x, y = next(batches)
+        self.assertEqual(x.shape, (8, 5, 1))
+        self.assertEqual(x.dtype, np.float32)
+        self.assertEqual(y.dtype, np.int32)
+
+        config = self.config()
+        self.assertRaises(
+            ValueError, hangman.model.ml.parallel.train, config.build(), config,
+            sampler=sampler, workers=2
+        )
+
+    def test_width(self):
+        """Test data not matching the model input is rejected before starting workers"""
+
+        config = self.config()
+        x, y = hangman.model.ml.utils.model_input_compact(self.x, self.y)
+        x = np.pad(x, ((0, 0), (0, 5 - x.shape[1]), (0, 0)))
+
+        for kwargs in (
+                {"x": x[:, :4], "y": y},
+                {"x": x, "y": y, "width": 4},
+                {"ngram_path": "ngrams", "width": 6},
+                {"sampler": GameStateSampler(self.words, n_max=6), "samples": 8},
+        ):
+            self.assertRaises(
+                ValueError, hangman.model.ml.parallel.train, config.build(), config,
+                workers=2, **kwargs
+            )
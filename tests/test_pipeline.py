@@ -0,0 +1,116 @@
+"""
+Test cached training data pipeline
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import glob
+import tempfile
+import unittest
+
+import numpy as np
+
+import hangman.model.ml.pipeline
+import hangman.model.ml.utils
+from hangman.model.ml.pipeline import COMPLETE, Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "jelly", "happy", "abc", "world", "quiz"]
+
+    @classmethod
+    def instance(cls, directory: str, **kwargs) -> Pipeline:
+        """Return an instance of Pipeline writing to directory"""
+        return Pipeline(cls.words, directory, min=3, max=5, processes=1, verbose=False, **kwargs)
+
+    def test_model_input(self):
+        """Test model input matches building each stage directly"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            x, y = self.instance(directory).model_input()
+
+            masks = [
+                x for word in self.words for x in hangman.model.ml.utils.mask_generator(word)
+            ]
+            expected_x, expected_y = hangman.model.ml.utils.n_gram_codes(masks, clean_mask=True)
+
+            self.assertEqual(x.dtype, np.uint8)
+            self.assertSetEqual(
+                set(zip(map(tuple, x[..., 0].tolist()), y.tolist())),
+                set(
+                    (tuple(_x[:x.shape[1]]), _y)
+                    for _x, _y in zip(expected_x.tolist(), expected_y.tolist())
+                    if any(c not in (0, hangman.model.ml.utils.TO_INT["_"]) for c in _x)
+                )
+            )
+
+    def test_cache(self):
+        """Test stages are skipped when their inputs haven't changed"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            pipeline = self.instance(directory)
+            x, y = pipeline.model_input()
+            self.assertFalse(any(x["hit"] for x in pipeline.stats().values()))
+
+            cached = self.instance(directory)
+            _x, _y = cached.model_input()
+            self.assertTrue(all(x["hit"] for x in cached.stats().values()))
+            np.testing.assert_array_equal(_x, x)
+            np.testing.assert_array_equal(_y, y)
+
+            # Only stages after the changed input are rebuilt
+            changed = self.instance(directory, n_max=4)
+            changed.model_input()
+            stats = changed.stats()
+            self.assertTrue(stats["masks"]["hit"])
+            self.assertFalse(stats["ngrams"]["hit"])
+            self.assertFalse(stats["model_input"]["hit"])
+            self.assertNotEqual(stats["ngrams"]["key"], pipeline.stats()["ngrams"]["key"])
+
+            # Word list is part of every key
+            self.assertNotEqual(
+                pipeline.key("masks"), Pipeline(self.words[1:], directory, min=3, max=5).key("masks")
+            )
+
+            # Changing the format of a stage rebuilds it & the stages after it
+            versions = dict(hangman.model.ml.pipeline.FORMAT_VERSION)
+            try:
+                hangman.model.ml.pipeline.FORMAT_VERSION["ngrams"] += 1
+                bumped = self.instance(directory)
+                self.assertEqual(bumped.key("masks"), pipeline.key("masks"))
+                self.assertNotEqual(bumped.key("ngrams"), pipeline.key("ngrams"))
+                self.assertNotEqual(bumped.key("model_input"), pipeline.key("model_input"))
+            finally:
+                hangman.model.ml.pipeline.FORMAT_VERSION.update(versions)
+
+    def test_resume(self):
+        """Test an interrupted stage only rebuilds outputs not already written"""
+
+        with tempfile.TemporaryDirectory() as directory:
+            pipeline = self.instance(directory)
+            x, y = pipeline.model_input()
+
+            # Interrupt ngrams stage part way through
+            ngrams = pipeline.path("ngrams")
+            os.remove(os.path.join(ngrams, COMPLETE))
+            os.remove(os.path.join(ngrams, "5.done"))
+            for path in glob.glob(os.path.join(ngrams, "5-*.ngrams")):
+                os.remove(path)
+            mtime = os.path.getmtime(glob.glob(os.path.join(ngrams, "3-*.ngrams"))[0])
+
+            resumed = self.instance(directory)
+            resumed.model_input()
+
+            self.assertFalse(resumed.stats()["ngrams"]["hit"])
+            self.assertTrue(glob.glob(os.path.join(ngrams, "5-*.ngrams")))
+            self.assertEqual(
+                os.path.getmtime(glob.glob(os.path.join(ngrams, "3-*.ngrams"))[0]), mtime
+            )
+            self.assertEqual(len(hangman.model.ml.utils.load_ngrams(ngrams)[1]), len(y))
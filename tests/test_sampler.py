@@ -0,0 +1,100 @@
+"""
+Test game state sampler
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import itertools
+import pickle
+import unittest
+
+import numpy as np
+
+import hangman.model.ml.sampler
+import hangman.model.ml.utils
+from hangman.model.ml.sampler import GameStateSampler
+
+
+class TestGameStateSampler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = ["hello", "apples", "abc", "a"]
+        cls.masked = hangman.model.ml.utils.TO_INT[hangman.model.ml.utils.MASKED_CHAR]
+
+    def test_states(self):
+        """Test states reveal every occurrence of some but not all letters"""
+
+        for order in hangman.model.ml.sampler.ORDERS:
+            sampler = GameStateSampler(self.words, order=order)
+            states, lengths = sampler.states(200, np.random.default_rng(0))
+
+            self.assertEqual(len(sampler.matrix), 3)
+            for state, length in zip(states.tolist(), lengths.tolist()):
+                word = next(x for x in self.words if len(x) == length)
+                hidden = {y for c, y in zip(state, word) if c == self.masked}
+
+                self.assertTrue(hidden)
+                for c, y in zip(state, word):
+                    expected = self.masked if y in hidden else hangman.model.ml.utils.TO_INT[y]
+                    self.assertEqual(c, expected)
+                self.assertTrue(all(c == 0 for c in state[length:]))
+
+        self.assertRaises(ValueError, GameStateSampler, self.words, order="alphabetical")
+        self.assertRaises(ValueError, GameStateSampler, ["a"])
+
+    def test_sample(self):
+        """Test sampled ngrams are ngrams of masked words"""
+
+        sampler = GameStateSampler(["abca"], clean_mask=False)
+        x, y = sampler.sample(500, np.random.default_rng(0))
+
+        self.assertEqual(x.shape, (500, 5))
+        self.assertEqual(y.shape, (500,))
+
+        # All states of 'abca' with at least one letter hidden
+        masks = [
+            "".join(c if c in revealed else "_" for c in "abca")
+            for n in range(3) for revealed in itertools.combinations("abc", n)
+        ]
+        expected_x, expected_y = hangman.model.ml.utils.n_gram_codes(masks)
+        self.assertTrue(
+            set(zip(map(tuple, x.tolist()), y.tolist())).issubset(
+                zip(map(tuple, expected_x.tolist()), expected_y.tolist())
+            )
+        )
+
+        # Ngrams predicting or made only from masked chars are dropped
+        x, y = GameStateSampler(self.words).sample(500, np.random.default_rng(0))
+        self.assertEqual(len(x), 500)
+        self.assertTrue((y != self.masked).all())
+        self.assertTrue(((x != self.masked) & (x != 0)).any(axis=1).all())
+
+    def test_dataset(self):
+        """Test batches are model input & the same for a seed"""
+
+        sampler = GameStateSampler(self.words)
+        data = hangman.model.ml.sampler.dataset(sampler, batch_size=8, steps=3, seed=0)
+
+        self.assertEqual(len(data), 3)
+        x, y = data[1]
+        self.assertEqual(x.shape, (8, 5, 1))
+        self.assertEqual(x.dtype, np.float32)
+        self.assertEqual(y.dtype, np.int32)
+        self.assertLessEqual(x.max(), 1.0)
+
+        np.testing.assert_array_equal(data[1][0], x)
+        self.assertFalse(np.array_equal(data[2][0], x))
+
+        # Batches differ between epochs
+        data.on_epoch_end()
+        self.assertFalse(np.array_equal(data[1][0], x))
+
+        # Instances can be sent to worker processes started with spawn
+        _data = pickle.loads(pickle.dumps(data))
+        self.assertIsInstance(_data, hangman.model.ml.sampler.GameStateDataset)
+        np.testing.assert_array_equal(_data[1][0], data[1][0])
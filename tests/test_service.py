@@ -0,0 +1,135 @@
+"""
+Test InferenceService class
+"""
+
+import os
+import sys
+
+# insert project directory to PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
+
+import threading
+import unittest
+
+import numpy as np
+
+import hangman.model.ml.utils
+from hangman.model.ml.service import Histogram, InferenceService
+from test_nnplayer import ModelDummy
+
+
+class ModelError(ModelDummy):
+    """Dummy model that fails every prediction"""
+
+    def predict_batch(self, x):
+        raise ValueError("Prediction failed")
+
+
+class TestInferenceService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.x = [
+            [("a", "_"), ("h", "e", "l")],
+            [("_", "p", "p")],
+            [("e",), ("l", "l"), ("o",)],
+            [],
+        ]
+
+    def predict(self, service, x):
+        """Call predict_batch for each input from its own thread"""
+
+        results = [None] * len(x)
+        barrier = threading.Barrier(len(x))
+
+        def _predict(idx):
+            barrier.wait()
+            results[idx] = service.predict_batch(x[idx])
+
+        threads = [threading.Thread(target=_predict, args=(idx,)) for idx in range(len(x))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def test_batch(self):
+        """Test concurrent requests are run as one batch & routed back"""
+
+        model = ModelDummy()
+        with InferenceService(model, max_batch_size=100, max_wait=1.0) as service:
+            results = self.predict(service, self.x * 2)
+
+        expected = ModelDummy()
+        for x, result in zip(self.x * 2, results):
+            np.testing.assert_array_equal(result, expected.predict_batch(x))
+
+        # Batch is flushed once every request has arrived as it's under the max size
+        self.assertEqual(model.calls, [2 * sum(len(x) for x in self.x)])
+
+        stats = service.stats()
+        self.assertEqual(stats["requests"], len(self.x) * 2)
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["batch_size"]["max"], 12)
+
+    def test_max_batch_size(self):
+        """Test batch is flushed once it reaches max batch size"""
+
+        model = ModelDummy()
+        with InferenceService(model, max_batch_size=1, max_wait=1.0) as service:
+            self.assertEqual(service.predict(("a", "b")), "c")
+            self.predict(service, self.x)
+
+        self.assertEqual(len(model.calls), service.batches)
+        self.assertGreater(service.batches, 1)
+
+    def test_error(self):
+        """Test model errors are raised in the calling thread"""
+
+        with InferenceService(ModelError(), max_wait=0.0) as service:
+            self.assertRaises(ValueError, service.predict_batch, self.x[0])
+
+        self.assertRaises(RuntimeError, service.predict_batch, self.x[0])
+        self.assertRaises(TypeError, service.train)
+
+    def test_close(self):
+        """Test requests racing close are either run or raise, never left waiting"""
+
+        service = InferenceService(ModelDummy(), max_wait=0.0)
+        errors = []
+
+        def _predict():
+            try:
+                while True:
+                    service.predict_batch(self.x[0])
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=_predict, daemon=True) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        service.close()
+        for thread in threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(len(errors), len(threads))
+        self.assertTrue(service._queue.empty())
+
+    def test_histogram(self):
+        """Test values are counted in buckets"""
+
+        histogram = Histogram((1, 2, 4))
+        for value in (0.5, 1, 3, 3, 10):
+            histogram.add(value)
+
+        self.assertListEqual(histogram.counts, [2, 0, 2, 1])
+        self.assertEqual(histogram.percentile(50), 4)
+        self.assertEqual(histogram.percentile(100), 10)
+        self.assertEqual(histogram.stats()["mean"], 17.5 / 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
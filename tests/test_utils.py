@@ -6,8 +6,12 @@ import sys
 # insert project directory to PATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.abspath(''), "..")))
 
+import tempfile
 import unittest
 
+import numpy as np
+import tensorflow.keras.preprocessing.sequence
+
 import hangman.model.ml.utils
 
 
@@ -37,6 +41,56 @@ class TestMLUtils(unittest.TestCase):
             ['__c', '_b_', '_bc', 'a__', 'a_c', 'ab_']
         )
 
+    def test_mask_words(self):
+        """Test masks for a batch of words match mask_generator & can be sampled"""
+
+        words = ["hello", "jelly", "happy"]
+
+        chunks = list(hangman.model.ml.utils.mask_words(words, chunk_size=20))
+        self.assertGreater(len(chunks), 1)
+        self.assertListEqual(
+            sorted(x.tobytes().decode() for chunk in chunks for x in chunk),
+            sorted(y for x in words for y in hangman.model.ml.utils.mask_generator(x))
+        )
+
+        rng = np.random.default_rng(0)
+        sampled = np.concatenate(list(
+            hangman.model.ml.utils.mask_words(words, sample=4, rng=rng)
+        ))
+        self.assertEqual(len(sampled), 4 * len(words))
+        for idx, word in enumerate(words):
+            _sampled = [x.tobytes().decode() for x in sampled[idx * 4:(idx + 1) * 4]]
+            self.assertEqual(len(set(_sampled)), 4)
+            self.assertTrue(set(_sampled).issubset(hangman.model.ml.utils.mask_generator(word)))
+
+        # Chunks are bounded by patterns drawn from, not the number sampled
+        chunks = list(hangman.model.ml.utils.mask_words(words, sample=2, chunk_size=20))
+        self.assertEqual(len(chunks), len(words))
+
+        with self.assertRaises(ValueError):
+            list(hangman.model.ml.utils.mask_words(words, sample=0))
+
+    def test_build_masks(self):
+        """Test masks are written to a file per word length"""
+
+        words = ["abc", "hello", "jelly", "Happy", "ab"]
+
+        for processes in (1, 2):
+            with tempfile.TemporaryDirectory() as directory:
+                counts = hangman.model.ml.utils.build_masks(
+                    words, directory, min=3, max=5, processes=processes
+                )
+                self.assertDictEqual(counts, {3: 3, 4: 0, 5: 75})
+
+                with open(os.path.join(directory, "5.txt")) as f:
+                    self.assertListEqual(
+                        sorted(f.read().splitlines()),
+                        sorted(
+                            y for x in ("hello", "jelly", "happy")
+                            for y in hangman.model.ml.utils.mask_generator(x)
+                        )
+                    )
+
     def test_ngrams(self):
         """Test that ngrams of a range of sizes are created correctly for input words"""
 
@@ -79,3 +133,95 @@ class TestMLUtils(unittest.TestCase):
             sorted(list(zip(_x, _y))),
             [(('_', 'b'), 'a'), (('a',), 'b'), (('b',), 'a')]
         )
+
+    def test_pad_sequences(self):
+        """Test padding matches keras pad_sequences with padding after"""
+
+        x = [[1, 2], [3, 4, 5, 6, 7, 8], [9], []]
+        for maxlen in (None, 1, 5):
+            np.testing.assert_array_equal(
+                hangman.model.ml.utils.pad_sequences(x, maxlen=maxlen),
+                tensorflow.keras.preprocessing.sequence.pad_sequences(
+                    x, padding="post", maxlen=maxlen
+                )
+            )
+
+    def test_n_gram_windows(self):
+        """Test ngrams keyed on span match n_gram & can be updated by position"""
+
+        for word in ("ab", "abcd", "h_pp_", "abcdefghij"):
+            x, _ = hangman.model.ml.utils.n_gram([word])
+            windows = hangman.model.ml.utils.n_gram_windows(word)
+            self.assertSetEqual(set(windows.values()), set(x))
+
+        windows = hangman.model.ml.utils.n_gram_windows("h_pp_")
+        windows.update(hangman.model.ml.utils.n_gram_windows("h_ppy", [4]))
+        self.assertDictEqual(windows, hangman.model.ml.utils.n_gram_windows("h_ppy"))
+
+        self.assertDictEqual(
+            hangman.model.ml.utils.n_gram_windows("abc", [0]),
+            {(0, 1, False): ("a",), (0, 2, False): ("a", "b")}
+        )
+
+    def test_n_gram_codes(self):
+        """Test encoded ngrams match n_gram & feed model_input"""
+
+        expected = {
+            False: [
+                (("_",), "a"), (("_",), "h"), (("a",), "_"),
+                (("a", "_"), "h"), (("h",), "_"), (("h", "_"), "a"),
+            ],
+            # Ngrams predicting the masked char or only made of it are dropped
+            True: [(("a", "_"), "h"), (("h", "_"), "a")],
+        }
+
+        for clean_mask, _expected in expected.items():
+            x, y = hangman.model.ml.utils.n_gram_codes(["h_a", "h_a"], clean_mask=clean_mask)
+            self.assertEqual(x.shape, (len(_expected), 5))
+
+            x_char, y_char = hangman.model.ml.utils.n_gram(["h_a"], clean_mask=clean_mask)
+            self.assertListEqual(sorted(zip(x_char, y_char)), _expected)
+
+        x, y = hangman.model.ml.utils.n_gram_codes(["abc"], reverse=False)
+        self.assertListEqual(
+            sorted(zip(map(tuple, x.tolist()), y.tolist())),
+            [((1, 0, 0, 0, 0), 2), ((1, 2, 0, 0, 0), 3), ((2, 0, 0, 0, 0), 3)]
+        )
+
+        model_x, model_y = hangman.model.ml.utils.model_input_codes(x, y)
+        self.assertEqual(model_x.shape, (3, 2, 1))
+        self.assertEqual(model_y.shape, (3, 4))
+
+        # Widest windows that fit in one key, wider ones would overflow it
+        word = "abcdefghijklmnopq"
+        x, y = hangman.model.ml.utils.n_gram_codes([word], n_max=13, reverse=False)
+        self.assertIn(list(range(1, 12)), x.tolist())
+        self.assertEqual(x.shape[1], 11)
+        self.assertEqual(len(x), sum(len(word) - n + 1 for n in range(2, 13)))
+        self.assertRaises(ValueError, hangman.model.ml.utils.n_gram, [word], n_max=14)
+
+        # Chars outside TO_INT would otherwise be encoded as padding
+        for word in ("Hello", "h-llo", "héllo"):
+            self.assertRaises(ValueError, hangman.model.ml.utils.n_gram_codes, [word])
+
+    def test_model_input_compact(self):
+        """Test compact model input holds the same codes in uint8"""
+
+        x, y = hangman.model.ml.utils.n_gram_codes(["hello", "h_pp_", "abc"])
+        model_x, model_y = hangman.model.ml.utils.model_input_codes(x, y)
+        compact_x, compact_y = hangman.model.ml.utils.model_input_compact(x, y)
+
+        self.assertEqual(compact_x.dtype, np.uint8)
+        self.assertEqual(compact_y.dtype, np.uint8)
+        self.assertEqual(compact_x.shape, model_x.shape)
+        np.testing.assert_allclose(compact_x / len(hangman.model.ml.utils.TO_CHAR), model_x)
+        np.testing.assert_array_equal(compact_y, model_y.argmax(axis=1))
+
+        self.assertEqual(
+            hangman.model.ml.utils.bytes_per_sample(compact_x, compact_y), compact_x.shape[1] + 1
+        )
+        self.assertGreater(
+            hangman.model.ml.utils.bytes_per_sample(model_x, model_y),
+            10 * hangman.model.ml.utils.bytes_per_sample(compact_x, compact_y)
+        )
+        self.assertRaises(ValueError, hangman.model.ml.utils.model_input_compact, x, y[1:])